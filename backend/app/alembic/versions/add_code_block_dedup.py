@@ -0,0 +1,45 @@
+"""Add content-addressed code block deduplication
+
+Revision ID: add_code_block_dedup
+Revises: add_user_custom_tags
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_code_block_dedup'
+down_revision = 'add_user_custom_tags'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'codeblock',
+        sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True),
+    )
+    op.add_column(
+        'codeblock',
+        sa.Column('occurrence_count', sa.Integer(), nullable=False, server_default='1'),
+    )
+    op.add_column('codeblock', sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+    op.add_column('codeblock', sa.Column('last_seen_conversation_id', sa.UUID(), nullable=True))
+    # Existing blocks keep a NULL hash, which never conflicts
+    op.create_index(
+        'ix_codeblock_user_id_content_hash',
+        'codeblock',
+        ['user_id', 'content_hash'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_codeblock_user_id_content_hash', table_name='codeblock')
+    op.drop_column('codeblock', 'last_seen_conversation_id')
+    op.drop_column('codeblock', 'last_seen_at')
+    op.drop_column('codeblock', 'occurrence_count')
+    op.drop_column('codeblock', 'content_hash')
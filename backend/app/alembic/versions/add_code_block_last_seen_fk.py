@@ -0,0 +1,43 @@
+"""Make codeblock.last_seen_conversation_id a foreign key
+
+Revision ID: add_code_block_last_seen_fk
+Revises: add_conversation_token_count
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_code_block_last_seen_fk'
+down_revision = 'add_conversation_token_count'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Blocks last seen in an already deleted conversation
+    op.execute(
+        "UPDATE codeblock SET last_seen_conversation_id = NULL "
+        "WHERE last_seen_conversation_id IS NOT NULL AND NOT EXISTS "
+        "(SELECT 1 FROM conversation WHERE conversation.id = codeblock.last_seen_conversation_id)"
+    )
+    op.create_index(
+        op.f('ix_codeblock_last_seen_conversation_id'),
+        'codeblock',
+        ['last_seen_conversation_id'],
+        unique=False,
+    )
+    op.create_foreign_key(
+        'codeblock_last_seen_conversation_id_fkey',
+        'codeblock',
+        'conversation',
+        ['last_seen_conversation_id'],
+        ['id'],
+        ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('codeblock_last_seen_conversation_id_fkey', 'codeblock', type_='foreignkey')
+    op.drop_index(op.f('ix_codeblock_last_seen_conversation_id'), table_name='codeblock')
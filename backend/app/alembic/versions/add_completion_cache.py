@@ -0,0 +1,41 @@
+"""Add completion cache
+
+Revision ID: add_completion_cache
+Revises: add_red_panda_models
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_completion_cache'
+down_revision = 'add_red_panda_models'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('completioncache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_completioncache_user_id'), 'completioncache', ['user_id'], unique=False)
+    op.create_index(op.f('ix_completioncache_last_used_at'), 'completioncache', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_completioncache_last_used_at'), table_name='completioncache')
+    op.drop_index(op.f('ix_completioncache_user_id'), table_name='completioncache')
+    op.drop_table('completioncache')
@@ -0,0 +1,29 @@
+"""Add conversation summary
+
+Revision ID: add_conversation_summary
+Revises: add_message_token_count
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_conversation_summary'
+down_revision = 'add_message_token_count'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('conversation', sa.Column('summary', sa.Text(), nullable=True))
+    op.add_column('conversation', sa.Column('summary_message_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('conversation', sa.Column('summary_through', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversation', 'summary_through')
+    op.drop_column('conversation', 'summary_message_count')
+    op.drop_column('conversation', 'summary')
@@ -0,0 +1,33 @@
+"""Add running conversation token count
+
+Revision ID: add_conversation_token_count
+Revises: add_code_block_dedup
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_conversation_token_count'
+down_revision = 'add_code_block_dedup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'conversation',
+        sa.Column('token_count', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.execute(
+        "UPDATE conversation SET token_count = COALESCE(("
+        "SELECT SUM(COALESCE(message.token_count, (char_length(message.content) + 3) / 4 + 4)) "
+        "FROM message WHERE message.conversation_id = conversation.id), 0)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('conversation', 'token_count')
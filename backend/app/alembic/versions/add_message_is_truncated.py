@@ -0,0 +1,28 @@
+"""Add message truncation flag
+
+Revision ID: add_message_is_truncated
+Revises: add_usage_ledger
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_message_is_truncated'
+down_revision = 'add_usage_ledger'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'message',
+        sa.Column('is_truncated', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('message', 'is_truncated')
@@ -0,0 +1,27 @@
+"""Add message token count
+
+Revision ID: add_message_token_count
+Revises: add_completion_cache
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_message_token_count'
+down_revision = 'add_completion_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('message', sa.Column('token_count', sa.Integer(), nullable=True))
+    # Backfill with the same heuristic as app.services.token_estimator
+    op.execute("UPDATE message SET token_count = (char_length(content) + 3) / 4 + 4")
+
+
+def downgrade() -> None:
+    op.drop_column('message', 'token_count')
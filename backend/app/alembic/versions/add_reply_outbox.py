@@ -0,0 +1,39 @@
+"""Add reply post-processing outbox
+
+Revision ID: add_reply_outbox
+Revises: add_message_is_truncated
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_reply_outbox'
+down_revision = 'add_message_is_truncated'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('replyoutbox',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('message_id', sa.UUID(), nullable=False),
+        sa.Column('conversation_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+        sa.ForeignKeyConstraint(['message_id'], ['message.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_replyoutbox_claimed_at'), 'replyoutbox', ['claimed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_replyoutbox_claimed_at'), table_name='replyoutbox')
+    op.drop_table('replyoutbox')
@@ -0,0 +1,62 @@
+"""Add usage ledger
+
+Revision ID: add_usage_ledger
+Revises: add_conversation_summary
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_usage_ledger'
+down_revision = 'add_conversation_summary'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('usageevent',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('conversation_id', sa.UUID(), nullable=True),
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('input_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('output_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cached_input_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cache_write_input_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('prompt_tokens_saved', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('latency_ms', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('time_to_first_token_ms', sa.Integer(), nullable=True),
+        sa.Column('from_cache', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_usageevent_user_id'), 'usageevent', ['user_id'], unique=False)
+    op.create_index(op.f('ix_usageevent_created_at'), 'usageevent', ['created_at'], unique=False)
+
+    op.create_table('usagedaily',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('provider', sa.String(length=20), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('request_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('input_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('output_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cached_input_tokens', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('latency_ms_total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'provider', 'model')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('usagedaily')
+    op.drop_index(op.f('ix_usageevent_created_at'), table_name='usageevent')
+    op.drop_index(op.f('ix_usageevent_user_id'), table_name='usageevent')
+    op.drop_table('usageevent')
@@ -0,0 +1,28 @@
+"""Add user-defined code block tags
+
+Revision ID: add_user_custom_tags
+Revises: add_reply_outbox
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_custom_tags'
+down_revision = 'add_reply_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user',
+        sa.Column('custom_tags', sa.JSON(), nullable=False, server_default='[]'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'custom_tags')
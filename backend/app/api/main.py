@@ -1,16 +1,18 @@
 from fastapi import APIRouter
 
 from app.api.routes import (
+    chat,
+    code_blocks,
+    conversations,
+    files,
     login,
+    messages,
     private,
     users,
     utils,
-    conversations,
-    code_blocks,
-    messages,
-    files,
+)
+from app.api.routes import (
     settings as settings_routes,
-    chat,
 )
 from app.core.config import settings
 
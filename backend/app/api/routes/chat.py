@@ -1,127 +1,207 @@
 """API routes for chat functionality with streaming support."""
-import uuid
-from typing import Any, List, Optional
-import json
+
 import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncGenerator
+from typing import Any
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, status
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.deps import CurrentUser, SessionDep
-from app.crud_ops.conversation import get_conversation, update_conversation
-from app.crud_ops.message import create_message, get_messages_by_conversation
-from app.crud_ops.code_block import create_code_block
+from app.api.deps import AsyncSessionDep, CurrentUser
+from app.core.config import settings
+from app.core.db import async_engine
+from app.crud_ops.conversation import get_conversation_async
+from app.crud_ops.message import create_message_async, create_reply_async
+from app.models.conversation import Conversation
 from app.models.message import MessageCreate, MessageRole
-from app.models.code_block import CodeBlockCreate
-from app.models.conversation import ConversationUpdate
+from app.models.usage import UsageEvent
+from app.models.user import User
+from app.services.chat_coalescer import StreamBroadcast, chat_coalescer
+from app.services.code_parser import IncrementalFenceParser, code_parser
+from app.services.context_builder import context_builder
+from app.services.llm_resilience import LLMError
+from app.services.llm_scheduler import SchedulerRejected, llm_scheduler
 from app.services.llm_service import (
-    llm_service,
-    LLMProvider,
     LLMConfig,
-    ChatMessage as LLMChatMessage,
+    LLMProvider,
+    LLMUsage,
+    llm_service,
 )
-from app.services.code_parser import code_parser
+from app.services.model_router import AUTO_MODEL, ModelPreference
+from app.services.reply_pipeline import reply_pipeline
+from app.services.response_cache import response_cache
+from app.services.sse_framer import sse_framer
+from app.services.summarizer import conversation_summarizer
+from app.services.token_estimator import estimate_tokens
+from app.services.usage_recorder import usage_recorder
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable Nginx buffering
+}
+
 
 class ChatRequest(BaseModel):
     """Request model for chat completion."""
+
     conversation_id: uuid.UUID
     message: str
     provider: LLMProvider = LLMProvider.OPENAI
-    model: Optional[str] = None
+    # "auto" picks a model from the prompt; None uses the provider default
+    model: str | None = AUTO_MODEL
+    # What "auto" optimizes for
+    model_preference: ModelPreference = ModelPreference.BALANCED
     temperature: float = 0.7
-    max_tokens: Optional[int] = None
+    max_tokens: int | None = None
     stream: bool = True
+    # Serve identical prompts from the completion cache even when temperature > 0
+    use_cache: bool = False
+    # Retry on the user's other provider if the requested one is failing
+    failover: bool = False
+    # Client-chosen key; a retried request with the same key gets the
+    # original response instead of a second completion
+    idempotency_key: str | None = Field(default=None, max_length=255)
 
 
 class ChatResponse(BaseModel):
     """Response model for non-streaming chat."""
+
     message_id: uuid.UUID
     content: str
-    code_blocks: List[dict] = []
+    code_blocks: list[dict[str, Any]] = []
+    usage: dict[str, Any] = {}
 
 
-async def process_and_save_response(
-    session: SessionDep,
+def record_usage(
+    *,
+    user_id: uuid.UUID,
+    conversation_id: uuid.UUID,
+    usage: LLMUsage,
+    prompt_tokens_saved: int,
+    started_at: float,
+    first_token_at: float | None = None,
+    from_cache: bool = False,
+) -> None:
+    """Queue a usage ledger entry for one chat turn."""
+    usage_recorder.record(
+        UsageEvent(
+            user_id=user_id,
+            conversation_id=conversation_id,
+            provider=usage.provider or "",
+            model=usage.model or "",
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cached_input_tokens=usage.cached_input_tokens,
+            cache_write_input_tokens=usage.cache_write_input_tokens,
+            prompt_tokens_saved=prompt_tokens_saved,
+            latency_ms=int((time.perf_counter() - started_at) * 1000),
+            time_to_first_token_ms=(
+                int((first_token_at - started_at) * 1000) if first_token_at else None
+            ),
+            from_cache=from_cache,
+        )
+    )
+
+
+def build_config(
+    *,
+    conversation: Conversation,
+    request: ChatRequest,
+    stream: bool,
+) -> LLMConfig:
+    """LLM config for a request, with ``auto`` resolved to a concrete model.
+
+    The router uses the conversation's running token count as the prompt
+    size.
+    """
+    decision = llm_service.route_model(
+        request.provider,
+        request.model,
+        message=request.message,
+        prompt_tokens=min(conversation.token_count, settings.CHAT_CONTEXT_MAX_TOKENS),
+        preference=request.model_preference,
+        max_tokens=request.max_tokens,
+    )
+    config = LLMConfig(
+        provider=request.provider,
+        model=decision.model,
+        temperature=request.temperature,
+        max_tokens=request.max_tokens,
+        stream=stream,
+        failover=request.failover,
+    )
+    return config
+
+
+async def save_reply(
+    session: AsyncSession,
     user_id: uuid.UUID,
     conversation_id: uuid.UUID,
     content: str,
-) -> tuple[uuid.UUID, List[dict]]:
-    """Process the LLM response, extract code blocks, and save everything."""
-    # Create assistant message
-    assistant_message = create_message(
+    is_truncated: bool = False,
+    message_id: uuid.UUID | None = None,
+) -> tuple[uuid.UUID, asyncio.Future[list[dict[str, Any]]] | None]:
+    """Save the LLM response and queue its code block extraction.
+
+    Returns the message id and a future for the code blocks, which the
+    reply pipeline stores in the background. The future is None when the
+    pipeline is too busy to queue the job; the outbox sweep runs it later.
+    """
+    assistant_message, job = await create_reply_async(
         session=session,
         message_in=MessageCreate(
-            role=MessageRole.ASSISTANT.value,
+            role=MessageRole.ASSISTANT,
             content=content,
+            conversation_id=conversation_id,
         ),
         conversation_id=conversation_id,
+        user_id=user_id,
+        is_truncated=is_truncated,
+        message_id=message_id,
     )
-    
-    # Extract and save code blocks
-    code_blocks_data = code_parser.extract_code_blocks(content)
-    saved_code_blocks = []
-    
-    for block_data in code_blocks_data:
-        # Extract tags from the conversation context
-        tags = code_parser.extract_tags_from_text(content)
-        
-        code_block_in = CodeBlockCreate(
-            conversation_id=conversation_id,
-            code=block_data["code"],
-            language=block_data["language"],
-            description=block_data.get("description"),
-            tags=tags,
-            imports=block_data.get("metadata", {}).get("imports", []),
-            functions_defined=block_data.get("metadata", {}).get("functions", []),
-            variables_created=block_data.get("metadata", {}).get("variables", []),
-        )
-        
-        code_block = create_code_block(
-            session=session,
-            code_block_in=code_block_in,
-            user_id=user_id,
-        )
-        
-        saved_code_blocks.append({
-            "id": str(code_block.id),
-            "language": code_block.language,
-            "description": code_block.description,
-        })
-        
-        # Add code block reference to message
-        assistant_message.code_block_ids.append(code_block.id)
-    
-    # Update message with code block references
-    if saved_code_blocks:
-        session.add(assistant_message)
-        session.commit()
-    
-    # Update conversation's last message preview
-    update_conversation(
-        session=session,
-        db_conversation=session.get(ConversationUpdate, conversation_id),
-        conversation_in=ConversationUpdate(
-            last_message_preview=content[:500],
-        ),
+    return assistant_message.id, reply_pipeline.enqueue(job.id)
+
+
+async def code_block_event(
+    message_id: uuid.UUID, index: int, block: dict[str, str]
+) -> dict[str, Any]:
+    """``code_block`` event for a fence closed while the reply streams.
+
+    The content hash is left to the reply pipeline, which stores the block.
+    """
+    code_block = await code_parser.build_block_async(
+        block["code"], block["language"], with_hash=False
     )
-    
-    return assistant_message.id, saved_code_blocks
+    return {
+        "type": "code_block",
+        "message_id": str(message_id),
+        "index": index,
+        "code_block": code_block,
+    }
 
 
 @router.post("/complete", response_model=ChatResponse)
 async def chat_completion(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     request: ChatRequest,
+    background_tasks: BackgroundTasks,
 ) -> Any:
     """Create a chat completion (non-streaming)."""
     # Verify conversation belongs to user
-    conversation = get_conversation(
+    conversation = await get_conversation_async(
         session=session,
         conversation_id=request.conversation_id,
         user_id=current_user.id,
@@ -131,158 +211,458 @@ async def chat_completion(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
-    
-    # Save user message
-    user_message = create_message(
-        session=session,
-        message_in=MessageCreate(
-            role=MessageRole.USER.value,
-            content=request.message,
-        ),
-        conversation_id=request.conversation_id,
-    )
-    
-    # Get conversation history
-    messages = get_messages_by_conversation(
-        session=session,
-        conversation_id=request.conversation_id,
-        limit=50,  # Last 50 messages for context
+
+    async def complete() -> ChatResponse:
+        # Save user message
+        await create_message_async(
+            session=session,
+            message_in=MessageCreate(
+                role=MessageRole.USER,
+                content=request.message,
+                conversation_id=request.conversation_id,
+            ),
+            conversation_id=request.conversation_id,
+        )
+
+        # Create LLM config, routing "auto" to a model
+        config = build_config(conversation=conversation, request=request, stream=False)
+
+        # Pack the most recent history into the model's context budget
+        context = await context_builder.build_async(
+            session=session,
+            conversation=conversation,
+            config=config,
+        )
+        llm_messages = context.messages
+
+        # Deterministic requests can be answered from the completion cache
+        cache_key = None
+        response_content = None
+        if response_cache.is_cacheable(config, request.use_cache):
+            cache_key = response_cache.make_key(current_user.id, llm_messages, config)
+            response_content = await response_cache.get_async(session, cache_key)
+
+        # End the read transaction so no pooled connection is held while
+        # waiting for the provider
+        await session.commit()
+
+        # Get completion from LLM
+        usage = LLMUsage(provider=config.provider.value, model=config.model)
+        started_at = time.perf_counter()
+        from_cache = response_content is not None
+        if response_content is None:
+            try:
+                async with llm_scheduler.slot(
+                    current_user.id, config.provider.value
+                ) as ticket:
+                    response_content = await llm_service.create_chat_completion(
+                        user=current_user,
+                        messages=llm_messages,
+                        config=config,
+                        usage=usage,
+                        ticket=ticket,
+                    )
+            except SchedulerRejected as e:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=str(e),
+                )
+            except LLMError as e:
+                raise HTTPException(status_code=e.status_code, detail=e.message)
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=str(e),
+                )
+
+            if cache_key:
+                await response_cache.set_async(
+                    session,
+                    cache_key,
+                    current_user.id,
+                    config,
+                    response_content,
+                )
+
+        record_usage(
+            user_id=current_user.id,
+            conversation_id=request.conversation_id,
+            usage=usage,
+            prompt_tokens_saved=context.tokens_saved,
+            started_at=started_at,
+            from_cache=from_cache,
+        )
+
+        # Save the response; the code blocks are extracted in the background
+        message_id, code_blocks_ready = await save_reply(
+            session=session,
+            user_id=current_user.id,
+            conversation_id=request.conversation_id,
+            content=response_content,
+        )
+        code_blocks = await reply_pipeline.wait(
+            code_blocks_ready, settings.REPLY_PIPELINE_EVENT_TIMEOUT_SECONDS
+        )
+
+        # Fold older messages into the rolling summary once the reply is sent
+        background_tasks.add_task(
+            conversation_summarizer.maybe_update,
+            request.conversation_id,
+            current_user.id,
+        )
+
+        return ChatResponse(
+            message_id=message_id,
+            content=response_content,
+            code_blocks=code_blocks or [],
+            usage=usage.summary(),
+        )
+
+    # Duplicate submissions share one run; retries with the same
+    # idempotency key get the original response
+    key = chat_coalescer.make_key(
+        "complete",
+        current_user.id,
+        request.model_dump(mode="json", exclude={"idempotency_key"}),
+        request.idempotency_key,
     )
-    
-    # Convert to LLM format
-    llm_messages = [
-        LLMChatMessage(role=msg.role, content=msg.content)
-        for msg in messages
-    ]
-    
-    # Create LLM config
-    config = LLMConfig(
-        provider=request.provider,
-        model=request.model or ("gpt-4-turbo-preview" if request.provider == LLMProvider.OPENAI else "claude-3-opus-20240229"),
-        temperature=request.temperature,
-        max_tokens=request.max_tokens,
-        stream=False,
+    return await chat_coalescer.run_once(
+        key, complete, remember=bool(request.idempotency_key)
     )
-    
-    # Get completion from LLM
+
+
+async def chat_stream_events(
+    *,
+    session: AsyncSession,
+    user: User,
+    request: ChatRequest,
+    message_id: uuid.UUID,
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Run one streaming chat turn and yield its events.
+
+    The assistant message is saved under ``message_id``, which clients
+    learn from the first event and can use to resume the stream. A
+    ``code_block`` event is sent as soon as a fenced block closed in the
+    streamed text has been analyzed; the analysis runs in a task, so the
+    tokens keep flowing meanwhile. ``done`` is sent once the reply is
+    stored; a ``code_blocks`` event with the saved ids follows when the
+    reply pipeline has stored them.
+    """
+    response_parts: list[str] = []
+    fences = IncrementalFenceParser()
+    streamed_blocks = 0
+    # code_block events being built, in the order the blocks were closed
+    block_events: deque[asyncio.Task[dict[str, Any]]] = deque()
+    usage = LLMUsage()
+    started_at = time.perf_counter()
+    first_token_at = None
+    ticket = None
+    saved = False
+
     try:
-        response_content = await llm_service.create_chat_completion(
-            user=current_user,
-            messages=llm_messages,
+        # Save user message
+        await create_message_async(
+            session=session,
+            message_in=MessageCreate(
+                role=MessageRole.USER,
+                content=request.message,
+                conversation_id=request.conversation_id,
+            ),
+            conversation_id=request.conversation_id,
+        )
+
+        # Create LLM config, routing "auto" to a model
+        conversation = await session.get(Conversation, request.conversation_id)
+        if conversation is None:
+            # Deleted since the request was checked
+            raise ValueError("Conversation not found")
+        config = build_config(conversation=conversation, request=request, stream=True)
+        usage = LLMUsage(provider=config.provider.value, model=config.model)
+
+        # Pack the most recent history into the model's context budget
+        context = await context_builder.build_async(
+            session=session,
+            conversation=conversation,
             config=config,
         )
+        llm_messages = context.messages
+
+        # Deterministic requests can be replayed from the completion cache
+        cache_key = None
+        cached_content = None
+        if response_cache.is_cacheable(config, request.use_cache):
+            cache_key = response_cache.make_key(user.id, llm_messages, config)
+            cached_content = await response_cache.get_async(session, cache_key)
+
+        # End the read transaction so no pooled connection is held while
+        # the provider streams
+        await session.commit()
+
+        if cached_content is not None:
+            chunks = response_cache.replay(cached_content)
+        else:
+            # Wait for a provider slot before opening the upstream stream
+            ticket = await llm_scheduler.acquire(user.id, config.provider.value)
+            chunks = llm_service.create_chat_stream(
+                user=user,
+                messages=llm_messages,
+                config=config,
+                usage=usage,
+                ticket=ticket,
+            )
+
+        queue_ms = round(ticket.queue_ms, 1) if ticket else 0.0
+        position = ticket.position if ticket else 0
+        yield {
+            "type": "queued",
+            "message_id": str(message_id),
+            "queue_ms": queue_ms,
+            "position": position,
+        }
+
+        # Stream the response
+        async for chunk in chunks:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            response_parts.append(chunk)
+            yield {"type": "content", "content": chunk}
+            for block in fences.feed(chunk):
+                block_events.append(
+                    asyncio.create_task(
+                        code_block_event(message_id, streamed_blocks, block)
+                    )
+                )
+                streamed_blocks += 1
+            while block_events and block_events[0].done():
+                yield block_events.popleft().result()
+
+        llm_scheduler.release(ticket)
+        for block in fences.finish():
+            block_events.append(
+                asyncio.create_task(
+                    code_block_event(message_id, streamed_blocks, block)
+                )
+            )
+            streamed_blocks += 1
+        while block_events:
+            yield await block_events.popleft()
+        full_response = "".join(response_parts)
+
+        if cache_key and cached_content is None:
+            await response_cache.set_async(
+                session, cache_key, user.id, config, full_response
+            )
+
+        record_usage(
+            user_id=user.id,
+            conversation_id=request.conversation_id,
+            usage=usage,
+            prompt_tokens_saved=context.tokens_saved,
+            started_at=started_at,
+            first_token_at=first_token_at,
+            from_cache=cached_content is not None,
+        )
+
+        # Save the response; code blocks are extracted in the background
+        _, code_blocks_ready = await save_reply(
+            session=session,
+            user_id=user.id,
+            conversation_id=request.conversation_id,
+            content=full_response,
+            message_id=message_id,
+        )
+        saved = True
+
+        # Send completion event as soon as the reply is stored
+        yield {
+            "type": "done",
+            "message_id": str(message_id),
+            "provider": usage.provider,
+            "model": usage.model,
+            "usage": usage.summary(),
+        }
+
+        # Follow up with the code blocks once the pipeline has stored them
+        code_blocks = await reply_pipeline.wait(
+            code_blocks_ready, settings.REPLY_PIPELINE_EVENT_TIMEOUT_SECONDS
+        )
+        if code_blocks:
+            yield {
+                "type": "code_blocks",
+                "message_id": str(message_id),
+                "blocks": code_blocks,
+            }
+
+    except asyncio.CancelledError:
+        # Every client disconnected: keep what was generated so far
+        if response_parts and not saved:
+            partial = "".join(response_parts)
+            usage.output_tokens = usage.output_tokens or estimate_tokens(partial)
+            record_usage(
+                user_id=user.id,
+                conversation_id=request.conversation_id,
+                usage=usage,
+                prompt_tokens_saved=0,
+                started_at=started_at,
+                first_token_at=first_token_at,
+            )
+            await save_reply(
+                session=session,
+                user_id=user.id,
+                conversation_id=request.conversation_id,
+                content=partial,
+                is_truncated=True,
+                message_id=message_id,
+            )
+            logger.info(f"Saved truncated reply {message_id} after client disconnect")
+        raise
+    except LLMError as e:
+        # Nothing is saved for a failed reply; the client may retry
+        yield e.to_event()
+    except SchedulerRejected as e:
+        yield {
+            "type": "error",
+            "error": str(e),
+            "code": "rate_limited",
+            "retryable": True,
+        }
     except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e),
+        yield {
+            "type": "error",
+            "error": str(e),
+            "code": "internal_error",
+            "retryable": False,
+        }
+    finally:
+        llm_scheduler.release(ticket)
+        for task in block_events:
+            task.cancel()
+
+
+async def publish_chat_stream(
+    broadcast: StreamBroadcast,
+    user_id: uuid.UUID,
+    message_id: uuid.UUID,
+    request: ChatRequest,
+) -> None:
+    """Produce a streaming chat turn into ``broadcast``.
+
+    Uses its own database session: the turn is shared by every client
+    attached to the broadcast and must not depend on the request that
+    started it.
+    """
+
+    async def checked(
+        events: AsyncGenerator[dict[str, Any], None],
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        async for event in events:
+            if event["type"] == "error":
+                broadcast.failed = True
+            yield event
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        user = await session.get(User, user_id)
+        if user is None:
+            # Deleted since the request was authenticated
+            raise LookupError(f"User {user_id} not found")
+        events = chat_stream_events(
+            session=session,
+            user=user,
+            request=request,
+            message_id=message_id,
         )
-    
-    # Process and save response
-    message_id, code_blocks = await process_and_save_response(
-        session=session,
-        user_id=current_user.id,
-        conversation_id=request.conversation_id,
-        content=response_content,
-    )
-    
-    return ChatResponse(
-        message_id=message_id,
-        content=response_content,
-        code_blocks=code_blocks,
-    )
+        # Small content deltas are merged into fewer frames
+        async for event in sse_framer.merge(checked(events)):
+            broadcast.publish(event)
 
 
 @router.post("/stream")
 async def chat_stream(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     request: ChatRequest,
+    background_tasks: BackgroundTasks,
 ) -> StreamingResponse:
     """Create a streaming chat completion using Server-Sent Events."""
-    # Verify conversation belongs to user
-    conversation = get_conversation(
-        session=session,
-        conversation_id=request.conversation_id,
-        user_id=current_user.id,
+    # A duplicate of an in-flight request (double click, client retry)
+    # attaches to the running stream instead of starting a second one
+    key = chat_coalescer.make_key(
+        "stream",
+        current_user.id,
+        request.model_dump(mode="json", exclude={"idempotency_key"}),
+        request.idempotency_key,
     )
-    if not conversation:
+    broadcast = chat_coalescer.find_stream(key)
+
+    if broadcast is None:
+        # Verify conversation belongs to user
+        conversation = await get_conversation_async(
+            session=session,
+            conversation_id=request.conversation_id,
+            user_id=current_user.id,
+        )
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found",
+            )
+
+        message_id = uuid.uuid4()
+        broadcast = chat_coalescer.start_stream(
+            key,
+            lambda broadcast: publish_chat_stream(
+                broadcast, current_user.id, message_id, request
+            ),
+            user_id=current_user.id,
+            message_id=message_id,
+            remember=bool(request.idempotency_key),
+        )
+
+        # Runs after the stream has finished; FastAPI attaches these tasks
+        # to the returned StreamingResponse
+        background_tasks.add_task(
+            conversation_summarizer.maybe_update,
+            request.conversation_id,
+            current_user.id,
+        )
+
+    return StreamingResponse(
+        broadcast.subscribe(heartbeat=settings.SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, "X-Message-Id": str(broadcast.message_id)},
+    )
+
+
+@router.get("/stream/{message_id}")
+async def resume_chat_stream(
+    *,
+    current_user: CurrentUser,
+    message_id: uuid.UUID,
+    last_event_id: int | None = Header(default=None, alias="Last-Event-ID"),
+    after: int | None = None,
+) -> StreamingResponse:
+    """Reattach to a running or just finished stream without a new LLM call.
+
+    Events after ``Last-Event-ID`` (or the ``after`` query parameter, for
+    clients that can't set headers) are replayed, then the stream continues
+    live. Without either, the stream is replayed from the start, which is
+    how a second tab follows an answer in progress.
+    """
+    broadcast = chat_coalescer.find_by_message(message_id, current_user.id)
+    if broadcast is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Conversation not found",
+            detail="Stream not found or expired; load the saved message instead",
         )
-    
-    # Save user message
-    user_message = create_message(
-        session=session,
-        message_in=MessageCreate(
-            role=MessageRole.USER.value,
-            content=request.message,
-        ),
-        conversation_id=request.conversation_id,
-    )
-    
-    # Get conversation history
-    messages = get_messages_by_conversation(
-        session=session,
-        conversation_id=request.conversation_id,
-        limit=50,
-    )
-    
-    # Convert to LLM format
-    llm_messages = [
-        LLMChatMessage(role=msg.role, content=msg.content)
-        for msg in messages
-    ]
-    
-    # Create LLM config
-    config = LLMConfig(
-        provider=request.provider,
-        model=request.model or ("gpt-4-turbo-preview" if request.provider == LLMProvider.OPENAI else "claude-3-opus-20240229"),
-        temperature=request.temperature,
-        max_tokens=request.max_tokens,
-        stream=True,
-    )
-    
-    async def generate_events():
-        """Generate Server-Sent Events for streaming response."""
-        full_response = ""
-        
-        try:
-            # Stream the response
-            async for chunk in llm_service.create_chat_stream(
-                user=current_user,
-                messages=llm_messages,
-                config=config,
-            ):
-                full_response += chunk
-                # Send chunk as SSE
-                yield f"data: {json.dumps({'type': 'content', 'content': chunk})}\n\n"
-            
-            # Process and save the complete response
-            message_id, code_blocks = await process_and_save_response(
-                session=session,
-                user_id=current_user.id,
-                conversation_id=request.conversation_id,
-                content=full_response,
-            )
-            
-            # Send code blocks info
-            if code_blocks:
-                yield f"data: {json.dumps({'type': 'code_blocks', 'blocks': code_blocks})}\n\n"
-            
-            # Send completion event
-            yield f"data: {json.dumps({'type': 'done', 'message_id': str(message_id)})}\n\n"
-            
-        except Exception as e:
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
-    
+
     return StreamingResponse(
-        generate_events(),
+        broadcast.subscribe(
+            last_event_id=last_event_id if last_event_id is not None else after,
+            heartbeat=settings.SSE_HEARTBEAT_SECONDS,
+        ),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable Nginx buffering
-        },
-    )
\ No newline at end of file
+        headers={**SSE_HEADERS, "X-Message-Id": str(message_id)},
+    )
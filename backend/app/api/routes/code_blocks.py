@@ -1,18 +1,19 @@
 """API routes for code block management."""
+
 import uuid
-from typing import Any, Optional
+from typing import Any
 
 from fastapi import APIRouter, HTTPException, Query, status
 
 from app.api.deps import CurrentUser, SessionDep
 from app.crud_ops.code_block import (
     create_code_block,
+    delete_code_block,
     get_code_block,
     get_code_blocks,
+    get_code_blocks_by_conversation,
     search_code_blocks,
     update_code_block,
-    delete_code_block,
-    get_code_blocks_by_conversation,
 )
 from app.models.code_block import (
     CodeBlockCreate,
@@ -20,6 +21,7 @@ from app.models.code_block import (
     CodeBlocksPublic,
     CodeBlockUpdate,
 )
+from app.services.code_parser import code_parser
 
 router = APIRouter(prefix="/code-blocks", tags=["code-blocks"])
 
@@ -31,11 +33,14 @@ def create_new_code_block(
     current_user: CurrentUser,
     code_block_in: CodeBlockCreate,
 ) -> Any:
-    """Create new code block."""
+    """Create new code block, or return the existing copy of the same code."""
     code_block = create_code_block(
         session=session,
         code_block_in=code_block_in,
         user_id=current_user.id,
+        content_hash=code_parser.analyze(
+            code_block_in.code, code_block_in.language
+        ).content_hash,
     )
     return code_block
 
@@ -45,7 +50,7 @@ def read_code_blocks(
     *,
     session: SessionDep,
     current_user: CurrentUser,
-    conversation_id: Optional[uuid.UUID] = None,
+    conversation_id: uuid.UUID | None = None,
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -57,7 +62,7 @@ def read_code_blocks(
         skip=skip,
         limit=limit,
     )
-    
+
     return CodeBlocksPublic(data=code_blocks, count=len(code_blocks))
 
 
@@ -67,8 +72,8 @@ def search_user_code_blocks(
     session: SessionDep,
     current_user: CurrentUser,
     q: str = Query(default="", description="Search query"),
-    language: Optional[str] = Query(default=None, description="Filter by language"),
-    tags: Optional[list[str]] = Query(default=None, description="Filter by tags"),
+    language: str | None = Query(default=None, description="Filter by language"),
+    tags: list[str] | None = Query(default=None, description="Filter by tags"),
     skip: int = 0,
     limit: int = 100,
 ) -> Any:
@@ -82,7 +87,7 @@ def search_user_code_blocks(
         skip=skip,
         limit=limit,
     )
-    
+
     return CodeBlocksPublic(data=code_blocks, count=len(code_blocks))
 
 
@@ -99,7 +104,7 @@ def read_conversation_code_blocks(
         conversation_id=conversation_id,
         user_id=current_user.id,
     )
-    
+
     return CodeBlocksPublic(data=code_blocks, count=len(code_blocks))
 
 
@@ -143,7 +148,7 @@ def update_existing_code_block(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Code block not found",
         )
-    
+
     code_block = update_code_block(
         session=session,
         db_code_block=code_block,
@@ -170,4 +175,4 @@ def delete_existing_code_block(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Code block not found",
         )
-    return {"message": "Code block deleted successfully"}
\ No newline at end of file
+    return {"message": "Code block deleted successfully"}
@@ -1,18 +1,18 @@
 """API routes for conversation management."""
+
 import uuid
 from typing import Any
 
 from fastapi import APIRouter, HTTPException, status
-from sqlmodel import func, select
 
 from app.api.deps import CurrentUser, SessionDep
 from app.crud_ops.conversation import (
+    count_conversations,
     create_conversation,
+    delete_conversation,
     get_conversation,
     get_conversations,
-    count_conversations,
     update_conversation,
-    delete_conversation,
 )
 from app.models.conversation import (
     ConversationCreate,
@@ -24,7 +24,9 @@ from app.models.conversation import (
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
 
-@router.post("/", response_model=ConversationPublic, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/", response_model=ConversationPublic, status_code=status.HTTP_201_CREATED
+)
 def create_new_conversation(
     *,
     session: SessionDep,
@@ -56,7 +58,7 @@ def read_conversations(
         limit=limit,
     )
     count = count_conversations(session=session, user_id=current_user.id)
-    
+
     return ConversationsPublic(data=conversations, count=count)
 
 
@@ -100,7 +102,7 @@ def update_existing_conversation(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
-    
+
     conversation = update_conversation(
         session=session,
         db_conversation=conversation,
@@ -127,4 +129,4 @@ def delete_existing_conversation(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
-    return {"message": "Conversation deleted successfully"}
\ No newline at end of file
+    return {"message": "Conversation deleted successfully"}
@@ -1,4 +1,5 @@
 """API routes for file management."""
+
 import uuid
 from typing import Any
 
@@ -7,9 +8,9 @@ from fastapi import APIRouter, File, HTTPException, UploadFile, status
 from app.api.deps import CurrentUser, SessionDep
 from app.crud_ops.file import (
     create_file,
+    delete_file,
     get_file,
     get_files,
-    delete_file,
 )
 from app.models.file import (
     FileCreate,
@@ -36,7 +37,7 @@ async def upload_file(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail="File too large. Maximum size is 50MB.",
         )
-    
+
     # Save file and extract metadata
     try:
         storage_path, metadata = await file_service.save_upload_file(
@@ -48,14 +49,14 @@ async def upload_file(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}",
         )
-    
+
     # Create database record
     file_create = FileCreate(
         filename=file.filename,
         mime_type=file.content_type or "application/octet-stream",
         size_bytes=file.size or 0,
     )
-    
+
     db_file = create_file(
         session=session,
         file_in=file_create,
@@ -63,7 +64,7 @@ async def upload_file(
         storage_path=storage_path,
         file_metadata=metadata,
     )
-    
+
     return db_file
 
 
@@ -82,7 +83,7 @@ def read_files(
         skip=skip,
         limit=limit,
     )
-    
+
     return FilesPublic(data=files, count=len(files))
 
 
@@ -126,18 +127,18 @@ def read_file_content(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found",
         )
-    
+
     content = file_service.get_file_content(
         file_path=file.storage_path,
         max_rows=max_rows,
     )
-    
+
     if content is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File content not found on disk",
         )
-    
+
     return content
 
 
@@ -154,14 +155,14 @@ def delete_uploaded_file(
         file_id=file_id,
         user_id=current_user.id,
     )
-    
+
     if not db_file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found",
         )
-    
+
     # Delete physical file
     file_service.delete_file(db_file.storage_path)
-    
-    return {"message": "File deleted successfully"}
\ No newline at end of file
+
+    return {"message": "File deleted successfully"}
@@ -1,23 +1,26 @@
 """API routes for message management within conversations."""
+
 import uuid
-from typing import Any, Optional
+from typing import Any
 
 from fastapi import APIRouter, HTTPException, status
 
 from app.api.deps import CurrentUser, SessionDep
+from app.crud_ops.conversation import get_conversation
 from app.crud_ops.message import (
     create_message,
-    get_messages_by_conversation,
     delete_message,
+    get_messages_by_conversation,
 )
-from app.crud_ops.conversation import get_conversation
 from app.models.message import (
     MessageCreate,
     MessagePublic,
     MessagesPublic,
 )
 
-router = APIRouter(prefix="/conversations/{conversation_id}/messages", tags=["messages"])
+router = APIRouter(
+    prefix="/conversations/{conversation_id}/messages", tags=["messages"]
+)
 
 
 @router.post("/", response_model=MessagePublic, status_code=status.HTTP_201_CREATED)
@@ -40,7 +43,7 @@ def create_new_message(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
-    
+
     message = create_message(
         session=session,
         message_in=message_in,
@@ -56,7 +59,7 @@ def read_messages(
     current_user: CurrentUser,
     conversation_id: uuid.UUID,
     skip: int = 0,
-    limit: Optional[int] = None,
+    limit: int | None = None,
 ) -> Any:
     """Retrieve all messages for a conversation."""
     # Verify conversation belongs to user
@@ -70,14 +73,14 @@ def read_messages(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
-    
+
     messages = get_messages_by_conversation(
         session=session,
         conversation_id=conversation_id,
         skip=skip,
         limit=limit,
     )
-    
+
     return MessagesPublic(data=messages, count=len(messages))
 
 
@@ -101,12 +104,12 @@ def delete_existing_message(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found",
         )
-    
+
     success = delete_message(session=session, message_id=message_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Message not found",
         )
-    
-    return {"message": "Message deleted successfully"}
\ No newline at end of file
+
+    return {"message": "Message deleted successfully"}
@@ -1,23 +1,30 @@
 """API routes for user settings and API key management."""
-from typing import Any
 
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
+from datetime import datetime, timedelta
+from typing import Annotated, Any
+
+from fastapi import APIRouter, HTTPException, Query, status
+from pydantic import BaseModel, Field, StringConstraints
 
 from app.api.deps import CurrentUser, SessionDep
-from app.services.llm_service import llm_service, LLMProvider
+from app.crud_ops.usage import get_usage_by_provider
+from app.models.usage import ProviderUsage
+from app.services.llm_resilience import LLMError
+from app.services.llm_service import LLMProvider, llm_service
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
 
 class APIKeyRequest(BaseModel):
     """Request model for setting API key."""
+
     provider: LLMProvider
     api_key: str
 
 
 class APIKeyResponse(BaseModel):
     """Response model for API key operations."""
+
     provider: str
     is_valid: bool
     message: str
@@ -25,10 +32,21 @@ class APIKeyResponse(BaseModel):
 
 class APIKeysStatus(BaseModel):
     """Status of all API keys."""
+
     openai: bool
     anthropic: bool
 
 
+class CustomTags(BaseModel):
+    """Terms tagged in the user's code blocks on top of the built-in ones."""
+
+    tags: list[
+        Annotated[
+            str, StringConstraints(strip_whitespace=True, min_length=1, max_length=50)
+        ]
+    ] = Field(default=[], max_length=200)
+
+
 @router.post("/api-keys", response_model=APIKeyResponse)
 async def set_api_key(
     *,
@@ -38,23 +56,33 @@ async def set_api_key(
 ) -> Any:
     """Set and validate an API key for a provider."""
     # Validate the API key
-    is_valid = await llm_service.validate_api_key(request.provider, request.api_key)
-    
+    try:
+        is_valid = await llm_service.validate_api_key(request.provider, request.api_key)
+    except LLMError as e:
+        raise HTTPException(
+            status_code=(
+                status.HTTP_504_GATEWAY_TIMEOUT
+                if e.code == "timeout"
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+            detail=f"Could not verify the API key right now ({e.message}). Please try again.",
+        )
+
     if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid API key. Please check your key and try again.",
         )
-    
+
     # Encrypt and store the API key
     current_user.api_keys = llm_service.set_user_api_key(
         current_user, request.provider, request.api_key
     )
-    
+
     # Save to database
     session.add(current_user)
     session.commit()
-    
+
     return APIKeyResponse(
         provider=request.provider.value,
         is_valid=True,
@@ -87,18 +115,49 @@ def delete_api_key(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"No API key found for {provider.value}",
         )
-    
-    del current_user.api_keys[provider.value]
+
+    current_user.api_keys = llm_service.delete_user_api_key(current_user, provider)
     session.add(current_user)
     session.commit()
-    
+
     return {"message": f"API key for {provider.value} deleted successfully."}
 
 
-@router.get("/api-usage")
+@router.get("/api-usage", response_model=dict[str, ProviderUsage])
 def get_api_usage(
     *,
+    session: SessionDep,
     current_user: CurrentUser,
+    days: int | None = Query(default=None, ge=1),
 ) -> Any:
-    """Get API usage statistics for the current user."""
-    return current_user.api_usage or {}
\ No newline at end of file
+    """Get API usage statistics for the current user, optionally for the last N days."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1) if days else None
+    return get_usage_by_provider(
+        session=session,
+        user_id=current_user.id,
+        since=since,
+    )
+
+
+@router.get("/custom-tags", response_model=CustomTags)
+def get_custom_tags(
+    *,
+    current_user: CurrentUser,
+) -> Any:
+    """Get the user's own code block tags."""
+    return CustomTags(tags=current_user.custom_tags or [])
+
+
+@router.put("/custom-tags", response_model=CustomTags)
+def set_custom_tags(
+    *,
+    session: SessionDep,
+    current_user: CurrentUser,
+    request: CustomTags,
+) -> Any:
+    """Replace the user's own code block tags."""
+    current_user.custom_tags = list(dict.fromkeys(request.tags))
+    session.add(current_user)
+    session.commit()
+
+    return CustomTags(tags=current_user.custom_tags)
@@ -2,7 +2,7 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import func, select
 
 from app import crud
 from app.api.deps import (
@@ -14,6 +14,8 @@ from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models import (
     AuthMessage as Message,
+)
+from app.models import (
     UpdatePassword,
     User,
     UserCreate,
@@ -1,8 +1,18 @@
+from typing import Any
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
+from app.core.loop_monitor import loop_monitor
 from app.models import AuthMessage as Message
+from app.services.chat_coalescer import chat_coalescer
+from app.services.code_parser import code_parser
+from app.services.llm_scheduler import llm_scheduler
+from app.services.llm_service import llm_service
+from app.services.parse_pool import parse_pool
+from app.services.reply_pipeline import reply_pipeline
+from app.services.response_cache import response_cache
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -29,3 +39,35 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get(
+    "/runtime-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+@router.get(
+    "/cache-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+    deprecated=True,
+)
+def runtime_stats() -> dict[str, dict[str, Any]]:
+    """
+    Cache hit rates, LLM scheduling counters and event loop lag of this worker.
+
+    Also served under the old /cache-stats/ path, from before the
+    endpoint covered more than caches.
+    """
+    return {
+        "llm_client_pool": llm_service.client_pool.stats(),
+        "api_key_cache": llm_service.api_key_cache.stats(),
+        "api_key_validation_cache": llm_service.validation_cache.stats(),
+        "response_cache": response_cache.memory.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "llm_resilience": llm_service.resilience_stats(),
+        "model_routing": llm_service.router.stats(),
+        "chat_coalescer": chat_coalescer.stats(),
+        "reply_pipeline": reply_pipeline.stats(),
+        "code_parser_cache": code_parser.stats(),
+        "parse_pool": parse_pool.stats(),
+        "event_loop_lag": loop_monitor.stats(),
+    }
@@ -0,0 +1,446 @@
+"""Load test of ``/chat/stream`` against a seeded database and a stub LLM.
+
+Starts the API in-process (uvicorn in a thread) and an OpenAI-compatible
+stub server in a child process, seeds one user with an API key and a
+conversation per client, then drives concurrent streaming turns and prints
+a JSON report:
+
+    python -m app.bench.chat --clients 50 --turns 3 --output report.json
+
+Requires a migrated database reachable with the usual settings. With
+``--provider mock`` the built-in mock provider is used instead of the stub.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import statistics
+import threading
+import time
+import uuid
+from datetime import timedelta
+from typing import Any
+
+import httpx
+import uvicorn
+from sqlalchemy import event
+from sqlmodel import Session
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app import crud
+from app.core import security
+from app.core.config import settings
+from app.core.db import async_engine, engine
+from app.core.loop_monitor import loop_monitor
+from app.crud_ops.conversation import create_conversation
+from app.models import ConversationCreate, UserCreate
+from app.services.llm_service import ChatMessage, LLMProvider, llm_service
+from app.services.mock_llm import MockLLM, mock_llm
+from app.services.token_estimator import estimate_tokens
+
+BENCH_EMAIL = "chat-bench-{index}@example.com"
+BENCH_PROMPT = "Show me the average order value by region and plot the monthly trend."
+
+
+# --- Stub LLM server -------------------------------------------------------
+
+
+def create_stub_app(ttft_ms: float, tokens_per_second: float) -> Starlette:
+    """OpenAI-compatible ``/v1/chat/completions`` with synthetic timing."""
+    model = MockLLM(ttft_ms=ttft_ms, tokens_per_second=tokens_per_second, jitter=0.1)
+
+    def chunk(payload: dict[str, Any]) -> str:
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def completions(request: Request) -> Any:
+        body = await request.json()
+        messages = [
+            ChatMessage(role=msg["role"], content=str(msg["content"]))
+            for msg in body["messages"]
+        ]
+        text = model.build_response(messages, body.get("max_tokens"))
+        tokens = model.split_tokens(text)
+        prompt_tokens = sum(estimate_tokens(msg.content) for msg in messages)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        }
+        base = {
+            "id": "chatcmpl-bench",
+            "created": int(time.time()),
+            "model": body["model"],
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(
+                model.jittered(ttft_ms / 1000 + len(tokens) / tokens_per_second)
+            )
+            return JSONResponse(
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        async def events() -> Any:
+            await asyncio.sleep(model.jittered(ttft_ms / 1000))
+            for token in tokens:
+                yield chunk(
+                    {
+                        **base,
+                        "object": "chat.completion.chunk",
+                        "choices": [
+                            {
+                                "index": 0,
+                                "delta": {"content": token},
+                                "finish_reason": None,
+                            }
+                        ],
+                    }
+                )
+                await asyncio.sleep(model.jittered(1 / tokens_per_second))
+            yield chunk(
+                {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                }
+            )
+            yield chunk(
+                {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [],
+                    "usage": usage,
+                }
+            )
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(
+        routes=[Route("/v1/chat/completions", completions, methods=["POST"])]
+    )
+
+
+def run_stub_server(port: int, ttft_ms: float, tokens_per_second: float) -> None:
+    uvicorn.run(
+        create_stub_app(ttft_ms, tokens_per_second),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+
+
+# --- Measurement helpers ---------------------------------------------------
+
+
+class QueryCounter:
+    """Count SQL statements sent by the application engines."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *_args: Any) -> None:
+        with self._lock:
+            self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        for target in (engine, async_engine.sync_engine):
+            event.remove(target, "before_cursor_execute", self)
+
+
+def thread_cpu_seconds(thread: threading.Thread) -> float | None:
+    """CPU time consumed by a thread, where the platform exposes it."""
+    if not hasattr(time, "pthread_getcpuclockid") or thread.ident is None:
+        return None
+    return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    if len(values) == 1:
+        cuts = [values[0]] * 99
+    else:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49], 2),
+        "p95": round(cuts[94], 2),
+        "p99": round(cuts[98], 2),
+        "mean": round(statistics.fmean(values), 2),
+        "max": round(max(values), 2),
+    }
+
+
+# --- Database seeding ------------------------------------------------------
+
+
+def seed(clients: int, provider: LLMProvider) -> list[dict[str, Any]]:
+    """One user (with an API key) and a fresh conversation per client.
+
+    Every client gets its own user so per-user concurrency limits don't
+    serialize the benchmark.
+    """
+    seeded = []
+    with Session(engine) as session:
+        for index in range(clients):
+            email = BENCH_EMAIL.format(index=index)
+            user = crud.get_user_by_email(session=session, email=email)
+            if user is None:
+                user = crud.create_user(
+                    session=session,
+                    user_create=UserCreate(email=email, password=uuid.uuid4().hex),
+                )
+            if provider == LLMProvider.OPENAI:
+                user.api_keys = llm_service.set_user_api_key(user, provider, "sk-bench")
+                session.add(user)
+                session.commit()
+
+            # A new conversation per run keeps the prompt size comparable
+            conversation = create_conversation(
+                session=session,
+                conversation_in=ConversationCreate(title="Chat benchmark"),
+                user_id=user.id,
+            )
+            seeded.append(
+                {
+                    "token": security.create_access_token(
+                        str(user.id), timedelta(hours=1)
+                    ),
+                    "conversation_id": str(conversation.id),
+                }
+            )
+    return seeded
+
+
+# --- Load generation -------------------------------------------------------
+
+
+async def stream_turn(
+    client: httpx.AsyncClient,
+    base_url: str,
+    seeded: dict[str, Any],
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    """Send one streaming turn and time it."""
+    body = {
+        "conversation_id": seeded["conversation_id"],
+        "message": BENCH_PROMPT,
+        "provider": args.provider,
+        "max_tokens": args.max_tokens,
+    }
+    started = time.perf_counter()
+    first_byte = first_content = None
+    events = 0
+    errors = 0
+    buffer = ""
+
+    async with client.stream(
+        "POST",
+        f"{base_url}{settings.API_V1_STR}/chat/stream",
+        json=body,
+        headers={"Authorization": f"Bearer {seeded['token']}"},
+    ) as response:
+        async for text in response.aiter_text():
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            buffer += text
+            *frames, buffer = buffer.split("\n\n")
+            for frame in frames:
+                # Frames may start with an id: line; heartbeats have no data
+                data = next(
+                    (
+                        line[len("data: ") :]
+                        for line in frame.split("\n")
+                        if line.startswith("data: ")
+                    ),
+                    None,
+                )
+                if data is None:
+                    continue
+                events += 1
+                payload = json.loads(data)
+                if payload.get("type") == "content" and first_content is None:
+                    first_content = time.perf_counter()
+                elif payload.get("type") == "error":
+                    errors += 1
+        status_code = response.status_code
+
+    finished = time.perf_counter()
+    return {
+        "status": status_code,
+        "ttfb_ms": ((first_byte or finished) - started) * 1000,
+        "ttft_ms": ((first_content or finished) - started) * 1000,
+        "ttlb_ms": (finished - started) * 1000,
+        "events": events,
+        "events_per_second": events / (finished - started),
+        "errors": errors,
+    }
+
+
+async def drive(
+    base_url: str, seeded: list[dict[str, Any]], args: argparse.Namespace
+) -> list[dict[str, Any]]:
+    limits = httpx.Limits(max_connections=len(seeded) + 10)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+
+        async def run_client(entry: dict[str, Any]) -> list[dict[str, Any]]:
+            results = []
+            for _ in range(args.turns):
+                try:
+                    results.append(await stream_turn(client, base_url, entry, args))
+                except httpx.HTTPError as e:
+                    results.append({"status": 0, "error": str(e)})
+            return results
+
+        per_client = await asyncio.gather(*(run_client(entry) for entry in seeded))
+    return [turn for turns in per_client for turn in turns]
+
+
+def wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=0.5)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    provider = LLMProvider(args.provider)
+    stub = None
+    if provider == LLMProvider.OPENAI:
+        stub = multiprocessing.Process(
+            target=run_stub_server,
+            args=(args.stub_port, args.ttft_ms, args.tokens_per_second),
+            daemon=True,
+        )
+        stub.start()
+        wait_for_port(args.stub_port)
+        settings.OPENAI_BASE_URL = f"http://127.0.0.1:{args.stub_port}/v1"
+    else:
+        mock_llm.ttft_ms = args.ttft_ms
+        mock_llm.tokens_per_second = args.tokens_per_second
+
+    seeded = seed(args.clients, provider)
+
+    from app.main import app
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning")
+    )
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        loop_monitor.reset()
+        with QueryCounter() as queries:
+            cpu_start = time.process_time()
+            loop_cpu_start = thread_cpu_seconds(server_thread)
+            wall_start = time.perf_counter()
+            turns = asyncio.run(drive(base_url, seeded, args))
+            wall = time.perf_counter() - wall_start
+            loop_cpu_end = thread_cpu_seconds(server_thread)
+            process_cpu = time.process_time() - cpu_start
+            loop_lag = loop_monitor.stats()
+    finally:
+        server.should_exit = True
+        server_thread.join(timeout=10)
+        if stub is not None:
+            stub.terminate()
+
+    ok = [
+        turn for turn in turns if turn.get("status") == 200 and not turn.get("errors")
+    ]
+    loop_cpu = (
+        loop_cpu_end - loop_cpu_start
+        if loop_cpu_start is not None and loop_cpu_end is not None
+        else None
+    )
+    return {
+        "config": vars(args),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "turns": len(turns),
+        "succeeded": len(ok),
+        "failed": len(turns) - len(ok),
+        "wall_seconds": round(wall, 3),
+        "turns_per_second": round(len(ok) / wall, 2) if wall else 0.0,
+        "ttfb_ms": percentiles([turn["ttfb_ms"] for turn in ok]),
+        "ttft_ms": percentiles([turn["ttft_ms"] for turn in ok]),
+        "ttlb_ms": percentiles([turn["ttlb_ms"] for turn in ok]),
+        "events_per_second": percentiles([turn["events_per_second"] for turn in ok]),
+        "events_per_turn": percentiles([float(turn["events"]) for turn in ok]),
+        "total_events_per_second": round(sum(turn["events"] for turn in ok) / wall, 1),
+        "db_round_trips_per_turn": round(queries.count / len(turns), 2)
+        if turns
+        else 0.0,
+        # The event loop thread runs the routes and streams; the process
+        # total also includes the load generator and DB driver threads
+        "worker_cpu_ms_per_turn": round(loop_cpu * 1000 / len(turns), 2)
+        if loop_cpu and turns
+        else None,
+        "process_cpu_ms_per_turn": round(process_cpu * 1000 / len(turns), 2)
+        if turns
+        else 0.0,
+        # How late the API's event loop ran ready callbacks while under load
+        "event_loop_lag": loop_lag,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument(
+        "--turns", type=int, default=3, help="sequential turns per client"
+    )
+    parser.add_argument(
+        "--provider",
+        choices=[LLMProvider.OPENAI.value, LLMProvider.MOCK.value],
+        default=LLMProvider.OPENAI.value,
+    )
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--max-tokens", type=int, default=300)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    report = json.dumps(run(arguments), indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as report_file:
+            report_file.write(report + "\n")
+    print(report)
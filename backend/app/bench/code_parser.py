@@ -0,0 +1,212 @@
+"""Micro-benchmark of code block metadata extraction on LLM answers.
+
+Compares the previous approach (``ast.walk`` for the metadata, a second
+``ast.parse`` for the description, tags recomputed for every block) with
+the single-pass ``CodeParser``, once with a cold cache and once with the
+answers seen before (regenerated or replayed replies), and prints a JSON
+report. The cold run is measured as the reply pipeline stores blocks,
+with their content hash, and as they are announced while streaming,
+without it:
+
+    python -m app.bench.code_parser --rounds 200
+
+``--corpus`` takes a JSON list of answers, e.g. exported assistant
+messages; by default a small set of typical answers is used.
+"""
+
+import argparse
+import ast
+import json
+import re
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.services.code_parser import CodeParser
+
+LEGACY_KEYWORDS = [
+    "pandas",
+    "numpy",
+    "matplotlib",
+    "seaborn",
+    "sklearn",
+    "tensorflow",
+    "pytorch",
+    "data",
+    "analysis",
+    "visualization",
+    "machine learning",
+    "deep learning",
+    "api",
+    "database",
+    "csv",
+    "json",
+    "file",
+    "processing",
+    "cleaning",
+    "transformation",
+]
+
+CORPUS = Path(__file__).with_name("llm_answers.json")
+
+FENCE = re.compile(r"```(?:(\w+))?\n(.*?)```", re.DOTALL)
+
+
+def legacy_metadata(code: str) -> dict[str, list[str]]:
+    metadata: dict[str, list[str]] = {
+        "imports": [],
+        "functions": [],
+        "classes": [],
+        "variables": [],
+    }
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return metadata
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            metadata["imports"].extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            metadata["imports"].extend(
+                f"{module}.{alias.name}" if module else alias.name
+                for alias in node.names
+            )
+        elif isinstance(node, ast.FunctionDef):
+            metadata["functions"].append(node.name)
+        elif isinstance(node, ast.ClassDef):
+            metadata["classes"].append(node.name)
+        elif isinstance(node, ast.Assign):
+            metadata["variables"].extend(
+                target.id for target in node.targets if isinstance(target, ast.Name)
+            )
+    return {key: list(set(names)) for key, names in metadata.items()}
+
+
+def legacy_description(code: str, language: str) -> str:
+    for line in code.split("\n")[:5]:
+        if line.strip().startswith("#"):
+            return line.strip()[1:].strip()
+    if language == "python":
+        # The old code parsed every block a second time here
+        metadata = legacy_metadata(code)
+        if metadata["functions"]:
+            return f"Defines functions: {', '.join(metadata['functions'][:3])}"
+    return f"{language.capitalize()} code block"
+
+
+def legacy_tags(text: str) -> list[str]:
+    text_lower = text.lower()
+    tags = [keyword for keyword in LEGACY_KEYWORDS if keyword in text_lower]
+    tags.extend(re.findall(r"#(\w+)", text))
+    return list(set(tags))[:10]
+
+
+def legacy_blocks(text: str) -> list[dict[str, Any]]:
+    blocks = []
+    for match in FENCE.finditer(text):
+        language = match.group(1) or "python"
+        code = match.group(2).strip()
+        if code:
+            blocks.append(
+                {
+                    "language": language,
+                    "metadata": legacy_metadata(code) if language == "python" else {},
+                    "description": legacy_description(code, language),
+                    # Tags used to be extracted once per block
+                    "tags": legacy_tags(text),
+                }
+            )
+    return blocks
+
+
+def single_pass_blocks(parser: CodeParser, text: str) -> list[dict[str, Any]]:
+    tags = parser.extract_tags_from_text(text)
+    return [dict(block, tags=tags) for block in parser.extract_code_blocks(text)]
+
+
+def streamed_blocks(parser: CodeParser, text: str) -> list[dict[str, Any]]:
+    return [
+        parser.build_block(code, language, with_hash=False)
+        for code, language in parser.find_blocks(text)
+    ]
+
+
+def run_variant(
+    name: str,
+    extract: Callable[[str], list[dict[str, Any]]],
+    answers: list[str],
+    rounds: int,
+) -> dict[str, Any]:
+    blocks = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in answers:
+            blocks += len(extract(text))
+    elapsed = time.perf_counter() - start
+    return {
+        "variant": name,
+        "seconds": round(elapsed, 4),
+        "blocks": blocks,
+        "us_per_answer": round(elapsed * 1e6 / (rounds * len(answers)), 1),
+        "us_per_block": round(elapsed * 1e6 / blocks, 1) if blocks else 0.0,
+    }
+
+
+def main(args: argparse.Namespace) -> dict[str, Any]:
+    answers: list[str] = json.loads(Path(args.corpus).read_text())
+
+    legacy = run_variant("legacy", legacy_blocks, answers, args.rounds)
+
+    # A cache too small to ever hit: every round parses again
+    uncached = CodeParser(cache_size=0)
+    single_pass = run_variant(
+        "single_pass",
+        lambda text: single_pass_blocks(uncached, text),
+        answers,
+        args.rounds,
+    )
+    streamed = run_variant(
+        "single_pass_streamed",
+        lambda text: streamed_blocks(uncached, text),
+        answers,
+        args.rounds,
+    )
+
+    cached_parser = CodeParser(cache_size=args.cache_size)
+    cached = run_variant(
+        "single_pass_cached",
+        lambda text: single_pass_blocks(cached_parser, text),
+        answers,
+        args.rounds,
+    )
+
+    def speedup(result: dict[str, Any]) -> float:
+        return (
+            round(legacy["seconds"] / result["seconds"], 2)
+            if result["seconds"]
+            else 0.0
+        )
+
+    return {
+        "config": vars(args),
+        "answers": len(answers),
+        "results": [legacy, single_pass, streamed, cached],
+        "speedup_single_pass": speedup(single_pass),
+        "speedup_streamed": speedup(streamed),
+        "speedup_cached": speedup(cached),
+        "cache": cached_parser.stats(),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=str(CORPUS))
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(parse_args()), indent=2))
@@ -0,0 +1,146 @@
+"""Micro-benchmark of SSE framing for many concurrent chat streams.
+
+Compares the previous approach (one ``json.dumps`` frame per provider delta,
+``+=`` accumulation) with ``SSEFramer`` and list accumulation, and prints a
+JSON report:
+
+    python -m app.bench.sse --streams 200 --deltas 1000 --delta-interval-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections.abc import AsyncGenerator, Callable
+from typing import Any
+
+from app.services.sse_framer import SSEFramer
+
+WORDS = (
+    "import pandas as pd df = pd.read_csv ( 'sales.csv' ) groupby region "
+    "revenue mean plot the monthly trend for each product line and"
+).split()
+
+
+async def provider_deltas(
+    count: int, interval: float, seed: int
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Content events shaped like provider deltas (1-3 words, a few chars)."""
+    rng = random.Random(seed)
+    yield {"type": "queued", "queue_ms": 0.0, "position": 0}
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        yield {"type": "content", "content": text[: rng.randint(1, 6)]}
+        await asyncio.sleep(interval)
+    yield {"type": "done", "message_id": "00000000-0000-0000-0000-000000000000"}
+
+
+# Frames are written to /dev/null so that each one costs a real syscall,
+# like a write to the client socket would
+DEVNULL = os.open(os.devnull, os.O_WRONLY)
+
+
+def send(sink: list[int], frame: str) -> None:
+    data = frame.encode()
+    os.write(DEVNULL, data)
+    sink.append(len(data))
+
+
+async def baseline_stream(
+    events: AsyncGenerator[dict[str, Any], None], sink: list[int]
+) -> str:
+    full_response = ""
+    async for event in events:
+        if event["type"] == "content":
+            full_response += event["content"]
+        send(sink, f"data: {json.dumps(event)}\n\n")
+    return full_response
+
+
+async def framed_stream(
+    events: AsyncGenerator[dict[str, Any], None],
+    sink: list[int],
+    framer: SSEFramer,
+) -> str:
+    parts: list[str] = []
+
+    async def collect(
+        source: AsyncGenerator[dict[str, Any], None],
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        async for event in source:
+            if event["type"] == "content":
+                parts.append(event["content"])
+            yield event
+
+    async for frame in framer.frames(collect(events)):
+        send(sink, frame)
+    return "".join(parts)
+
+
+async def run_variant(
+    name: str,
+    consume: Callable[[AsyncGenerator[dict[str, Any], None], list[int]], Any],
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    sinks: list[list[int]] = [[] for _ in range(args.streams)]
+    interval = args.delta_interval_ms / 1000
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    await asyncio.gather(
+        *(
+            consume(provider_deltas(args.deltas, interval, seed), sinks[seed])
+            for seed in range(args.streams)
+        )
+    )
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    frames = sum(len(sink) for sink in sinks)
+    sent_bytes = sum(sum(sink) for sink in sinks)
+    return {
+        "variant": name,
+        "wall_seconds": round(wall, 3),
+        "frames": frames,
+        "bytes": sent_bytes,
+        "deltas_per_second": round(args.streams * args.deltas / wall, 1),
+        "events_per_second": round(frames / wall, 1),
+        "frames_per_stream": round(frames / args.streams, 1),
+        "bytes_per_stream": round(sent_bytes / args.streams, 1),
+        "cpu_ms_per_stream": round(cpu * 1000 / args.streams, 3),
+    }
+
+
+async def main(args: argparse.Namespace) -> dict[str, Any]:
+    framer = SSEFramer(window_ms=args.window_ms, max_bytes=args.max_bytes)
+    baseline = await run_variant("per_delta", baseline_stream, args)
+    framed = await run_variant(
+        "framed", lambda events, sink: framed_stream(events, sink, framer), args
+    )
+    return {
+        "config": vars(args),
+        "results": [baseline, framed],
+        "frame_reduction": round(1 - framed["frames"] / baseline["frames"], 4),
+        "byte_reduction": round(1 - framed["bytes"] / baseline["bytes"], 4),
+        "cpu_reduction": round(
+            1 - framed["cpu_ms_per_stream"] / baseline["cpu_ms_per_stream"], 4
+        )
+        if baseline["cpu_ms_per_stream"]
+        else 0.0,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--deltas", type=int, default=1000)
+    parser.add_argument("--delta-interval-ms", type=float, default=2.0)
+    parser.add_argument("--window-ms", type=float, default=30.0)
+    parser.add_argument("--max-bytes", type=int, default=256)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(parse_args())), indent=2))
@@ -0,0 +1,162 @@
+"""Small in-process caching primitives shared by the services."""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from typing import Any, Generic, TypeVar, cast
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU mapping with optional time-to-live and weight limits.
+
+    Entries are evicted least-recently-used first when either ``maxsize``
+    entries or ``max_weight`` (as measured by ``weigher``) is exceeded. With
+    ``sliding=True`` every successful lookup restarts the entry's TTL, which
+    turns the TTL into an idle timeout. ``on_evict`` is called for entries
+    removed by capacity or expiry, but not for explicit ``pop``/``clear``.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        *,
+        sliding: bool = False,
+        max_weight: int | None = None,
+        weigher: Callable[[V], int] | None = None,
+        on_evict: Callable[[K, V], None] | None = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sliding = sliding
+        self.max_weight = max_weight
+        self.weigher = weigher or (lambda _value: 1)
+        self.on_evict = on_evict
+        self._data: OrderedDict[K, tuple[V, float | None, int]] = OrderedDict()
+        self._weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(cast(K, key))
+        return entry is not None and not self._is_expired(entry[1])
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._data))
+
+    @property
+    def weight(self) -> int:
+        return self._weight
+
+    def _is_expired(self, expires_at: float | None) -> bool:
+        return expires_at is not None and expires_at <= time.monotonic()
+
+    def _expiry(self, ttl: float | None) -> float | None:
+        ttl = self.ttl if ttl is None else ttl
+        return time.monotonic() + ttl if ttl is not None else None
+
+    def _remove(self, key: K) -> V:
+        value, _, weight = self._data.pop(key)
+        self._weight -= weight
+        return value
+
+    def _evict(self, key: K) -> None:
+        value = self._remove(key)
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        """Return the cached value for ``key`` or ``default``."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at, weight = entry
+        if self._is_expired(expires_at):
+            self.expirations += 1
+            self.misses += 1
+            self._evict(key)
+            return default
+
+        self._data.move_to_end(key)
+        if self.sliding and expires_at is not None:
+            self._data[key] = (value, self._expiry(None), weight)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Store ``value`` under ``key``, evicting old entries if needed."""
+        if key in self._data:
+            self._remove(key)
+
+        weight = self.weigher(value)
+        if self.max_weight is not None and weight > self.max_weight:
+            # Never cache something that would flush the whole cache.
+            return
+
+        self._data[key] = (value, self._expiry(ttl), weight)
+        self._weight += weight
+
+        while len(self._data) > self.maxsize or (
+            self.max_weight is not None and self._weight > self.max_weight
+        ):
+            oldest = next(iter(self._data))
+            self.evictions += 1
+            self._evict(oldest)
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        """Remove ``key`` without triggering ``on_evict``."""
+        if key not in self._data:
+            return default
+        return self._remove(key)
+
+    def pop_where(self, predicate: Callable[[K], bool]) -> int:
+        """Remove every key matching ``predicate`` and return how many."""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def purge_expired(self) -> int:
+        """Evict all expired entries and return how many were removed."""
+        expired = [
+            key
+            for key, (_, expires_at, _) in self._data.items()
+            if self._is_expired(expires_at)
+        ]
+        for key in expired:
+            self.expirations += 1
+            self._evict(key)
+        return len(expired)
+
+    def clear(self) -> None:
+        """Drop every entry without triggering ``on_evict``."""
+        self._data.clear()
+        self._weight = 0
+
+    def values(self) -> list[V]:
+        return [value for value, _, _ in self._data.values()]
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters suitable for a metrics endpoint."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "weight": self._weight,
+            "max_weight": self.max_weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -33,6 +33,10 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
+    # Previous SECRET_KEY values still accepted when decrypting stored API keys
+    API_KEY_FALLBACK_SECRETS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     FRONTEND_HOST: str = "http://localhost:5173"
@@ -94,10 +98,147 @@ class Settings(BaseSettings):
     EMAIL_TEST_USER: EmailStr = "test@example.com"
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
-    
+
+    # Async database engine (chat hot path)
+    ASYNC_DB_POOL_SIZE: int = 20
+    ASYNC_DB_MAX_OVERFLOW: int = 10
+
+    # Event loop lag monitor
+    LOOP_LAG_SAMPLE_INTERVAL_MS: float = 100.0
+    # Samples kept for the reported percentiles
+    LOOP_LAG_WINDOW: int = 600
+    LOOP_LAG_WARN_MS: float = 100.0
+
     # File upload settings
     UPLOAD_DIR: str = "./uploads"
 
+    # LLM provider endpoints (None uses the SDK default)
+    OPENAI_BASE_URL: str | None = None
+    ANTHROPIC_BASE_URL: str | None = None
+
+    # LLM client pool
+    LLM_CLIENT_POOL_MAX_SIZE: int = 256
+    LLM_CLIENT_POOL_IDLE_TTL_SECONDS: int = 600
+    LLM_HTTP_MAX_CONNECTIONS: int = 200
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+
+    # Decrypted API key cache
+    API_KEY_CACHE_MAX_SIZE: int = 1024
+    API_KEY_CACHE_TTL_SECONDS: int = 300
+
+    # API key validation results
+    API_KEY_VALIDATION_CACHE_MAX_SIZE: int = 4096
+    API_KEY_VALIDATION_TTL_SECONDS: int = 3600
+    API_KEY_VALIDATION_NEGATIVE_TTL_SECONDS: int = 300
+    API_KEY_VALIDATION_TIMEOUT_SECONDS: float = 5.0
+
+    # LLM call admission control (per worker)
+    LLM_MAX_CONCURRENT_PER_USER: int = 3
+    LLM_MAX_CONCURRENT_PER_PROVIDER: int = 64
+    LLM_MAX_QUEUED_REQUESTS: int = 256
+    LLM_MAX_QUEUE_WAIT_SECONDS: float = 30.0
+
+    # LLM call resilience
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 0.5
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 8.0
+    # Send a duplicate streaming request when the first token takes longer
+    # than this (None disables hedging)
+    LLM_HEDGE_AFTER_SECONDS: float | None = None
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # Duplicate chat request handling (per worker)
+    CHAT_IDEMPOTENCY_TTL_SECONDS: int = 3600
+    CHAT_IDEMPOTENCY_MAX_ENTRIES: int = 2000
+
+    # Mock LLM provider (not available in production)
+    MOCK_LLM_TTFT_MS: float = 300.0
+    MOCK_LLM_TOKENS_PER_SECOND: float = 60.0
+    # Relative random variation applied to every delay (0.2 = +/-20%)
+    MOCK_LLM_JITTER: float = 0.2
+    MOCK_LLM_ERROR_RATE: float = 0.0
+
+    # SSE framing: content deltas are batched for up to this long or size
+    SSE_FRAME_WINDOW_MS: float = 30.0
+    SSE_FRAME_MAX_BYTES: int = 256
+    # Idle streams send a comment this often so dead clients are noticed
+    SSE_HEARTBEAT_SECONDS: float = 5.0
+
+    # Resumable chat streams (per worker)
+    STREAM_BUFFER_MAX_FRAMES: int = 512
+    # How long a stream with no connected client keeps generating
+    STREAM_RESUME_GRACE_SECONDS: float = 15.0
+    # How long a finished stream can still be replayed
+    STREAM_RESUME_TTL_SECONDS: int = 120
+    STREAM_RESUME_MAX_FINISHED: int = 1000
+
+    # Model routing for requests with model "auto"
+    # Messages up to this size without code or data go to the fast tier
+    MODEL_ROUTING_SHORT_MESSAGE_TOKENS: int = 60
+    MODEL_ROUTING_LONG_PROMPT_TOKENS: int = 8_000
+    # Pasted rows with 3+ delimited fields that count as attached data
+    MODEL_ROUTING_TABLE_MIN_ROWS: int = 3
+    # Weight of the newest sample in the per-model latency average
+    MODEL_ROUTING_LATENCY_ALPHA: float = 0.2
+    MODEL_ROUTING_SLOW_TTFT_MS: float = 4_000.0
+    # Latency estimates older than this are refreshed by routing one request
+    MODEL_ROUTING_LATENCY_MAX_AGE_SECONDS: float = 300.0
+    # Models this much slower than the fastest in a tier still compete on price
+    MODEL_ROUTING_LATENCY_TOLERANCE: float = 1.25
+
+    # Background post-processing of saved replies (code block extraction)
+    REPLY_PIPELINE_WORKERS: int = 4
+    REPLY_PIPELINE_QUEUE_SIZE: int = 1000
+    # A claimed job not finished within this time is picked up again
+    REPLY_PIPELINE_LEASE_SECONDS: int = 300
+    REPLY_PIPELINE_SWEEP_SECONDS: float = 60.0
+    REPLY_PIPELINE_MAX_ATTEMPTS: int = 5
+    # How long a stream stays open after "done" for the code_blocks event
+    REPLY_PIPELINE_EVENT_TIMEOUT_SECONDS: float = 10.0
+
+    # Parsed code block metadata, keyed by a hash of the code
+    CODE_PARSER_CACHE_MAX_ENTRIES: int = 4096
+
+    # Code block tags: terms added to the built-in vocabulary
+    CODE_TAGS_EXTRA: Annotated[list[str] | str, BeforeValidator(parse_cors)] = []
+    CODE_TAGS_MAX_PER_MESSAGE: int = 10
+    # Compiled matchers kept for distinct sets of user-defined tags
+    CODE_TAGS_MATCHER_CACHE_SIZE: int = 256
+
+    # Worker processes for parsing large code blocks (0 parses in a thread)
+    PARSE_POOL_WORKERS: int = 2
+    # Python blocks at least this long are parsed in the pool
+    PARSE_POOL_MIN_CHARS: int = 20_000
+    # Parses in flight beyond this use the regex fallback right away
+    PARSE_POOL_MAX_PENDING: int = 8
+    PARSE_POOL_TIMEOUT_SECONDS: float = 5.0
+    # How long startup waits for the workers to come up
+    PARSE_POOL_START_TIMEOUT_SECONDS: float = 30.0
+
+    # Chat context assembly
+    CHAT_HISTORY_FETCH_LIMIT: int = 200
+    CHAT_CONTEXT_MAX_TOKENS: int = 32_000
+
+    # Rolling conversation summaries
+    CONVERSATION_SUMMARY_TRIGGER: int = 12
+    CONVERSATION_SUMMARY_KEEP_RECENT: int = 8
+    CONVERSATION_SUMMARY_BATCH_SIZE: int = 40
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = 800
+
+    # Usage ledger
+    USAGE_FLUSH_INTERVAL_SECONDS: float = 5.0
+    USAGE_FLUSH_BATCH_SIZE: int = 200
+    USAGE_BUFFER_MAX_EVENTS: int = 20_000
+
+    # Deterministic completion cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7
+    RESPONSE_CACHE_MEMORY_MAX_ENTRIES: int = 10_000
+    RESPONSE_CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_USER_MAX_BYTES: int = 16 * 1024 * 1024
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
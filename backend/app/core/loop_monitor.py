@@ -0,0 +1,92 @@
+"""Measure how late the event loop gets to work that is ready to run."""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Sample event loop lag with a task that sleeps in a fixed interval.
+
+    The lag is how much later than requested the task wakes up. Anything
+    that blocks the loop, such as a synchronous database call or CPU-heavy
+    parsing, delays every token stream served by this worker by the same
+    amount and shows up here.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = settings.LOOP_LAG_SAMPLE_INTERVAL_MS,
+        window: int = settings.LOOP_LAG_WINDOW,
+        warn_ms: float = settings.LOOP_LAG_WARN_MS,
+    ):
+        self.interval = interval_ms / 1000
+        self.warn_ms = warn_ms
+        # Lag of the most recent samples in milliseconds
+        self.samples: deque[float] = deque(maxlen=window)
+        self.max_ms = 0.0
+        self.stalls = 0
+        self._task: asyncio.Task[None] | None = None
+
+    def record(self, lag_ms: float) -> None:
+        self.samples.append(lag_ms)
+        self.max_ms = max(self.max_ms, lag_ms)
+        if lag_ms >= self.warn_ms:
+            self.stalls += 1
+            logger.warning(f"Event loop was blocked for {lag_ms:.0f}ms")
+
+    async def run(self) -> None:
+        """Sample until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max((loop.time() - started - self.interval) * 1000, 0.0))
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        """Forget collected samples, e.g. at the start of a benchmark."""
+        self.samples.clear()
+        self.max_ms = 0.0
+        self.stalls = 0
+
+    def stats(self) -> dict[str, Any]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0, "stalls": self.stalls}
+
+        def percentile(fraction: float) -> float:
+            return round(
+                ordered[min(int(len(ordered) * fraction), len(ordered) - 1)], 2
+            )
+
+        return {
+            "samples": len(ordered),
+            "mean_ms": round(sum(ordered) / len(ordered), 2),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "stalls": self.stalls,
+        }
+
+
+# Global instance
+loop_monitor = LoopLagMonitor()
@@ -1,10 +1,11 @@
-from datetime import datetime, timedelta, timezone
-from typing import Any
-from cryptography.fernet import Fernet
 import base64
 import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any
 
 import jwt
+from cryptography.fernet import Fernet, MultiFernet
 from passlib.context import CryptContext
 
 from app.core.config import settings
@@ -30,23 +31,33 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def get_encryption_key() -> bytes:
+def get_encryption_key(secret: str | None = None) -> bytes:
     """Generate a consistent encryption key from SECRET_KEY."""
     # Use SHA256 to create a consistent 32-byte key from SECRET_KEY
-    key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
+    key = hashlib.sha256((secret or settings.SECRET_KEY).encode()).digest()
     return base64.urlsafe_b64encode(key)
 
 
+@lru_cache(maxsize=1)
+def get_fernet() -> MultiFernet:
+    """Build the API key cipher once per process.
+
+    New values are always encrypted with the current SECRET_KEY; values
+    encrypted under a secret listed in API_KEY_FALLBACK_SECRETS can still be
+    decrypted, which allows SECRET_KEY to be rotated without losing keys.
+    """
+    secrets = [settings.SECRET_KEY, *settings.API_KEY_FALLBACK_SECRETS]
+    return MultiFernet([Fernet(get_encryption_key(secret)) for secret in secrets])
+
+
 def encrypt_api_key(api_key: str) -> str:
     """Encrypt an API key for storage."""
-    fernet = Fernet(get_encryption_key())
-    encrypted = fernet.encrypt(api_key.encode())
+    encrypted = get_fernet().encrypt(api_key.encode())
     return base64.urlsafe_b64encode(encrypted).decode()
 
 
 def decrypt_api_key(encrypted_key: str) -> str:
     """Decrypt an API key from storage."""
-    fernet = Fernet(get_encryption_key())
     encrypted_bytes = base64.urlsafe_b64decode(encrypted_key.encode())
-    decrypted = fernet.decrypt(encrypted_bytes)
+    decrypted = get_fernet().decrypt(encrypted_bytes)
     return decrypted.decode()
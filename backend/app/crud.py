@@ -1,15 +1,23 @@
-from typing import Any
 import uuid
+from typing import Any
 
 from sqlmodel import Session, select
 
 from app.core.security import get_password_hash, verify_password
 from app.models import (
-    User, UserCreate, UserUpdate,
-    Conversation, ConversationCreate, ConversationUpdate,
-    Message, MessageCreate,
-    CodeBlock, CodeBlockCreate, CodeBlockUpdate,
-    File, FileCreate
+    CodeBlock,
+    CodeBlockCreate,
+    CodeBlockUpdate,
+    Conversation,
+    ConversationCreate,
+    ConversationUpdate,
+    File,
+    FileCreate,
+    Message,
+    MessageCreate,
+    User,
+    UserCreate,
+    UserUpdate,
 )
 
 
@@ -56,9 +64,7 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
 def create_conversation(
     *, session: Session, conversation_in: ConversationCreate, user_id: uuid.UUID
 ) -> Conversation:
-    db_obj = Conversation.model_validate(
-        conversation_in, update={"user_id": user_id}
-    )
+    db_obj = Conversation.model_validate(conversation_in, update={"user_id": user_id})
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
@@ -69,8 +75,7 @@ def get_conversation(
     *, session: Session, conversation_id: uuid.UUID, user_id: uuid.UUID
 ) -> Conversation | None:
     statement = select(Conversation).where(
-        Conversation.id == conversation_id,
-        Conversation.user_id == user_id
+        Conversation.id == conversation_id, Conversation.user_id == user_id
     )
     return session.exec(statement).first()
 
@@ -78,14 +83,20 @@ def get_conversation(
 def get_conversations(
     *, session: Session, user_id: uuid.UUID, skip: int = 0, limit: int = 100
 ) -> list[Conversation]:
-    statement = select(Conversation).where(
-        Conversation.user_id == user_id
-    ).offset(skip).limit(limit)
+    statement = (
+        select(Conversation)
+        .where(Conversation.user_id == user_id)
+        .offset(skip)
+        .limit(limit)
+    )
     return list(session.exec(statement).all())
 
 
 def update_conversation(
-    *, session: Session, db_conversation: Conversation, conversation_in: ConversationUpdate
+    *,
+    session: Session,
+    db_conversation: Conversation,
+    conversation_in: ConversationUpdate,
 ) -> Conversation:
     conversation_data = conversation_in.model_dump(exclude_unset=True)
     db_conversation.sqlmodel_update(conversation_data)
@@ -99,8 +110,7 @@ def delete_conversation(
     *, session: Session, conversation_id: uuid.UUID, user_id: uuid.UUID
 ) -> bool:
     statement = select(Conversation).where(
-        Conversation.id == conversation_id,
-        Conversation.user_id == user_id
+        Conversation.id == conversation_id, Conversation.user_id == user_id
     )
     conversation = session.exec(statement).first()
     if conversation:
@@ -126,24 +136,31 @@ def create_message(
 def get_messages(
     *, session: Session, conversation_id: uuid.UUID, skip: int = 0, limit: int = 100
 ) -> list[Message]:
-    statement = select(Message).where(
-        Message.conversation_id == conversation_id
-    ).offset(skip).limit(limit)
+    statement = (
+        select(Message)
+        .where(Message.conversation_id == conversation_id)
+        .offset(skip)
+        .limit(limit)
+    )
     return list(session.exec(statement).all())
 
 
 # ============== CodeBlock CRUD ==============
 def create_code_block(
-    *, session: Session, code_block_in: CodeBlockCreate, 
-    conversation_id: uuid.UUID, user_id: uuid.UUID, message_id: uuid.UUID | None = None
+    *,
+    session: Session,
+    code_block_in: CodeBlockCreate,
+    conversation_id: uuid.UUID,
+    user_id: uuid.UUID,
+    message_id: uuid.UUID | None = None,
 ) -> CodeBlock:
     db_obj = CodeBlock.model_validate(
-        code_block_in, 
+        code_block_in,
         update={
             "conversation_id": conversation_id,
             "user_id": user_id,
-            "message_id": message_id
-        }
+            "message_id": message_id,
+        },
     )
     session.add(db_obj)
     session.commit()
@@ -155,22 +172,24 @@ def get_code_block(
     *, session: Session, code_block_id: uuid.UUID, user_id: uuid.UUID
 ) -> CodeBlock | None:
     statement = select(CodeBlock).where(
-        CodeBlock.id == code_block_id,
-        CodeBlock.user_id == user_id
+        CodeBlock.id == code_block_id, CodeBlock.user_id == user_id
     )
     return session.exec(statement).first()
 
 
 def get_code_blocks(
-    *, session: Session, user_id: uuid.UUID, 
+    *,
+    session: Session,
+    user_id: uuid.UUID,
     conversation_id: uuid.UUID | None = None,
-    skip: int = 0, limit: int = 100
+    skip: int = 0,
+    limit: int = 100,
 ) -> list[CodeBlock]:
     statement = select(CodeBlock).where(CodeBlock.user_id == user_id)
-    
+
     if conversation_id:
         statement = statement.where(CodeBlock.conversation_id == conversation_id)
-    
+
     statement = statement.offset(skip).limit(limit)
     return list(session.exec(statement).all())
 
@@ -190,8 +209,7 @@ def delete_code_block(
     *, session: Session, code_block_id: uuid.UUID, user_id: uuid.UUID
 ) -> bool:
     statement = select(CodeBlock).where(
-        CodeBlock.id == code_block_id,
-        CodeBlock.user_id == user_id
+        CodeBlock.id == code_block_id, CodeBlock.user_id == user_id
     )
     code_block = session.exec(statement).first()
     if code_block:
@@ -203,16 +221,20 @@ def delete_code_block(
 
 # ============== File CRUD ==============
 def create_file(
-    *, session: Session, file_in: FileCreate, user_id: uuid.UUID,
-    file_path: str, conversation_id: uuid.UUID | None = None
+    *,
+    session: Session,
+    file_in: FileCreate,
+    user_id: uuid.UUID,
+    file_path: str,
+    conversation_id: uuid.UUID | None = None,
 ) -> File:
     db_obj = File.model_validate(
         file_in,
         update={
             "user_id": user_id,
             "file_path": file_path,
-            "conversation_id": conversation_id
-        }
+            "conversation_id": conversation_id,
+        },
     )
     session.add(db_obj)
     session.commit()
@@ -223,34 +245,23 @@ def create_file(
 def get_file(
     *, session: Session, file_id: uuid.UUID, user_id: uuid.UUID
 ) -> File | None:
-    statement = select(File).where(
-        File.id == file_id,
-        File.user_id == user_id
-    )
+    statement = select(File).where(File.id == file_id, File.user_id == user_id)
     return session.exec(statement).first()
 
 
 def get_files(
-    *, session: Session, user_id: uuid.UUID,
-    conversation_id: uuid.UUID | None = None,
-    skip: int = 0, limit: int = 100
+    *,
+    session: Session,
+    user_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = 100,
 ) -> list[File]:
-    statement = select(File).where(File.user_id == user_id)
-    
-    if conversation_id:
-        statement = statement.where(File.conversation_id == conversation_id)
-    
-    statement = statement.offset(skip).limit(limit)
+    statement = select(File).where(File.user_id == user_id).offset(skip).limit(limit)
     return list(session.exec(statement).all())
 
 
-def delete_file(
-    *, session: Session, file_id: uuid.UUID, user_id: uuid.UUID
-) -> bool:
-    statement = select(File).where(
-        File.id == file_id,
-        File.user_id == user_id
-    )
+def delete_file(*, session: Session, file_id: uuid.UUID, user_id: uuid.UUID) -> bool:
+    statement = select(File).where(File.id == file_id, File.user_id == user_id)
     file = session.exec(statement).first()
     if file:
         session.delete(file)
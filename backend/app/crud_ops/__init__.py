@@ -1 +1 @@
-"""CRUD operations for Red Panda models."""
\ No newline at end of file
+"""CRUD operations for Red Panda models."""
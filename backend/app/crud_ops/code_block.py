@@ -1,10 +1,14 @@
 """CRUD operations for CodeBlock model."""
+
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Any, cast
 
-from sqlmodel import Session, select, or_
 from sqlalchemy import desc
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.dml import ReturningInsert
+from sqlmodel import Session, col, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.code_block import (
     CodeBlock,
@@ -18,22 +22,91 @@ def create_code_block(
     session: Session,
     code_block_in: CodeBlockCreate,
     user_id: uuid.UUID,
+    content_hash: str | None = None,
 ) -> CodeBlock:
-    """Create a new code block."""
+    """Create a new code block, or count a repeat of one the user already has."""
+    now = datetime.utcnow()
     db_code_block = CodeBlock(
         **code_block_in.model_dump(),
         user_id=user_id,
-        created_at=datetime.utcnow(),
+        created_at=now,
+        content_hash=content_hash,
+        last_seen_at=now,
+        last_seen_conversation_id=code_block_in.conversation_id,
     )
-    session.add(db_code_block)
+    if content_hash is None:
+        session.add(db_code_block)
+        session.commit()
+        session.refresh(db_code_block)
+        return db_code_block
+
+    ((code_block_id, _),) = session.execute(
+        upsert_code_blocks_statement([db_code_block])
+    ).all()
     session.commit()
-    session.refresh(db_code_block)
-    return db_code_block
+    stored = session.get(CodeBlock, code_block_id, populate_existing=True)
+    assert stored is not None
+    return stored
+
+
+def upsert_code_blocks_statement(
+    code_blocks: list[CodeBlock],
+) -> ReturningInsert[Any]:
+    """INSERT of code blocks that counts repeats instead of storing them.
+
+    Blocks are matched on the user and ``content_hash``. A repeat adds to
+    the stored block's ``occurrence_count`` and moves its last-seen
+    fields, leaving everything else (including edited tags) alone.
+    Repeats within ``code_blocks`` are merged first, since one statement
+    can't update a row twice. Returns the id and hash of each row.
+    """
+    rows: dict[str | uuid.UUID, dict[str, Any]] = {}
+    for code_block in code_blocks:
+        key = code_block.content_hash or code_block.id
+        if key in rows:
+            rows[key]["occurrence_count"] += code_block.occurrence_count
+        else:
+            rows[key] = code_block.model_dump()
+
+    statement = insert(CodeBlock).values(list(rows.values()))
+    excluded = statement.excluded
+    upsert = statement.on_conflict_do_update(
+        index_elements=["user_id", "content_hash"],
+        set_={
+            "occurrence_count": CodeBlock.occurrence_count + excluded.occurrence_count,
+            "last_seen_at": excluded.last_seen_at,
+            "last_seen_conversation_id": excluded.last_seen_conversation_id,
+        },
+    ).returning(col(CodeBlock.id), col(CodeBlock.content_hash))
+    # SQLAlchemy 2.0 and 2.1 spell the row type of a RETURNING differently
+    return cast(ReturningInsert[Any], upsert)
+
+
+async def upsert_code_blocks_async(
+    *,
+    session: AsyncSession,
+    code_blocks: list[CodeBlock],
+) -> list[uuid.UUID]:
+    """Store code blocks, counting repeats; returns the stored id of each.
+
+    Doesn't commit, so the caller can write the blocks together with
+    whatever links to them.
+    """
+    if not code_blocks:
+        return []
+    result = await session.execute(upsert_code_blocks_statement(code_blocks))
+    stored = {
+        content_hash: code_block_id for code_block_id, content_hash in result.all()
+    }
+    return [
+        stored[code_block.content_hash] if code_block.content_hash else code_block.id
+        for code_block in code_blocks
+    ]
 
 
 def get_code_block(
     *, session: Session, code_block_id: uuid.UUID, user_id: uuid.UUID
-) -> Optional[CodeBlock]:
+) -> CodeBlock | None:
     """Get a code block by ID for a specific user."""
     statement = select(CodeBlock).where(
         CodeBlock.id == code_block_id,
@@ -46,17 +119,29 @@ def get_code_blocks(
     *,
     session: Session,
     user_id: uuid.UUID,
-    conversation_id: Optional[uuid.UUID] = None,
+    conversation_id: uuid.UUID | None = None,
     skip: int = 0,
     limit: int = 100,
 ) -> list[CodeBlock]:
-    """Get code blocks for a user, optionally filtered by conversation."""
+    """Get code blocks for a user, optionally filtered by conversation.
+
+    A block belongs to the conversation it was first saved in and to the
+    one it was last seen in. Conversations in between that repeated it
+    link to it only through their messages' ``code_block_ids``.
+    """
     statement = select(CodeBlock).where(CodeBlock.user_id == user_id)
-    
+
     if conversation_id:
-        statement = statement.where(CodeBlock.conversation_id == conversation_id)
-    
-    statement = statement.order_by(desc(CodeBlock.created_at)).offset(skip).limit(limit)
+        statement = statement.where(
+            or_(
+                CodeBlock.conversation_id == conversation_id,
+                CodeBlock.last_seen_conversation_id == conversation_id,
+            )
+        )
+
+    statement = (
+        statement.order_by(desc(col(CodeBlock.created_at))).offset(skip).limit(limit)
+    )
     return list(session.exec(statement).all())
 
 
@@ -65,35 +150,37 @@ def search_code_blocks(
     session: Session,
     user_id: uuid.UUID,
     query: str,
-    language: Optional[str] = None,
-    tags: Optional[list[str]] = None,
+    language: str | None = None,
+    tags: list[str] | None = None,
     skip: int = 0,
     limit: int = 100,
 ) -> list[CodeBlock]:
     """Search code blocks by content, description, or metadata."""
     statement = select(CodeBlock).where(CodeBlock.user_id == user_id)
-    
+
     # Search in code content and description
     if query:
         statement = statement.where(
             or_(
-                CodeBlock.code.contains(query),
-                CodeBlock.description.contains(query),
+                col(CodeBlock.code).contains(query),
+                col(CodeBlock.description).contains(query),
             )
         )
-    
+
     # Filter by language
     if language:
         statement = statement.where(CodeBlock.language == language)
-    
+
     # Filter by tags (any tag match)
     if tags:
         # This requires a more complex query for JSON array contains
         # For now, we'll do a simple implementation
         for tag in tags:
-            statement = statement.where(CodeBlock.tags.contains([tag]))
-    
-    statement = statement.order_by(desc(CodeBlock.created_at)).offset(skip).limit(limit)
+            statement = statement.where(col(CodeBlock.tags).contains([tag]))
+
+    statement = (
+        statement.order_by(desc(col(CodeBlock.created_at))).offset(skip).limit(limit)
+    )
     return list(session.exec(statement).all())
 
 
@@ -105,10 +192,10 @@ def update_code_block(
 ) -> CodeBlock:
     """Update a code block."""
     code_block_data = code_block_in.model_dump(exclude_unset=True)
-    
+
     for key, value in code_block_data.items():
         setattr(db_code_block, key, value)
-    
+
     session.add(db_code_block)
     session.commit()
     session.refresh(db_code_block)
@@ -124,7 +211,7 @@ def delete_code_block(
     )
     if not code_block:
         return False
-    
+
     session.delete(code_block)
     session.commit()
     return True
@@ -136,13 +223,19 @@ def get_code_blocks_by_conversation(
     conversation_id: uuid.UUID,
     user_id: uuid.UUID,
 ) -> list[CodeBlock]:
-    """Get all code blocks for a specific conversation."""
+    """Get the code blocks first saved in or last seen in a conversation.
+
+    See ``get_code_blocks`` for how repeated blocks are listed.
+    """
     statement = (
         select(CodeBlock)
         .where(
-            CodeBlock.conversation_id == conversation_id,
+            or_(
+                CodeBlock.conversation_id == conversation_id,
+                CodeBlock.last_seen_conversation_id == conversation_id,
+            ),
             CodeBlock.user_id == user_id,
         )
-        .order_by(CodeBlock.created_at)
+        .order_by(col(CodeBlock.created_at))
     )
-    return list(session.exec(statement).all())
\ No newline at end of file
+    return list(session.exec(statement).all())
@@ -1,10 +1,12 @@
 """CRUD operations for Conversation model."""
+
 import uuid
 from datetime import datetime
-from typing import Optional
 
-from sqlmodel import Session, select, func
-from sqlalchemy import desc
+from sqlalchemy import Update, desc, update
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
 from app.models.conversation import (
     Conversation,
@@ -29,15 +31,30 @@ def create_conversation(
     return db_conversation
 
 
-def get_conversation(
-    *, session: Session, conversation_id: uuid.UUID, user_id: uuid.UUID
-) -> Optional[Conversation]:
-    """Get a conversation by ID for a specific user."""
-    statement = select(Conversation).where(
+def conversation_statement(
+    conversation_id: uuid.UUID, user_id: uuid.UUID
+) -> SelectOfScalar[Conversation]:
+    """The conversation with ``conversation_id`` if it belongs to ``user_id``."""
+    return select(Conversation).where(
         Conversation.id == conversation_id,
         Conversation.user_id == user_id,
     )
-    return session.exec(statement).first()
+
+
+def get_conversation(
+    *, session: Session, conversation_id: uuid.UUID, user_id: uuid.UUID
+) -> Conversation | None:
+    """Get a conversation by ID for a specific user."""
+    return session.exec(conversation_statement(conversation_id, user_id)).first()
+
+
+async def get_conversation_async(
+    *, session: AsyncSession, conversation_id: uuid.UUID, user_id: uuid.UUID
+) -> Conversation | None:
+    """Async variant of ``get_conversation``."""
+    return (
+        await session.exec(conversation_statement(conversation_id, user_id))
+    ).first()
 
 
 def get_conversations(
@@ -51,7 +68,7 @@ def get_conversations(
     statement = (
         select(Conversation)
         .where(Conversation.user_id == user_id)
-        .order_by(desc(Conversation.updated_at))
+        .order_by(desc(col(Conversation.updated_at)))
         .offset(skip)
         .limit(limit)
     )
@@ -60,7 +77,7 @@ def get_conversations(
 
 def count_conversations(*, session: Session, user_id: uuid.UUID) -> int:
     """Count total conversations for a user."""
-    statement = select(func.count(Conversation.id)).where(
+    statement = select(func.count(col(Conversation.id))).where(
         Conversation.user_id == user_id
     )
     return session.exec(statement).one()
@@ -75,10 +92,10 @@ def update_conversation(
     """Update a conversation."""
     conversation_data = conversation_in.model_dump(exclude_unset=True)
     conversation_data["updated_at"] = datetime.utcnow()
-    
+
     for key, value in conversation_data.items():
         setattr(db_conversation, key, value)
-    
+
     session.add(db_conversation)
     session.commit()
     session.refresh(db_conversation)
@@ -94,19 +111,58 @@ def delete_conversation(
     )
     if not conversation:
         return False
-    
+
     session.delete(conversation)
     session.commit()
     return True
 
 
-def update_message_count(
-    *, session: Session, conversation_id: uuid.UUID
+def message_added_statement(
+    conversation_id: uuid.UUID,
+    token_count: int = 0,
+    last_message_preview: str | None = None,
+) -> Update:
+    """UPDATE bumping a conversation's message and token counts.
+
+    The increments happen in the database, so concurrent writers can't
+    lose counts; a copy of the conversation already loaded in the session
+    is updated as well.
+    """
+    values = {
+        "message_count": Conversation.message_count + 1,
+        "token_count": Conversation.token_count + token_count,
+        "updated_at": datetime.utcnow(),
+    }
+    if last_message_preview is not None:
+        values["last_message_preview"] = last_message_preview
+    return (
+        update(Conversation)
+        .where(col(Conversation.id) == conversation_id)
+        .values(**values)
+    )
+
+
+def record_message_added(
+    *,
+    session: Session,
+    conversation_id: uuid.UUID,
+    token_count: int = 0,
+    last_message_preview: str | None = None,
+) -> None:
+    """Count a new message on its conversation. The caller commits."""
+    session.execute(
+        message_added_statement(conversation_id, token_count, last_message_preview)
+    )
+
+
+async def record_message_added_async(
+    *,
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    token_count: int = 0,
+    last_message_preview: str | None = None,
 ) -> None:
-    """Update the message count for a conversation."""
-    conversation = session.get(Conversation, conversation_id)
-    if conversation:
-        conversation.message_count += 1
-        conversation.updated_at = datetime.utcnow()
-        session.add(conversation)
-        session.commit()
\ No newline at end of file
+    """Async variant of ``record_message_added``."""
+    await session.execute(
+        message_added_statement(conversation_id, token_count, last_message_preview)
+    )
@@ -1,10 +1,11 @@
 """CRUD operations for File model."""
+
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Any
 
-from sqlmodel import Session, select
 from sqlalchemy import desc
+from sqlmodel import Session, col, select
 
 from app.models.file import (
     File,
@@ -18,7 +19,7 @@ def create_file(
     file_in: FileCreate,
     user_id: uuid.UUID,
     storage_path: str,
-    file_metadata: dict,
+    file_metadata: dict[str, Any],
 ) -> File:
     """Create a new file record."""
     db_file = File(
@@ -36,7 +37,7 @@ def create_file(
 
 def get_file(
     *, session: Session, file_id: uuid.UUID, user_id: uuid.UUID
-) -> Optional[File]:
+) -> File | None:
     """Get a file by ID for a specific user."""
     statement = select(File).where(
         File.id == file_id,
@@ -56,7 +57,7 @@ def get_files(
     statement = (
         select(File)
         .where(File.user_id == user_id)
-        .order_by(desc(File.uploaded_at))
+        .order_by(desc(col(File.uploaded_at)))
         .offset(skip)
         .limit(limit)
     )
@@ -65,12 +66,12 @@ def get_files(
 
 def delete_file(
     *, session: Session, file_id: uuid.UUID, user_id: uuid.UUID
-) -> Optional[File]:
+) -> File | None:
     """Delete a file and return it for cleanup."""
     file = get_file(session=session, file_id=file_id, user_id=user_id)
     if not file:
         return None
-    
+
     session.delete(file)
     session.commit()
-    return file
\ No newline at end of file
+    return file
@@ -1,16 +1,41 @@
 """CRUD operations for Message model."""
+
 import uuid
 from datetime import datetime
-from typing import Optional
 
-from sqlmodel import Session, select
-from sqlalchemy import asc
+from sqlalchemy import asc, desc, update
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
+from app.crud_ops.conversation import record_message_added, record_message_added_async
+from app.models.conversation import Conversation
 from app.models.message import (
     Message,
     MessageCreate,
 )
-from app.crud_ops.conversation import update_message_count
+from app.models.reply_outbox import ReplyOutbox
+from app.services.token_estimator import estimate_tokens
+
+
+def build_message(
+    *,
+    message_in: MessageCreate,
+    conversation_id: uuid.UUID,
+    is_truncated: bool = False,
+    message_id: uuid.UUID | None = None,
+) -> Message:
+    """Build an unsaved message row."""
+    message = Message(
+        **message_in.model_dump(exclude={"conversation_id"}),
+        conversation_id=conversation_id,
+        created_at=datetime.utcnow(),
+        token_count=estimate_tokens(message_in.content),
+        is_truncated=is_truncated,
+    )
+    if message_id:
+        message.id = message_id
+    return message
 
 
 def create_message(
@@ -18,26 +43,98 @@ def create_message(
     session: Session,
     message_in: MessageCreate,
     conversation_id: uuid.UUID,
+    is_truncated: bool = False,
+    message_id: uuid.UUID | None = None,
 ) -> Message:
-    """Create a new message in a conversation."""
-    db_message = Message(
-        **message_in.model_dump(),
+    """Create a new message in a conversation.
+
+    ``message_id`` lets callers announce the id before the message exists.
+    The message and the conversation's counters are written in one
+    transaction.
+    """
+    db_message = build_message(
+        message_in=message_in,
         conversation_id=conversation_id,
-        created_at=datetime.utcnow(),
+        is_truncated=is_truncated,
+        message_id=message_id,
     )
     session.add(db_message)
+    record_message_added(
+        session=session,
+        conversation_id=conversation_id,
+        token_count=db_message.token_count or 0,
+    )
     session.commit()
     session.refresh(db_message)
-    
-    # Update conversation message count
-    update_message_count(session=session, conversation_id=conversation_id)
-    
     return db_message
 
 
-def get_message(
-    *, session: Session, message_id: uuid.UUID
-) -> Optional[Message]:
+async def create_message_async(
+    *,
+    session: AsyncSession,
+    message_in: MessageCreate,
+    conversation_id: uuid.UUID,
+    is_truncated: bool = False,
+    message_id: uuid.UUID | None = None,
+) -> Message:
+    """Async variant of ``create_message``."""
+    db_message = build_message(
+        message_in=message_in,
+        conversation_id=conversation_id,
+        is_truncated=is_truncated,
+        message_id=message_id,
+    )
+    session.add(db_message)
+    await record_message_added_async(
+        session=session,
+        conversation_id=conversation_id,
+        token_count=db_message.token_count or 0,
+    )
+    await session.commit()
+    return db_message
+
+
+async def create_reply_async(
+    *,
+    session: AsyncSession,
+    message_in: MessageCreate,
+    conversation_id: uuid.UUID,
+    user_id: uuid.UUID,
+    is_truncated: bool = False,
+    message_id: uuid.UUID | None = None,
+) -> tuple[Message, ReplyOutbox]:
+    """Save an assistant reply and queue its post-processing.
+
+    The message, the conversation's counter and preview, and an outbox
+    row for the code block extraction are written in one transaction. The
+    row is claimed by this worker right away.
+    """
+    db_message = build_message(
+        message_in=message_in,
+        conversation_id=conversation_id,
+        is_truncated=is_truncated,
+        message_id=message_id,
+    )
+    job = ReplyOutbox(
+        message_id=db_message.id,
+        conversation_id=conversation_id,
+        user_id=user_id,
+        claimed_at=datetime.utcnow(),
+    )
+
+    session.add(db_message)
+    session.add(job)
+    await record_message_added_async(
+        session=session,
+        conversation_id=conversation_id,
+        token_count=db_message.token_count or 0,
+        last_message_preview=message_in.content[:500],
+    )
+    await session.commit()
+    return db_message, job
+
+
+def get_message(*, session: Session, message_id: uuid.UUID) -> Message | None:
     """Get a message by ID."""
     return session.get(Message, message_id)
 
@@ -47,31 +144,74 @@ def get_messages_by_conversation(
     session: Session,
     conversation_id: uuid.UUID,
     skip: int = 0,
-    limit: Optional[int] = None,
+    limit: int | None = None,
 ) -> list[Message]:
     """Get all messages for a conversation, ordered by creation time."""
     statement = (
         select(Message)
         .where(Message.conversation_id == conversation_id)
-        .order_by(asc(Message.created_at))
+        .order_by(asc(col(Message.created_at)))
         .offset(skip)
     )
-    
+
     if limit:
         statement = statement.limit(limit)
-    
+
     return list(session.exec(statement).all())
 
 
-def delete_message(
-    *, session: Session, message_id: uuid.UUID
-) -> bool:
+def recent_messages_statement(
+    conversation_id: uuid.UUID, limit: int, after: datetime | None = None
+) -> SelectOfScalar[Message]:
+    """Newest messages first, optionally only those after a timestamp."""
+    statement = select(Message).where(Message.conversation_id == conversation_id)
+
+    if after:
+        statement = statement.where(col(Message.created_at) > after)
+
+    return statement.order_by(desc(col(Message.created_at))).limit(limit)
+
+
+def get_recent_messages(
+    *,
+    session: Session,
+    conversation_id: uuid.UUID,
+    limit: int,
+    after: datetime | None = None,
+) -> list[Message]:
+    """Get the newest messages of a conversation, returned oldest first."""
+    statement = recent_messages_statement(conversation_id, limit, after)
+    messages = list(session.exec(statement).all())
+    messages.reverse()
+    return messages
+
+
+async def get_recent_messages_async(
+    *,
+    session: AsyncSession,
+    conversation_id: uuid.UUID,
+    limit: int,
+    after: datetime | None = None,
+) -> list[Message]:
+    """Async variant of ``get_recent_messages``."""
+    statement = recent_messages_statement(conversation_id, limit, after)
+    messages = list((await session.exec(statement)).all())
+    messages.reverse()
+    return messages
+
+
+def delete_message(*, session: Session, message_id: uuid.UUID) -> bool:
     """Delete a message."""
     message = session.get(Message, message_id)
     if not message:
         return False
-    
+
     session.delete(message)
+    session.execute(
+        update(Conversation)
+        .where(col(Conversation.id) == message.conversation_id)
+        .values(token_count=Conversation.token_count - (message.token_count or 0))
+    )
     session.commit()
     return True
 
@@ -81,16 +221,16 @@ def add_code_block_to_message(
     session: Session,
     message_id: uuid.UUID,
     code_block_id: uuid.UUID,
-) -> Optional[Message]:
+) -> Message | None:
     """Add a code block reference to a message."""
     message = session.get(Message, message_id)
     if not message:
         return None
-    
+
     if code_block_id not in message.code_block_ids:
         message.code_block_ids = message.code_block_ids + [code_block_id]
         session.add(message)
         session.commit()
         session.refresh(message)
-    
-    return message
\ No newline at end of file
+
+    return message
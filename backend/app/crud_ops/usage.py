@@ -0,0 +1,52 @@
+"""CRUD operations for the usage ledger rollups."""
+
+import uuid
+from datetime import date
+
+from sqlmodel import Session, func, select
+
+from app.models.usage import ProviderUsage, UsageDaily
+
+
+def get_usage_by_provider(
+    *,
+    session: Session,
+    user_id: uuid.UUID,
+    since: date | None = None,
+) -> dict[str, ProviderUsage]:
+    """Sum a user's daily rollups per provider, optionally from a given day."""
+    # select() is only typed for up to four columns
+    statement = (
+        select(  # type: ignore[call-overload]
+            UsageDaily.provider,
+            func.sum(UsageDaily.request_count),
+            func.sum(UsageDaily.input_tokens),
+            func.sum(UsageDaily.output_tokens),
+            func.sum(UsageDaily.cached_input_tokens),
+            func.sum(UsageDaily.latency_ms_total),
+        )
+        .where(UsageDaily.user_id == user_id)
+        .group_by(UsageDaily.provider)
+    )
+
+    if since:
+        statement = statement.where(UsageDaily.day >= since)
+
+    usage = {}
+    for (
+        provider,
+        requests,
+        input_tokens,
+        output_tokens,
+        cached,
+        latency,
+    ) in session.exec(statement).all():
+        usage[provider] = ProviderUsage(
+            total_tokens=input_tokens + output_tokens,
+            total_requests=requests,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_input_tokens=cached,
+            average_latency_ms=round(latency / requests, 1) if requests else 0.0,
+        )
+    return usage
@@ -1,3 +1,6 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
@@ -5,6 +8,12 @@ from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.loop_monitor import loop_monitor
+from app.services.llm_client_pool import llm_client_pool
+from app.services.parse_pool import parse_pool
+from app.services.reply_pipeline import reply_pipeline
+from app.services.usage_recorder import usage_recorder
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,10 +23,28 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    usage_recorder.start()
+    loop_monitor.start()
+    parse_pool.start()
+    # Also re-enqueues replies left unprocessed by a previous run
+    reply_pipeline.start()
+    yield
+    await reply_pipeline.stop()
+    parse_pool.stop()
+    await loop_monitor.stop()
+    await usage_recorder.stop()
+    await llm_client_pool.aclose()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
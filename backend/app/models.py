@@ -1,10 +1,9 @@
 import uuid
 from datetime import datetime
-from typing import Optional
 
 from pydantic import EmailStr
-from sqlalchemy import Column, JSON, Text
-from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import JSON, Column, Text
+from sqlmodel import Field, Relationship, SQLModel
 
 
 # Shared properties
@@ -46,19 +45,17 @@ class UpdatePassword(SQLModel):
 class User(UserBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
-    
+
     # BYOK (Bring Your Own Key) fields for LLM API access
     api_keys: dict = Field(
-        default={}, 
+        default={},
         sa_column=Column(JSON),
-        description="Encrypted API keys for LLM providers"
+        description="Encrypted API keys for LLM providers",
     )
     api_usage: dict = Field(
-        default={}, 
-        sa_column=Column(JSON),
-        description="Usage tracking for API calls"
+        default={}, sa_column=Column(JSON), description="Usage tracking for API calls"
     )
-    
+
     # Relationships
     conversations: list["Conversation"] = Relationship(back_populates="user")
     code_blocks: list["CodeBlock"] = Relationship(back_populates="user")
@@ -98,6 +95,7 @@ class NewPassword(SQLModel):
 
 # ============== Red Panda Core Models ==============
 
+
 # Conversation Model
 class ConversationBase(SQLModel):
     title: str = Field(max_length=255)
@@ -108,7 +106,7 @@ class ConversationBase(SQLModel):
 class Conversation(ConversationBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
-    
+
     # Relationships
     user: User = Relationship(back_populates="conversations")
     messages: list["ChatMessage"] = Relationship(back_populates="conversation")
@@ -120,7 +118,7 @@ class ConversationCreate(SQLModel):
 
 
 class ConversationUpdate(SQLModel):
-    title: Optional[str] = Field(default=None, max_length=255)
+    title: str | None = Field(default=None, max_length=255)
 
 
 class ConversationPublic(ConversationBase):
@@ -139,13 +137,13 @@ class ChatMessageBase(SQLModel):
 
 class ChatMessage(ChatMessageBase, table=True):
     __tablename__ = "chat_messages"  # Avoid conflict with existing Message class
-    
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     conversation_id: uuid.UUID = Field(foreign_key="conversation.id", index=True)
-    
+
     # Store code block references
     code_block_ids: list[str] = Field(default=[], sa_column=Column(JSON))
-    
+
     # Relationships
     conversation: Conversation = Relationship(back_populates="messages")
 
@@ -165,19 +163,19 @@ class ChatMessagePublic(ChatMessageBase):
 class CodeBlockBase(SQLModel):
     language: str = Field(max_length=50)
     code: str = Field(sa_column=Column(Text))
-    description: Optional[str] = Field(default=None, sa_column=Column(Text))
-    
+    description: str | None = Field(default=None, sa_column=Column(Text))
+
     # Metadata for searchability
     imports: list[str] = Field(default=[], sa_column=Column(JSON))
     functions: list[str] = Field(default=[], sa_column=Column(JSON))
     classes: list[str] = Field(default=[], sa_column=Column(JSON))
     variables: list[str] = Field(default=[], sa_column=Column(JSON))
-    
+
     # Usage tracking
     tags: list[str] = Field(default=[], sa_column=Column(JSON))
     execution_count: int = Field(default=0)
-    last_executed: Optional[datetime] = Field(default=None)
-    
+    last_executed: datetime | None = Field(default=None)
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -186,8 +184,8 @@ class CodeBlock(CodeBlockBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     conversation_id: uuid.UUID = Field(foreign_key="conversation.id", index=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
-    message_id: Optional[uuid.UUID] = Field(default=None, index=True)
-    
+    message_id: uuid.UUID | None = Field(default=None, index=True)
+
     # Relationships
     conversation: Conversation = Relationship(back_populates="code_blocks")
     user: User = Relationship(back_populates="code_blocks")
@@ -196,20 +194,20 @@ class CodeBlock(CodeBlockBase, table=True):
 class CodeBlockCreate(SQLModel):
     language: str = Field(max_length=50)
     code: str
-    description: Optional[str] = None
+    description: str | None = None
     tags: list[str] = []
 
 
 class CodeBlockUpdate(SQLModel):
-    description: Optional[str] = None
-    tags: Optional[list[str]] = None
+    description: str | None = None
+    tags: list[str] | None = None
 
 
 class CodeBlockPublic(CodeBlockBase):
     id: uuid.UUID
     conversation_id: uuid.UUID
     user_id: uuid.UUID
-    message_id: Optional[uuid.UUID] = None
+    message_id: uuid.UUID | None = None
 
 
 # File Model for CSV uploads
@@ -218,20 +216,22 @@ class FileBase(SQLModel):
     content_type: str = Field(max_length=100)
     file_size: int
     file_path: str = Field(max_length=500)
-    
+
     # CSV metadata
     columns: list[str] = Field(default=[], sa_column=Column(JSON))
-    row_count: Optional[int] = Field(default=None)
+    row_count: int | None = Field(default=None)
     column_types: dict = Field(default={}, sa_column=Column(JSON))
-    
+
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class File(FileBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", index=True)
-    conversation_id: Optional[uuid.UUID] = Field(default=None, foreign_key="conversation.id", index=True)
-    
+    conversation_id: uuid.UUID | None = Field(
+        default=None, foreign_key="conversation.id", index=True
+    )
+
     # Relationships
     user: User = Relationship(back_populates="files")
 
@@ -245,6 +245,4 @@ class FileCreate(SQLModel):
 class FilePublic(FileBase):
     id: uuid.UUID
     user_id: uuid.UUID
-    conversation_id: Optional[uuid.UUID] = None
-
-
+    conversation_id: uuid.UUID | None = None
@@ -1,21 +1,7 @@
 """Red Panda models package."""
+
 from sqlmodel import SQLModel
 
-from app.models.user import (
-    User,
-    UserBase,
-    UserCreate,
-    UserPublic,
-    UsersPublic,
-    UserRegister,
-    UserUpdate,
-    UserUpdateMe,
-    UpdatePassword,
-    Token,
-    TokenPayload,
-    NewPassword,
-    AuthMessage,
-)
 from app.models.code_block import (
     CodeBlock,
     CodeBlockCreate,
@@ -24,6 +10,7 @@ from app.models.code_block import (
     CodeBlocksPublic,
     CodeBlockUpdate,
 )
+from app.models.completion_cache import CompletionCache
 from app.models.conversation import (
     Conversation,
     ConversationCreate,
@@ -47,6 +34,27 @@ from app.models.message import (
     MessagesPublic,
     MessageUpdate,
 )
+from app.models.reply_outbox import ReplyOutbox
+from app.models.usage import (
+    ProviderUsage,
+    UsageDaily,
+    UsageEvent,
+)
+from app.models.user import (
+    AuthMessage,
+    NewPassword,
+    Token,
+    TokenPayload,
+    UpdatePassword,
+    User,
+    UserBase,
+    UserCreate,
+    UserPublic,
+    UserRegister,
+    UsersPublic,
+    UserUpdate,
+    UserUpdateMe,
+)
 
 __all__ = [
     "SQLModel",
@@ -84,6 +92,14 @@ __all__ = [
     "MessagePublic",
     "MessagesPublic",
     "MessageRole",
+    # CompletionCache
+    "CompletionCache",
+    # ReplyOutbox
+    "ReplyOutbox",
+    # Usage
+    "UsageEvent",
+    "UsageDaily",
+    "ProviderUsage",
     # File
     "File",
     "FileCreate",
@@ -91,4 +107,4 @@ __all__ = [
     "FilePublic",
     "FilesPublic",
     "FileMetadata",
-]
\ No newline at end of file
+]
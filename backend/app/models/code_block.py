@@ -1,26 +1,31 @@
 """CodeBlock model for Red Panda - Core feature for code storage and reusability."""
+
 import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, JSON
-from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import JSON, Column, Index
+from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
-    from app.models.user import User
     from app.models.conversation import Conversation
+    from app.models.user import User
 
 
 class CodeBlockBase(SQLModel):
     """Base code block model with shared properties."""
+
     code: str = Field(description="The actual code content")
-    description: str | None = Field(default=None, description="Auto-generated description of what the code does")
+    description: str | None = Field(
+        default=None, description="Auto-generated description of what the code does"
+    )
     language: str = Field(default="python", max_length=20)
     executed_successfully: bool | None = Field(default=None)
 
 
 class CodeBlockCreate(CodeBlockBase):
     """Properties to receive on code block creation."""
+
     conversation_id: uuid.UUID
     tags: list[str] = Field(default=[], sa_column=Column(JSON))
     imports: list[str] = Field(default=[], sa_column=Column(JSON))
@@ -30,6 +35,7 @@ class CodeBlockCreate(CodeBlockBase):
 
 class CodeBlockUpdate(SQLModel):
     """Properties to receive on code block update."""
+
     description: str | None = None
     executed_successfully: bool | None = None
     tags: list[str] | None = None
@@ -37,32 +43,62 @@ class CodeBlockUpdate(SQLModel):
 
 class CodeBlock(CodeBlockBase, table=True):
     """Database model for code blocks - CORE FEATURE."""
+
+    __table_args__ = (
+        Index(
+            "ix_codeblock_user_id_content_hash", "user_id", "content_hash", unique=True
+        ),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     conversation_id: uuid.UUID = Field(foreign_key="conversation.id", nullable=False)
-    user_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    
+
     # Metadata for search and analysis
     imports: list[str] = Field(default=[], sa_column=Column(JSON))
     functions_defined: list[str] = Field(default=[], sa_column=Column(JSON))
     variables_created: list[str] = Field(default=[], sa_column=Column(JSON))
     tags: list[str] = Field(default=[], sa_column=Column(JSON))
-    
+
+    # Deduplication: a snippet the user already has is counted, not stored again
+    content_hash: str | None = Field(
+        default=None,
+        max_length=64,
+        description="Hash of the code ignoring formatting and comments",
+    )
+    occurrence_count: int = Field(default=1)
+    last_seen_at: datetime | None = Field(default=None)
+    # Cleared if that conversation is deleted; the block stays
+    last_seen_conversation_id: uuid.UUID | None = Field(
+        default=None,
+        foreign_key="conversation.id",
+        ondelete="SET NULL",
+        index=True,
+    )
+
     # Versioning support
     version: int = Field(default=1)
     parent_version_id: uuid.UUID | None = Field(
-        default=None, 
+        default=None,
         foreign_key="codeblock.id",
-        description="Reference to parent version for version tracking"
+        description="Reference to parent version for version tracking",
     )
-    
+
     # Relationships
     user: "User" = Relationship(back_populates="code_blocks")
-    conversation: "Conversation" = Relationship(back_populates="code_blocks")
+    # The conversation the block was first saved in
+    conversation: "Conversation" = Relationship(
+        back_populates="code_blocks",
+        sa_relationship_kwargs={"foreign_keys": "[CodeBlock.conversation_id]"},
+    )
 
 
 class CodeBlockPublic(CodeBlockBase):
     """Properties to return via API."""
+
     id: uuid.UUID
     conversation_id: uuid.UUID
     user_id: uuid.UUID
@@ -71,22 +107,27 @@ class CodeBlockPublic(CodeBlockBase):
     functions_defined: list[str]
     variables_created: list[str]
     tags: list[str]
+    occurrence_count: int = 1
+    last_seen_at: datetime | None = None
+    last_seen_conversation_id: uuid.UUID | None = None
     version: int
     parent_version_id: uuid.UUID | None
 
 
 class CodeBlocksPublic(SQLModel):
     """List of code blocks to return via API."""
+
     data: list[CodeBlockPublic]
     count: int
 
 
 class CodeBlockSearch(SQLModel):
     """Search parameters for code blocks."""
+
     query: str | None = None
     tags: list[str] | None = None
     language: str | None = None
     has_imports: list[str] | None = None
     has_functions: list[str] | None = None
     executed_successfully: bool | None = None
-    conversation_id: uuid.UUID | None = None
\ No newline at end of file
+    conversation_id: uuid.UUID | None = None
@@ -0,0 +1,30 @@
+"""CompletionCache model for replaying deterministic LLM responses."""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, Text
+from sqlmodel import Field, SQLModel
+
+
+class CompletionCache(SQLModel, table=True):
+    """Database model for the persistent tier of the completion cache."""
+
+    key: str = Field(
+        primary_key=True,
+        max_length=64,
+        description="SHA-256 of the user, normalized messages and LLM config",
+    )
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id",
+        nullable=False,
+        ondelete="CASCADE",
+        index=True,
+    )
+    provider: str = Field(max_length=20)
+    model: str = Field(max_length=100)
+    content: str = Field(sa_column=Column(Text, nullable=False))
+    size_bytes: int = Field(default=0)
+    hit_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_used_at: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -1,49 +1,73 @@
 """Conversation model for Red Panda."""
+
 import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import Column, Text
+from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
-    from app.models.user import User
-    from app.models.message import Message
     from app.models.code_block import CodeBlock
+    from app.models.message import Message
+    from app.models.user import User
 
 
 class ConversationBase(SQLModel):
     """Base conversation model with shared properties."""
+
     title: str = Field(max_length=255)
     last_message_preview: str | None = Field(default=None, max_length=500)
 
 
 class ConversationCreate(ConversationBase):
     """Properties to receive on conversation creation."""
+
     pass
 
 
 class ConversationUpdate(ConversationBase):
     """Properties to receive on conversation update."""
+
     title: str | None = Field(default=None, max_length=255)  # type: ignore
     last_message_preview: str | None = Field(default=None, max_length=500)
 
 
 class Conversation(ConversationBase, table=True):
     """Database model for conversations."""
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    user_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, ondelete="CASCADE")
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     message_count: int = Field(default=0)
-    
+    # Estimated tokens of all messages, kept up to date with message_count
+    token_count: int = Field(default=0)
+
+    # Rolling summary of older messages, sent instead of the full history
+    summary: str | None = Field(default=None, sa_column=Column(Text, nullable=True))
+    summary_message_count: int = Field(
+        default=0, description="Messages covered by the summary"
+    )
+    summary_through: datetime | None = Field(
+        default=None,
+        description="Creation time of the newest message covered by the summary",
+    )
+
     # Relationships
     user: "User" = Relationship(back_populates="conversations")
     messages: list["Message"] = Relationship(back_populates="conversation")
-    code_blocks: list["CodeBlock"] = Relationship(back_populates="conversation")
+    code_blocks: list["CodeBlock"] = Relationship(
+        back_populates="conversation",
+        sa_relationship_kwargs={"foreign_keys": "[CodeBlock.conversation_id]"},
+    )
 
 
 class ConversationPublic(ConversationBase):
     """Properties to return via API."""
+
     id: uuid.UUID
     user_id: uuid.UUID
     created_at: datetime
@@ -53,5 +77,6 @@ class ConversationPublic(ConversationBase):
 
 class ConversationsPublic(SQLModel):
     """List of conversations to return via API."""
+
     data: list[ConversationPublic]
-    count: int
\ No newline at end of file
+    count: int
@@ -1,11 +1,12 @@
 """Message model for Red Panda chat conversations."""
+
 import uuid
 from datetime import datetime
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, JSON
-from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import JSON, Column
+from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
     from app.models.conversation import Conversation
@@ -13,6 +14,7 @@ if TYPE_CHECKING:
 
 class MessageRole(str, Enum):
     """Role of the message sender."""
+
     USER = "user"
     ASSISTANT = "assistant"
     SYSTEM = "system"
@@ -20,52 +22,63 @@ class MessageRole(str, Enum):
 
 class MessageBase(SQLModel):
     """Base message model with shared properties."""
+
     role: MessageRole = Field(description="Role of the message sender")
     content: str = Field(description="Message content")
 
 
 class MessageCreate(MessageBase):
     """Properties to receive on message creation."""
+
     conversation_id: uuid.UUID
     code_block_ids: list[uuid.UUID] = Field(default=[], sa_column=Column(JSON))
 
 
 class MessageUpdate(SQLModel):
     """Properties to receive on message update."""
+
     content: str | None = None
     code_block_ids: list[uuid.UUID] | None = None
 
 
 class Message(MessageBase, table=True):
     """Database model for chat messages."""
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     conversation_id: uuid.UUID = Field(
-        foreign_key="conversation.id", 
-        nullable=False,
-        ondelete="CASCADE"
+        foreign_key="conversation.id", nullable=False, ondelete="CASCADE"
     )
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    
+
+    # Cached prompt size estimate used when assembling the context window
+    token_count: int | None = Field(default=None)
+
+    # Set when generation stopped early (e.g. the client disconnected)
+    is_truncated: bool = Field(default=False)
+
     # References to code blocks extracted from this message
     code_block_ids: list[uuid.UUID] = Field(
-        default=[], 
+        default=[],
         sa_column=Column(JSON),
-        description="IDs of code blocks extracted from this message"
+        description="IDs of code blocks extracted from this message",
     )
-    
+
     # Relationships
     conversation: "Conversation" = Relationship(back_populates="messages")
 
 
 class MessagePublic(MessageBase):
     """Properties to return via API."""
+
     id: uuid.UUID
     conversation_id: uuid.UUID
     created_at: datetime
     code_block_ids: list[uuid.UUID]
+    is_truncated: bool = False
 
 
 class MessagesPublic(SQLModel):
     """List of messages to return via API."""
+
     data: list[MessagePublic]
-    count: int
\ No newline at end of file
+    count: int
@@ -0,0 +1,29 @@
+"""Outbox of assistant replies still waiting for post-processing."""
+
+import uuid
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class ReplyOutbox(SQLModel, table=True):
+    """A saved reply whose code blocks have not been extracted yet.
+
+    Written in the same transaction as the message and deleted once its
+    code blocks are stored, so a reply is never lost between the two even
+    if the worker restarts.
+    """
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    message_id: uuid.UUID = Field(
+        foreign_key="message.id", nullable=False, ondelete="CASCADE"
+    )
+    conversation_id: uuid.UUID = Field(nullable=False)
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set by the worker processing the job; an old value means it died
+    claimed_at: datetime | None = Field(default=None, index=True)
+    attempts: int = Field(default=0)
+    last_error: str | None = Field(default=None, max_length=500)
@@ -0,0 +1,59 @@
+"""Usage ledger models for LLM token accounting."""
+
+import uuid
+from datetime import date, datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class UsageEvent(SQLModel, table=True):
+    """Append-only record of a single LLM request."""
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    conversation_id: uuid.UUID | None = Field(default=None)
+    provider: str = Field(max_length=20)
+    model: str = Field(max_length=100)
+    input_tokens: int = Field(default=0)
+    output_tokens: int = Field(default=0)
+    cached_input_tokens: int = Field(default=0)
+    cache_write_input_tokens: int = Field(default=0)
+    prompt_tokens_saved: int = Field(
+        default=0, description="Tokens saved by context packing and summaries"
+    )
+    latency_ms: int = Field(default=0)
+    time_to_first_token_ms: int | None = Field(default=None)
+    from_cache: bool = Field(
+        default=False, description="Served from the completion cache"
+    )
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class UsageDaily(SQLModel, table=True):
+    """Per-user, per-day, per-model rollup of usage events."""
+
+    user_id: uuid.UUID = Field(
+        foreign_key="user.id", primary_key=True, ondelete="CASCADE"
+    )
+    day: date = Field(primary_key=True)
+    provider: str = Field(primary_key=True, max_length=20)
+    model: str = Field(primary_key=True, max_length=100)
+    request_count: int = Field(default=0)
+    input_tokens: int = Field(default=0)
+    output_tokens: int = Field(default=0)
+    cached_input_tokens: int = Field(default=0)
+    latency_ms_total: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ProviderUsage(SQLModel):
+    """Aggregated usage for one provider."""
+
+    total_tokens: int = 0
+    total_requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    average_latency_ms: float = 0.0
@@ -1,10 +1,16 @@
 """User model for authentication and API key management."""
+
 import uuid
-from typing import Optional
+from typing import TYPE_CHECKING, Any
 
 from pydantic import EmailStr
-from sqlalchemy import Column, JSON
-from sqlmodel import Field, SQLModel, Relationship
+from sqlalchemy import JSON, Column
+from sqlmodel import Field, Relationship, SQLModel
+
+if TYPE_CHECKING:
+    from app.models.code_block import CodeBlock
+    from app.models.conversation import Conversation
+    from app.models.file import File
 
 
 # Shared properties
@@ -46,19 +52,22 @@ class UpdatePassword(SQLModel):
 class User(UserBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
-    
+
     # BYOK (Bring Your Own Key) fields for LLM API access
-    api_keys: dict = Field(
-        default={}, 
+    api_keys: dict[str, Any] = Field(
+        default={},
         sa_column=Column(JSON),
-        description="Encrypted API keys for LLM providers"
+        description="Encrypted API keys for LLM providers",
     )
-    api_usage: dict = Field(
-        default={}, 
-        sa_column=Column(JSON),
-        description="Usage tracking for API calls"
+    api_usage: dict[str, Any] = Field(
+        default={}, sa_column=Column(JSON), description="Usage tracking for API calls"
+    )
+    custom_tags: list[str] = Field(
+        default=[],
+        sa_column=Column(JSON, nullable=False, server_default="[]"),
+        description="Extra terms tagged in this user's code blocks",
     )
-    
+
     # Relationships - forward references
     conversations: list["Conversation"] = Relationship(back_populates="user")
     code_blocks: list["CodeBlock"] = Relationship(back_populates="user")
@@ -92,4 +101,4 @@ class NewPassword(SQLModel):
 
 # Generic message for auth responses
 class AuthMessage(SQLModel):
-    message: str
\ No newline at end of file
+    message: str
@@ -0,0 +1,314 @@
+"""Single-flight execution of duplicate chat requests."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import (
+    Any,
+)
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.sse_framer import encode_event
+
+logger = logging.getLogger(__name__)
+
+# SSE comment line; ignored by EventSource clients
+HEARTBEAT_FRAME = ": ping\n\n"
+
+
+class StreamBroadcast:
+    """Events of one running stream, shared by any number of subscribers.
+
+    Every published event is encoded once as an SSE frame with a sequential
+    ``id:`` and kept in a bounded ring of recent frames. A subscriber may
+    start from any id (``Last-Event-ID`` after a reconnect, or from the
+    beginning for a second tab). If the frames it needs have already left
+    the ring, it first gets a ``snapshot`` event with the text up to the
+    oldest frame still buffered, which replaces whatever content the client
+    has, and the replay continues from there.
+
+    ``max_frames`` bounds the ring, not the stream's memory: the full text
+    of the reply is kept as well, to build snapshots from, so a stream
+    holds up to one reply (at most ``max_tokens`` of output) plus the ring.
+
+    When the last subscriber leaves before the stream is done, the producer
+    task keeps running for ``grace`` seconds so the client can reconnect,
+    and is cancelled afterwards so the provider stops generating.
+    """
+
+    def __init__(
+        self,
+        user_id: uuid.UUID | None = None,
+        message_id: uuid.UUID | None = None,
+        max_frames: int = settings.STREAM_BUFFER_MAX_FRAMES,
+        grace: float = settings.STREAM_RESUME_GRACE_SECONDS,
+    ):
+        self.user_id = user_id
+        self.message_id = message_id
+        # (frame, length of the content published before it)
+        self.frames: deque[tuple[str, int]] = deque(maxlen=max_frames)
+        # Id of the next frame; frames[0] has id next_id - len(frames)
+        self.next_id = 0
+        self.content: list[str] = []
+        self.content_length = 0
+        self.grace = grace
+        self.done = False
+        # Set by the producer when the stream ended with an error event
+        self.failed = False
+        self.subscribers = 0
+        self.task: asyncio.Task[None] | None = None
+        self._changed = asyncio.Event()
+        self._abandon_timer: asyncio.TimerHandle | None = None
+
+    @property
+    def first_id(self) -> int:
+        return self.next_id - len(self.frames)
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def publish(self, event: dict[str, Any]) -> None:
+        self.frames.append(
+            (encode_event(event, event_id=self.next_id), self.content_length)
+        )
+        if event.get("type") == "content":
+            self.content.append(event["content"])
+            self.content_length += len(event["content"])
+        self.next_id += 1
+        self._notify()
+
+    def close(self) -> None:
+        self.done = True
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+        self._notify()
+
+    def snapshot(self) -> str:
+        """Frame standing in for every frame that has left the ring."""
+        content_before_ring = self.frames[0][1] if self.frames else self.content_length
+        return encode_event(
+            {
+                "type": "snapshot",
+                "message_id": str(self.message_id),
+                "content": "".join(self.content)[:content_before_ring],
+            },
+            event_id=self.first_id - 1,
+        )
+
+    async def subscribe(
+        self,
+        last_event_id: int | None = None,
+        heartbeat: float | None = None,
+    ) -> AsyncGenerator[str, None]:
+        """Yield frames after ``last_event_id`` (all of them if None), then
+        new ones until the stream is closed.
+
+        With ``heartbeat`` set, an SSE comment is sent whenever nothing was
+        published for that many seconds. The write fails once the client
+        is gone, which is how dead connections behind a proxy are noticed.
+        """
+        self.subscribers += 1
+        if self._abandon_timer is not None:
+            self._abandon_timer.cancel()
+            self._abandon_timer = None
+        try:
+            sent = 0 if last_event_id is None else last_event_id + 1
+            while True:
+                changed = self._changed
+                while sent < self.next_id:
+                    # Checked before every frame: publishing while this
+                    # reader is suspended in a yield can evict frames
+                    if sent < self.first_id:
+                        # Fell behind the ring (late reconnect or slow reader)
+                        yield self.snapshot()
+                        sent = self.first_id
+                        continue
+                    yield self.frames[sent - self.first_id][0]
+                    sent += 1
+                if self.done:
+                    return
+                if heartbeat is None:
+                    await changed.wait()
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT_FRAME
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task is not None:
+                self._abandon_timer = asyncio.get_running_loop().call_later(
+                    self.grace, self._cancel_if_abandoned
+                )
+
+    def _cancel_if_abandoned(self) -> None:
+        self._abandon_timer = None
+        if self.subscribers == 0 and not self.done and self.task is not None:
+            logger.info(
+                f"No client reconnected to stream {self.message_id}, cancelling generation"
+            )
+            self.task.cancel()
+
+
+class ChatCoalescer:
+    """Run identical in-flight chat requests once and share the result.
+
+    Requests are identified by the user and the full request body, or by
+    the user and the client's idempotency key when one is sent. While a
+    request runs, duplicates attach to it instead of calling the provider
+    (and saving the user message) again. Results of requests that carried
+    an idempotency key are kept for ``CHAT_IDEMPOTENCY_TTL_SECONDS`` so a
+    retried POST gets the original answer.
+
+    Streams are also indexed by their assistant message id so clients can
+    resume them; finished streams stay resumable for
+    ``STREAM_RESUME_TTL_SECONDS``.
+    """
+
+    def __init__(self) -> None:
+        self.streams: dict[str, StreamBroadcast] = {}
+        self.by_message: dict[uuid.UUID, StreamBroadcast] = {}
+        self.finished: TTLCache[uuid.UUID, StreamBroadcast] = TTLCache(
+            settings.STREAM_RESUME_MAX_FINISHED,
+            ttl=settings.STREAM_RESUME_TTL_SECONDS,
+        )
+        self.completions: dict[str, asyncio.Future[Any]] = {}
+        self.completed: TTLCache[str, Any] = TTLCache(
+            settings.CHAT_IDEMPOTENCY_MAX_ENTRIES,
+            ttl=settings.CHAT_IDEMPOTENCY_TTL_SECONDS,
+        )
+        self.coalesced = 0
+        self.replayed = 0
+        self.resumed = 0
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        user_id: uuid.UUID,
+        body: dict[str, Any],
+        idempotency_key: str | None = None,
+    ) -> str:
+        """Key for a request of ``kind`` ("stream" or "complete")."""
+        if idempotency_key:
+            return f"{kind}:{user_id}:idem:{idempotency_key}"
+        encoded = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{kind}:{user_id}:{hashlib.sha256(encoded.encode()).hexdigest()}"
+
+    def find_stream(self, key: str) -> StreamBroadcast | None:
+        """A running stream, or a remembered finished one, for ``key``."""
+        broadcast = self.streams.get(key)
+        if broadcast is not None:
+            self.coalesced += 1
+            return broadcast
+
+        broadcast = self.completed.get(key)
+        if broadcast is not None:
+            self.replayed += 1
+        return broadcast
+
+    def find_by_message(
+        self, message_id: uuid.UUID, user_id: uuid.UUID
+    ) -> StreamBroadcast | None:
+        """The user's running or recently finished stream for a message."""
+        broadcast = self.by_message.get(message_id) or self.finished.get(message_id)
+        if broadcast is None or broadcast.user_id != user_id:
+            return None
+        self.resumed += 1
+        return broadcast
+
+    def start_stream(
+        self,
+        key: str,
+        produce: Callable[[StreamBroadcast], Awaitable[None]],
+        *,
+        user_id: uuid.UUID,
+        message_id: uuid.UUID,
+        remember: bool = False,
+    ) -> StreamBroadcast:
+        """Run ``produce`` in its own task, publishing into a new broadcast.
+
+        The producer does not depend on any one client staying connected.
+        """
+        broadcast = StreamBroadcast(user_id=user_id, message_id=message_id)
+        self.streams[key] = broadcast
+        self.by_message[message_id] = broadcast
+
+        async def run() -> None:
+            try:
+                await produce(broadcast)
+            except asyncio.CancelledError:
+                # Abandoned by every client; a partial answer is never replayed
+                broadcast.failed = True
+                raise
+            except Exception as e:
+                logger.exception(f"Chat stream producer failed: {e}")
+                broadcast.failed = True
+            finally:
+                broadcast.close()
+                self.streams.pop(key, None)
+                self.by_message.pop(message_id, None)
+                self.finished.set(message_id, broadcast)
+                if remember and not broadcast.failed:
+                    self.completed.set(key, broadcast)
+
+        broadcast.task = asyncio.create_task(run())
+        return broadcast
+
+    async def run_once(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        remember: bool = False,
+    ) -> Any:
+        """Await ``factory()``, sharing its result with concurrent duplicates."""
+        if remember:
+            result = self.completed.get(key)
+            if result is not None:
+                self.replayed += 1
+                return result
+
+        future = self.completions.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.completions[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if remember:
+                self.completed.set(key, result)
+            return result
+        finally:
+            self.completions.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "streams_in_flight": len(self.streams),
+            "streams_resumable": len(self.by_message) + len(self.finished),
+            "completions_in_flight": len(self.completions),
+            "remembered": len(self.completed),
+            "coalesced": self.coalesced,
+            "replayed": self.replayed,
+            "resumed": self.resumed,
+        }
+
+
+# Global instance
+chat_coalescer = ChatCoalescer()
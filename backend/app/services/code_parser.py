@@ -1,135 +1,412 @@
 """Service for parsing and extracting code from LLM responses."""
-import re
+
 import ast
-from typing import List, Dict, Any, Optional
+import asyncio
+import hashlib
 import logging
+import re
+import threading
+from typing import Any, NamedTuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.services.parse_pool import parse_pool
+from app.services.tag_vocabulary import DEFAULT_TAGS
 
 logger = logging.getLogger(__name__)
 
 
-class CodeParser:
-    """Parse and extract code blocks from text."""
-    
+class ParsedPython(NamedTuple):
+    """What one parse of a Python block yields; sent back by pool workers."""
+
+    metadata: dict[str, list[str]]
+    docstring: str | None
+    content_hash: str | None
+
+
+class BlockAnalysis(NamedTuple):
+    """Cached result of analyzing a code block.
+
+    ``content_hash`` is None until the block is analyzed for storing.
+    """
+
+    metadata: dict[str, list[str]]
+    description: str
+    content_hash: str | None
+
+
+class MetadataVisitor(ast.NodeVisitor):
+    """Collect imports and defined names of Python code in one pass.
+
+    Only statements are visited: imports, definitions and assignments
+    are all statements, and statements never nest inside expressions,
+    which make up most of the tree.
+    """
+
+    # Fields that hold the nested statements of compound statements
+    BODIES = frozenset({"body", "orelse", "finalbody", "handlers", "cases"})
+
+    def __init__(self) -> None:
+        self.imports: list[str] = []
+        self.functions: list[str] = []
+        self.classes: list[str] = []
+        self.variables: list[str] = []
+
+    def visit_Import(self, node: ast.Import) -> None:
+        self.imports.extend(alias.name for alias in node.names)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = node.module or ""
+        for alias in node.names:
+            self.imports.append(f"{module}.{alias.name}" if module else alias.name)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        self.functions.append(node.name)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.classes.append(node.name)
+        self.generic_visit(node)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.variables.append(target.id)
+
+    def generic_visit(self, node: ast.AST) -> None:
+        for field, value in ast.iter_fields(node):
+            if field in self.BODIES:
+                for child in value:
+                    self.visit(child)
+
+    def metadata(self) -> dict[str, list[str]]:
+        # Remove duplicates, keeping the order of appearance
+        return {
+            "imports": list(dict.fromkeys(self.imports)),
+            "functions": list(dict.fromkeys(self.functions)),
+            "classes": list(dict.fromkeys(self.classes)),
+            "variables": list(dict.fromkeys(self.variables)),
+        }
+
+
+class TagMatcher:
+    """Find vocabulary terms in text with one compiled regex.
+
+    The terms are merged into a trie-shaped alternation, so the regex
+    tries one branch per character instead of every term at every
+    position and tagging stays linear in the text length as the
+    vocabulary grows. Terms only match as whole words.
+    """
+
+    def __init__(self, terms: tuple[str, ...]):
+        self.terms = tuple(
+            dict.fromkeys(
+                term for term in (self.normalize(term) for term in terms) if term
+            )
+        )
+        trie: dict[str, Any] = {}
+        for term in self.terms:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self.pattern = (
+            re.compile(r"(?<!\w)" + self.trie_pattern(trie) + r"(?!\w)", re.IGNORECASE)
+            if self.terms
+            else None
+        )
+
     @staticmethod
-    def extract_code_blocks(text: str) -> List[Dict[str, Any]]:
+    def normalize(term: str) -> str:
+        return " ".join(term.lower().split())
+
+    @classmethod
+    def trie_pattern(cls, node: dict[str, Any]) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + cls.trie_pattern(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        group = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A term ends here; the longer terms through this node are optional
+            return (
+                group + "?"
+                if len(branches) == 1 and len(branches[0]) == 1
+                else f"(?:{group})?"
+            )
+        return group
+
+    def find(self, text: str) -> list[str]:
+        """Matched terms, most frequent first."""
+        if self.pattern is None:
+            return []
+        counts: dict[str, int] = {}
+        for match in self.pattern.finditer(text):
+            term = self.normalize(match.group(0))
+            counts[term] = counts.get(term, 0) + 1
+        # Ties keep the order of first appearance
+        return sorted(counts, key=lambda term: -counts[term])
+
+
+class CodeParser:
+    """Parse and extract code blocks from text.
+
+    The metadata, description and content hash of a block are computed
+    in a single parse and cached by a hash of the code, so the same block
+    seen in the reply pipeline or in a regenerated answer is parsed once.
+    The content hash, which costs about as much as the parse itself, is
+    only computed with ``with_hash``, i.e. for blocks about to be stored;
+    blocks announced while streaming are parsed without it.
+    """
+
+    def __init__(self, cache_size: int = settings.CODE_PARSER_CACHE_MAX_ENTRIES):
+        self.cache: TTLCache[str, BlockAnalysis] = TTLCache(maxsize=cache_size)
+        self.default_tags = TagMatcher(DEFAULT_TAGS + tuple(settings.CODE_TAGS_EXTRA))
+        # Compiled matchers by set of custom tags, shared by users with the same set
+        self.user_tags: TTLCache[tuple[str, ...], TagMatcher] = TTLCache(
+            maxsize=settings.CODE_TAGS_MATCHER_CACHE_SIZE
+        )
+        # Blocks are parsed from worker threads
+        self._lock = threading.Lock()
+
+    def extract_code_blocks(self, text: str) -> list[dict[str, Any]]:
         """Extract all code blocks from text with their metadata."""
-        code_blocks = []
-        
-        # Pattern to match code blocks with optional language
-        # Matches ```language\ncode\n``` or ```\ncode\n```
-        pattern = r'```(?:(\w+))?\n(.*?)```'
-        matches = re.finditer(pattern, text, re.DOTALL)
-        
-        for match in matches:
-            language = match.group(1) or "python"  # Default to Python
-            code = match.group(2).strip()
-            
-            if code:
-                metadata = CodeParser.extract_python_metadata(code) if language == "python" else {}
-                
-                code_block = {
-                    "language": language,
-                    "code": code,
-                    "metadata": metadata,
-                    "description": CodeParser.generate_description(code, language),
-                }
-                code_blocks.append(code_block)
-        
+        return [
+            self.build_block(code, language)
+            for code, language in self.find_blocks(text)
+        ]
+
+    async def extract_code_blocks_async(self, text: str) -> list[dict[str, Any]]:
+        """Async variant of ``extract_code_blocks``."""
+        return [
+            await self.build_block_async(code, language)
+            for code, language in self.find_blocks(text)
+        ]
+
+    @staticmethod
+    def find_blocks(text: str) -> list[tuple[str, str]]:
+        """Code and language of every block in text.
+
+        Fenced blocks are found by ``IncrementalFenceParser``, so a reply
+        yields the same blocks in the same order whether it is parsed
+        whole or while it streams.
+        """
+        fences = IncrementalFenceParser(keep_prose=True)
+        blocks = [
+            (block["code"], block["language"])
+            for block in fences.feed(text) + fences.finish()
+        ]
+
         # Also look for inline code that might be substantial
         # Pattern for code between single backticks that's multi-line or > 50 chars
-        inline_pattern = r'`([^`]{50,})`'
-        inline_matches = re.finditer(inline_pattern, text)
-        
+        # Only the text outside fenced blocks is searched
+        inline_pattern = r"`([^`]{50,})`"
+        inline_matches = re.finditer(inline_pattern, fences.prose())
+
         for match in inline_matches:
             code = match.group(1).strip()
-            if '\n' in code or len(code) > 100:
-                code_blocks.append({
-                    "language": "python",
-                    "code": code,
-                    "metadata": CodeParser.extract_python_metadata(code),
-                    "description": CodeParser.generate_description(code, "python"),
-                })
-        
-        return code_blocks
-    
+            if "\n" in code or len(code) > 100:
+                blocks.append((code, "python"))
+
+        return blocks
+
+    def build_block(
+        self, code: str, language: str, with_hash: bool = True
+    ) -> dict[str, Any]:
+        """Describe one code block."""
+        return self.block(code, language, self.analyze(code, language, with_hash))
+
+    async def build_block_async(
+        self, code: str, language: str, with_hash: bool = True
+    ) -> dict[str, Any]:
+        """Async variant of ``build_block``."""
+        return self.block(
+            code, language, await self.analyze_async(code, language, with_hash)
+        )
+
     @staticmethod
-    def extract_python_metadata(code: str) -> Dict[str, List[str]]:
-        """Extract metadata from Python code."""
-        metadata = {
-            "imports": [],
-            "functions": [],
-            "classes": [],
-            "variables": [],
+    def block(code: str, language: str, analysis: BlockAnalysis) -> dict[str, Any]:
+        return {
+            "language": language,
+            "code": code,
+            "metadata": analysis.metadata,
+            "description": analysis.description,
+            "content_hash": analysis.content_hash,
         }
-        
+
+    def analyze(
+        self, code: str, language: str, with_hash: bool = True
+    ) -> BlockAnalysis:
+        """Metadata, description and content hash of a block, cached by code hash."""
+        key = self.cache_key(code, language)
+        cached = self.cached(key)
+        if cached is None or self.stale(cached, with_hash):
+            parsed = (
+                self.parse_python(code, with_hash) if language == "python" else None
+            )
+            cached = self.store(key, code, language, parsed, with_hash)
+        return self.copy(cached)
+
+    async def analyze_async(
+        self, code: str, language: str, with_hash: bool = True
+    ) -> BlockAnalysis:
+        """Async variant of ``analyze`` that never parses on the event loop.
+
+        Python blocks of ``PARSE_POOL_MIN_CHARS`` or more go to the process
+        pool, falling back to the regex scan if it is busy or too slow;
+        smaller ones are parsed in a thread.
+        """
+        key = self.cache_key(code, language)
+        cached = self.cached(key)
+        if cached is None or self.stale(cached, with_hash):
+            parsed = None
+            if language == "python" and len(code) >= settings.PARSE_POOL_MIN_CHARS:
+                parsed = await parse_pool.run(
+                    CodeParser.parse_python,
+                    CodeParser.scan_python_fallback,
+                    code,
+                    with_hash,
+                )
+            elif language == "python":
+                parsed = await asyncio.to_thread(self.parse_python, code, with_hash)
+            cached = self.store(key, code, language, parsed, with_hash)
+        return self.copy(cached)
+
+    @staticmethod
+    def stale(cached: BlockAnalysis, with_hash: bool) -> bool:
+        # An entry from a streamed block has no content hash yet
+        return with_hash and cached.content_hash is None
+
+    @staticmethod
+    def cache_key(code: str, language: str) -> str:
+        return hashlib.sha256(f"{language}\n{code}".encode()).hexdigest()
+
+    def cached(self, key: str) -> BlockAnalysis | None:
+        with self._lock:
+            return self.cache.get(key)
+
+    def store(
+        self,
+        key: str,
+        code: str,
+        language: str,
+        parsed: ParsedPython | None,
+        with_hash: bool = True,
+    ) -> BlockAnalysis:
+        if parsed is None:
+            content_hash = self.content_hash(code, language) if with_hash else None
+            parsed = ParsedPython({}, None, content_hash)
+        entry = BlockAnalysis(
+            parsed.metadata,
+            self.describe(code, language, parsed.metadata, parsed.docstring),
+            parsed.content_hash,
+        )
+        with self._lock:
+            self.cache.set(key, entry)
+        return entry
+
+    @staticmethod
+    def copy(entry: BlockAnalysis) -> BlockAnalysis:
+        # Callers get their own lists; the cached ones are shared
+        metadata = {kind: list(names) for kind, names in entry.metadata.items()}
+        return entry._replace(metadata=metadata)
+
+    @staticmethod
+    def content_hash(code: str, language: str, tree: ast.AST | None = None) -> str:
+        """Hash of the code that ignores formatting and comments.
+
+        Python that parses is hashed as ``ast.unparse`` prints it. Other
+        code ignores whitespace, and lines that only hold a comment.
+        """
+        if tree is not None:
+            normalized = ast.unparse(tree)
+        else:
+            comment = "#" if language == "python" else None
+            normalized = "\n".join(
+                " ".join(line.split())
+                for line in code.split("\n")
+                if line.strip() and not (comment and line.strip().startswith(comment))
+            )
+        return hashlib.sha256(f"{language}\n{normalized}".encode()).hexdigest()
+
+    @staticmethod
+    def parse_python(code: str, with_hash: bool = True) -> ParsedPython:
+        """Metadata, module docstring and content hash of Python code, from one parse."""
         try:
             tree = ast.parse(code)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        metadata["imports"].append(alias.name)
-                
-                elif isinstance(node, ast.ImportFrom):
-                    module = node.module or ""
-                    for alias in node.names:
-                        import_str = f"{module}.{alias.name}" if module else alias.name
-                        metadata["imports"].append(import_str)
-                
-                elif isinstance(node, ast.FunctionDef):
-                    metadata["functions"].append(node.name)
-                
-                elif isinstance(node, ast.ClassDef):
-                    metadata["classes"].append(node.name)
-                
-                elif isinstance(node, ast.Assign):
-                    for target in node.targets:
-                        if isinstance(target, ast.Name):
-                            metadata["variables"].append(target.id)
-        
         except SyntaxError:
-            # If code doesn't parse, try to extract what we can with regex
-            # Extract imports
-            import_pattern = r'^(?:from\s+(\S+)\s+)?import\s+(.+)$'
-            for line in code.split('\n'):
-                match = re.match(import_pattern, line.strip())
-                if match:
-                    if match.group(1):  # from X import Y
-                        imports = match.group(2).split(',')
-                        for imp in imports:
-                            metadata["imports"].append(f"{match.group(1)}.{imp.strip()}")
-                    else:  # import X
-                        imports = match.group(2).split(',')
-                        metadata["imports"].extend([imp.strip() for imp in imports])
-            
-            # Extract function definitions
-            func_pattern = r'^def\s+(\w+)\s*\('
-            for line in code.split('\n'):
-                match = re.match(func_pattern, line.strip())
-                if match:
-                    metadata["functions"].append(match.group(1))
-            
-            # Extract class definitions
-            class_pattern = r'^class\s+(\w+)'
-            for line in code.split('\n'):
-                match = re.match(class_pattern, line.strip())
-                if match:
-                    metadata["classes"].append(match.group(1))
-        
+            # If code doesn't parse, extract what we can with regex
+            return CodeParser.scan_python_fallback(code, with_hash)
         except Exception as e:
             logger.error(f"Failed to extract metadata: {e}")
-        
-        # Remove duplicates
-        for key in metadata:
-            metadata[key] = list(set(metadata[key]))
-        
-        return metadata
-    
+            content_hash = (
+                CodeParser.content_hash(code, "python") if with_hash else None
+            )
+            return ParsedPython(MetadataVisitor().metadata(), None, content_hash)
+
+        visitor = MetadataVisitor()
+        visitor.visit(tree)
+        content_hash = (
+            CodeParser.content_hash(code, "python", tree) if with_hash else None
+        )
+        return ParsedPython(visitor.metadata(), ast.get_docstring(tree), content_hash)
+
     @staticmethod
-    def generate_description(code: str, language: str) -> str:
-        """Generate a description of what the code does."""
-        lines = code.split('\n')
-        
+    def extract_python_metadata(code: str) -> dict[str, list[str]]:
+        """Extract metadata from Python code."""
+        return CodeParser.parse_python(code).metadata
+
+    @staticmethod
+    def scan_python_fallback(code: str, with_hash: bool = True) -> ParsedPython:
+        """``parse_python`` without the parse, for code that doesn't parse or takes too long."""
+        content_hash = CodeParser.content_hash(code, "python") if with_hash else None
+        return ParsedPython(CodeParser.scan_python(code), None, content_hash)
+
+    @staticmethod
+    def scan_python(code: str) -> dict[str, list[str]]:
+        """Line-based metadata for Python code that doesn't parse."""
+        visitor = MetadataVisitor()
+        import_pattern = r"^(?:from\s+(\S+)\s+)?import\s+(.+)$"
+        func_pattern = r"^def\s+(\w+)\s*\("
+        class_pattern = r"^class\s+(\w+)"
+
+        for line in code.split("\n"):
+            line = line.strip()
+            match = re.match(import_pattern, line)
+            if match:
+                imports = [imp.strip() for imp in match.group(2).split(",")]
+                if match.group(1):  # from X import Y
+                    visitor.imports.extend(f"{match.group(1)}.{imp}" for imp in imports)
+                else:  # import X
+                    visitor.imports.extend(imports)
+                continue
+
+            match = re.match(func_pattern, line)
+            if match:
+                visitor.functions.append(match.group(1))
+                continue
+
+            match = re.match(class_pattern, line)
+            if match:
+                visitor.classes.append(match.group(1))
+
+        return visitor.metadata()
+
+    @staticmethod
+    def describe(
+        code: str,
+        language: str,
+        metadata: dict[str, list[str]],
+        docstring: str | None = None,
+    ) -> str:
+        """Describe code from its leading comment, docstring or structure."""
+        lines = code.split("\n")
+
         # Look for docstrings or comments at the beginning
         for line in lines[:5]:  # Check first 5 lines
             line = line.strip()
@@ -139,83 +416,93 @@ class CodeParser:
                 match = re.match(docstring_pattern, line)
                 if match:
                     return match.group(1).strip()
-            elif line.startswith('#'):
+            elif line.startswith("#"):
                 return line[1:].strip()
-        
+
+        if docstring:
+            # First line of a multi-line docstring
+            return docstring.strip().split("\n")[0]
+
         # Try to generate description from code structure
         if language == "python":
-            metadata = CodeParser.extract_python_metadata(code)
-            
-            if metadata["functions"]:
+            if metadata.get("functions"):
                 func_list = ", ".join(metadata["functions"][:3])
                 return f"Defines functions: {func_list}"
-            elif metadata["classes"]:
+            elif metadata.get("classes"):
                 class_list = ", ".join(metadata["classes"][:3])
                 return f"Defines classes: {class_list}"
-            elif metadata["imports"]:
+            elif metadata.get("imports"):
                 return f"Imports and uses {', '.join(metadata['imports'][:3])}"
             elif len(lines) == 1:
                 return f"Single line: {lines[0][:100]}"
-        
+
         # Default description
         return f"{language.capitalize()} code block with {len(lines)} lines"
-    
-    @staticmethod
-    def extract_tags_from_text(text: str) -> List[str]:
+
+    def generate_description(self, code: str, language: str) -> str:
+        """Generate a description of what the code does."""
+        return self.analyze(code, language).description
+
+    def stats(self) -> dict[str, Any]:
+        return self.cache.stats()
+
+    def tag_matcher(self, custom_tags: list[str] | None = None) -> "TagMatcher":
+        """Matcher for the default vocabulary plus a user's own tags."""
+        if not custom_tags:
+            return self.default_tags
+        key = tuple(sorted({TagMatcher.normalize(tag) for tag in custom_tags} - {""}))
+        with self._lock:
+            matcher = self.user_tags.get(key)
+        if matcher is None:
+            matcher = TagMatcher(self.default_tags.terms + key)
+            with self._lock:
+                self.user_tags.set(key, matcher)
+        return matcher
+
+    def extract_tags_from_text(
+        self, text: str, custom_tags: list[str] | None = None
+    ) -> list[str]:
         """Extract potential tags from the surrounding text."""
-        tags = []
-        
-        # Common keywords that might indicate tags
-        keywords = [
-            "pandas", "numpy", "matplotlib", "seaborn", "sklearn",
-            "tensorflow", "pytorch", "data", "analysis", "visualization",
-            "machine learning", "deep learning", "api", "database",
-            "csv", "json", "file", "processing", "cleaning", "transformation",
-        ]
-        
-        text_lower = text.lower()
-        for keyword in keywords:
-            if keyword in text_lower:
-                tags.append(keyword)
-        
+        tags = self.tag_matcher(custom_tags).find(text)
+
         # Look for hashtag-style tags
-        hashtag_pattern = r'#(\w+)'
+        hashtag_pattern = r"#(\w+)"
         hashtags = re.findall(hashtag_pattern, text)
-        tags.extend(hashtags)
-        
-        return list(set(tags))[:10]  # Limit to 10 tags
-    
+        tags.extend(tag for tag in dict.fromkeys(hashtags) if tag not in tags)
+
+        return tags[: settings.CODE_TAGS_MAX_PER_MESSAGE]
+
     @staticmethod
-    def merge_code_blocks(blocks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    def merge_code_blocks(blocks: list[dict[str, Any]]) -> dict[str, Any] | None:
         """Merge multiple code blocks into one if they're related."""
         if not blocks:
             return None
-        
+
         if len(blocks) == 1:
             return blocks[0]
-        
+
         # Only merge if all blocks are the same language
-        languages = set(block["language"] for block in blocks)
+        languages = {block["language"] for block in blocks}
         if len(languages) > 1:
             return None
-        
+
         merged_code = "\n\n".join(block["code"] for block in blocks)
-        merged_metadata = {
+        merged_metadata: dict[str, list[str]] = {
             "imports": [],
             "functions": [],
             "classes": [],
             "variables": [],
         }
-        
+
         for block in blocks:
             for key in merged_metadata:
                 if key in block.get("metadata", {}):
                     merged_metadata[key].extend(block["metadata"][key])
-        
+
         # Remove duplicates
         for key in merged_metadata:
             merged_metadata[key] = list(set(merged_metadata[key]))
-        
+
         return {
             "language": blocks[0]["language"],
             "code": merged_code,
@@ -224,5 +511,84 @@ class CodeParser:
         }
 
 
+class IncrementalFenceParser:
+    """Find fenced code blocks in a reply while it is being streamed.
+
+    Chunks are fed as they arrive and split into lines; a fence opens on
+    a line starting with three backticks and closes on the next such
+    line, or on a code line ending in them. Each block is returned by the
+    ``feed`` call that completes it, so it is known long before the reply
+    ends. A fence that is never closed yields no block.
+
+    With ``keep_prose`` the lines outside fences are kept for ``prose``.
+    """
+
+    FENCE = "```"
+
+    def __init__(self, keep_prose: bool = False):
+        self.partial = ""
+        self.language = "python"
+        self.lines: list[str] = []
+        self.in_fence = False
+        self.prose_lines: list[str] | None = [] if keep_prose else None
+
+    def feed(self, chunk: str) -> list[dict[str, str]]:
+        """Consume a chunk; return the blocks it closed as language and code."""
+        text = self.partial + chunk
+        lines = text.split("\n")
+        # The last piece has no newline yet and may still grow
+        self.partial = lines.pop()
+        closed = []
+        for line in lines:
+            block = self.consume(line)
+            if block is not None:
+                closed.append(block)
+        return closed
+
+    def finish(self) -> list[dict[str, str]]:
+        """Consume the rest of the reply, e.g. a closing fence without a newline."""
+        line, self.partial = self.partial, ""
+        block = self.consume(line) if line else None
+        return [block] if block is not None else []
+
+    def prose(self) -> str:
+        """Text fed so far outside fenced blocks; needs ``keep_prose``."""
+        lines = self.prose_lines or []
+        return "\n".join(lines + self.lines if self.in_fence else lines)
+
+    def consume(self, line: str) -> dict[str, str] | None:
+        if (
+            self.in_fence
+            and not line.lstrip().startswith(self.FENCE)
+            and line.rstrip().endswith(self.FENCE)
+        ):
+            self.lines.append(line.rstrip()[: -len(self.FENCE)])
+            return self.close()
+
+        if not line.lstrip().startswith(self.FENCE):
+            if self.in_fence:
+                self.lines.append(line)
+            elif self.prose_lines is not None:
+                self.prose_lines.append(line)
+            return None
+
+        if not self.in_fence:
+            info = line.lstrip()[len(self.FENCE) :].strip().split()
+            self.language = info[0] if info else "python"  # Default to Python
+            self.lines = []
+            self.in_fence = True
+            return None
+
+        return self.close()
+
+    def close(self) -> dict[str, str] | None:
+        self.in_fence = False
+        code = "\n".join(self.lines).strip()
+        self.lines = []
+        if not code:
+            return None
+        return {"language": self.language, "code": code}
+
+
 # Global instance
-code_parser = CodeParser()
\ No newline at end of file
+code_parser = CodeParser()
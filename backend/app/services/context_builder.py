@@ -0,0 +1,186 @@
+"""Assemble the chat history sent to the LLM within a per-model token budget."""
+
+import logging
+from dataclasses import dataclass, field
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.crud_ops.message import get_recent_messages, get_recent_messages_async
+from app.models.conversation import Conversation
+from app.models.message import Message, MessageRole
+from app.services.llm_service import ChatMessage, LLMConfig
+from app.services.token_estimator import (
+    CHARS_PER_TOKEN,
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_tokens,
+    get_prompt_budget,
+)
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = "[Earlier part of this message omitted]\n"
+
+SUMMARY_PREFIX = "Summary of the earlier part of this conversation:\n"
+
+# Don't bother keeping a truncated message smaller than this
+MIN_TRUNCATED_TOKENS = 64
+
+
+@dataclass
+class ContextWindow:
+    """Messages selected for a request and how they were packed."""
+
+    messages: list[ChatMessage] = field(default_factory=list)
+    prompt_tokens: int = 0
+    budget: int = 0
+    dropped: int = 0
+    truncated: bool = False
+    summarized: bool = False
+    # Estimated tokens of the complete stored history, for comparison
+    history_tokens: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        """Prompt tokens saved compared to resending the whole history."""
+        return max(self.history_tokens - self.prompt_tokens, 0)
+
+
+def message_tokens(message: Message) -> int:
+    """Token estimate for a stored message, using the cached value when present."""
+    if message.token_count is not None:
+        return message.token_count
+    return estimate_tokens(message.content)
+
+
+def truncate_to_tokens(content: str, tokens: int) -> str:
+    """Keep the end of a message so that it fits into ``tokens``."""
+    max_chars = max(
+        (tokens - MESSAGE_OVERHEAD_TOKENS) * CHARS_PER_TOKEN - len(TRUNCATION_MARKER), 0
+    )
+    return TRUNCATION_MARKER + content[-max_chars:] if max_chars else TRUNCATION_MARKER
+
+
+class ContextBuilder:
+    """Pack the most recent turns of a conversation into the model's budget."""
+
+    def pack(self, history: list[Message], budget: int) -> ContextWindow:
+        """Select messages newest-first until the budget is used up.
+
+        The newest message (the user's current turn) is always kept, truncated
+        if it alone exceeds the budget. The oldest kept message may be
+        truncated to use the remaining budget; anything older is dropped.
+        """
+        window = ContextWindow(budget=budget)
+        selected: list[ChatMessage] = []
+        remaining = budget
+
+        for index, message in enumerate(reversed(history)):
+            tokens = message_tokens(message)
+            content = message.content
+
+            if tokens > remaining:
+                if index > 0 and remaining < MIN_TRUNCATED_TOKENS:
+                    window.dropped = len(history) - index
+                    break
+                content = truncate_to_tokens(content, remaining)
+                tokens = remaining
+                window.truncated = True
+
+            selected.append(ChatMessage(role=message.role, content=content))
+            remaining -= tokens
+
+            if remaining <= 0:
+                window.dropped = len(history) - index - 1
+                break
+
+        selected.reverse()
+
+        # Providers expect the conversation to open with a user turn
+        while len(selected) > 1 and selected[0].role == MessageRole.ASSISTANT.value:
+            remaining += estimate_tokens(selected.pop(0).content)
+            window.dropped += 1
+
+        window.messages = selected
+        window.prompt_tokens = budget - remaining
+        return window
+
+    def build(
+        self,
+        *,
+        session: Session,
+        conversation: Conversation,
+        config: LLMConfig,
+    ) -> ContextWindow:
+        """Fetch the messages not covered by the summary and pack them.
+
+        When the conversation has a rolling summary it is sent as a system
+        message, followed by the newest messages recorded after it.
+        """
+        history = get_recent_messages(
+            session=session,
+            conversation_id=conversation.id,
+            limit=settings.CHAT_HISTORY_FETCH_LIMIT,
+            after=conversation.summary_through if conversation.summary else None,
+        )
+        return self.assemble(conversation, config, history)
+
+    async def build_async(
+        self,
+        *,
+        session: AsyncSession,
+        conversation: Conversation,
+        config: LLMConfig,
+    ) -> ContextWindow:
+        """Async variant of ``build``."""
+        history = await get_recent_messages_async(
+            session=session,
+            conversation_id=conversation.id,
+            limit=settings.CHAT_HISTORY_FETCH_LIMIT,
+            after=conversation.summary_through if conversation.summary else None,
+        )
+        return self.assemble(conversation, config, history)
+
+    def assemble(
+        self,
+        conversation: Conversation,
+        config: LLMConfig,
+        history: list[Message],
+    ) -> ContextWindow:
+        """Pack fetched history and the summary into the model's budget."""
+        budget = get_prompt_budget(
+            config.model, config.max_tokens, settings.CHAT_CONTEXT_MAX_TOKENS
+        )
+
+        summary_message = None
+        summary_tokens = 0
+        if conversation.summary:
+            summary_message = ChatMessage(
+                role=MessageRole.SYSTEM.value,
+                content=SUMMARY_PREFIX + conversation.summary,
+            )
+            summary_tokens = estimate_tokens(summary_message.content)
+            # The summary must never crowd out the user's current turn
+            if summary_tokens > budget // 2:
+                summary_message = None
+                summary_tokens = 0
+
+        window = self.pack(history, budget - summary_tokens)
+        window.budget = budget
+        if summary_message:
+            window.messages.insert(0, summary_message)
+            window.prompt_tokens += summary_tokens
+            window.summarized = True
+
+        window.history_tokens = conversation.token_count
+        logger.info(
+            f"Context for conversation {conversation.id}: {len(window.messages)} messages, "
+            f"{window.prompt_tokens}/{budget} tokens, {window.tokens_saved} tokens saved "
+            f"of {window.history_tokens}"
+        )
+        return window
+
+
+# Global instance
+context_builder = ContextBuilder()
@@ -0,0 +1,113 @@
+"""Pool of reusable LLM provider clients backed by shared keep-alive transports."""
+
+import hashlib
+import logging
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+import httpx
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ClientT = TypeVar("ClientT")
+
+# (provider, sha256(api_key), base_url)
+PoolKey = tuple[str, str, str | None]
+
+
+def hash_api_key(api_key: str) -> str:
+    """Hash an API key so plaintext keys are never used as dictionary keys."""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class LLMClientPool:
+    """LRU + idle-TTL pool of provider SDK clients.
+
+    SDK clients are cheap wrappers around an ``httpx.AsyncClient``; the
+    expensive part is the connection pool (DNS, TCP and TLS handshakes). All
+    clients for the same (provider, base URL) therefore share one keep-alive
+    transport, and only the lightweight wrapper is cached per API key. Evicted
+    wrappers own no sockets and are simply dropped; the shared transports are
+    closed explicitly by ``aclose()`` on application shutdown.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.LLM_CLIENT_POOL_MAX_SIZE,
+        idle_ttl: float = settings.LLM_CLIENT_POOL_IDLE_TTL_SECONDS,
+    ):
+        self._clients: TTLCache[PoolKey, Any] = TTLCache(
+            max_size, ttl=idle_ttl, sliding=True, on_evict=self._on_evict
+        )
+        self._transports: dict[tuple[str, str | None], httpx.AsyncClient] = {}
+
+    def _on_evict(self, key: PoolKey, client: Any) -> None:
+        provider, _, base_url = key
+        logger.debug(
+            f"Evicted pooled {provider} client for {base_url or 'default endpoint'}"
+        )
+
+    def get_transport(
+        self, provider: str, base_url: str | None = None
+    ) -> httpx.AsyncClient:
+        """Return the shared keep-alive transport for a provider endpoint."""
+        transport_key = (provider, base_url)
+        transport = self._transports.get(transport_key)
+        if transport is None or transport.is_closed:
+            transport = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                # The SDKs pass their own per-request timeouts; this only
+                # bounds connection setup.
+                timeout=httpx.Timeout(600.0, connect=5.0),
+                follow_redirects=True,
+            )
+            self._transports[transport_key] = transport
+        return transport
+
+    def get_or_create(
+        self,
+        provider: str,
+        api_key: str,
+        base_url: str | None,
+        factory: Callable[[httpx.AsyncClient], ClientT],
+    ) -> ClientT:
+        """Return a pooled client, building it with ``factory`` on a miss."""
+        key: PoolKey = (provider, hash_api_key(api_key), base_url)
+        client = self._clients.get(key)
+        if client is None:
+            client = factory(self.get_transport(provider, base_url))
+            self._clients.set(key, client)
+        return client
+
+    def discard(self, provider: str, api_key: str, base_url: str | None = None) -> None:
+        """Forget the pooled client for a key (e.g. after it was replaced)."""
+        self._clients.pop((provider, hash_api_key(api_key), base_url))
+
+    def stats(self) -> dict[str, Any]:
+        """Pool counters for the metrics endpoint."""
+        return {
+            **self._clients.stats(),
+            "transports": len(self._transports),
+        }
+
+    async def aclose(self) -> None:
+        """Drop all pooled clients and close the shared transports."""
+        self._clients.clear()
+        transports = list(self._transports.values())
+        self._transports.clear()
+        for transport in transports:
+            try:
+                await transport.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close LLM transport: {e}")
+
+
+# Global instance
+llm_client_pool = LLMClientPool()
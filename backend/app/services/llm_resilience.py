@@ -0,0 +1,182 @@
+"""Error classification, backoff and circuit breaking for LLM provider calls."""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any
+
+import anthropic
+import openai
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """A provider call failed; carries enough detail for a typed error event."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        provider: str,
+        code: str = "provider_error",
+        retryable: bool = False,
+        status_code: int = 502,
+    ):
+        super().__init__(message)
+        self.message = message
+        self.provider = provider
+        self.code = code
+        self.retryable = retryable
+        self.status_code = status_code
+
+    def to_event(self) -> dict[str, Any]:
+        """Payload of the SSE ``error`` event."""
+        return {
+            "type": "error",
+            "error": self.message,
+            "code": self.code,
+            "provider": self.provider,
+            "retryable": self.retryable,
+        }
+
+
+def classify_error(error: BaseException, provider: str) -> LLMError:
+    """Map SDK and transport exceptions onto ``LLMError``."""
+    if isinstance(error, LLMError):
+        return error
+
+    if isinstance(error, HTTPException):
+        return LLMError(
+            str(error.detail),
+            provider=provider,
+            code="configuration_error",
+            status_code=error.status_code,
+        )
+
+    if isinstance(
+        error, (asyncio.TimeoutError, openai.APITimeoutError, anthropic.APITimeoutError)
+    ):
+        return LLMError(
+            "The LLM provider timed out",
+            provider=provider,
+            code="timeout",
+            retryable=True,
+            status_code=504,
+        )
+
+    if isinstance(error, (openai.APIConnectionError, anthropic.APIConnectionError)):
+        return LLMError(
+            "Could not reach the LLM provider",
+            provider=provider,
+            code="connection_error",
+            retryable=True,
+        )
+
+    if isinstance(error, (openai.APIStatusError, anthropic.APIStatusError)):
+        status_code = error.status_code
+        if status_code == 429:
+            return LLMError(
+                "The LLM provider is rate limiting requests",
+                provider=provider,
+                code="rate_limited",
+                retryable=True,
+                status_code=429,
+            )
+        if status_code in (401, 403):
+            return LLMError(
+                "The LLM provider rejected the API key",
+                provider=provider,
+                code="authentication_error",
+                status_code=400,
+            )
+        if status_code >= 500:
+            return LLMError(
+                f"The LLM provider returned an error ({status_code})",
+                provider=provider,
+                code="upstream_error",
+                retryable=True,
+            )
+        return LLMError(
+            f"The LLM provider rejected the request: {error.message}",
+            provider=provider,
+            code="invalid_request",
+            status_code=400,
+        )
+
+    return LLMError(f"LLM request failed: {error}", provider=provider)
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """Exponential backoff with full jitter for the given 0-based attempt."""
+    return random.uniform(0, min(maximum, base * (2**attempt)))
+
+
+class CircuitBreaker:
+    """Stop calling a provider that keeps failing, then probe it again.
+
+    Only provider-side failures (timeouts, connection errors, 5xx, 429) are
+    counted; a bad key or request from one user must not open the circuit
+    for everybody.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+        # Start of the single trial call allowed while half-open. A probe that
+        # never reports back (e.g. cancelled) expires after ``reset_timeout``.
+        self._probe_started_at: float | None = None
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now."""
+        if self.state == self.CLOSED:
+            return True
+
+        now = time.monotonic()
+        if (
+            self.state == self.OPEN
+            and now - (self.opened_at or 0) >= self.reset_timeout
+        ):
+            self.state = self.HALF_OPEN
+            self._probe_started_at = None
+
+        if self.state == self.HALF_OPEN and (
+            self._probe_started_at is None
+            or now - self._probe_started_at >= self.reset_timeout
+        ):
+            self._probe_started_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self, error: LLMError) -> None:
+        if not error.retryable:
+            # Not the provider's fault; let the next call probe again
+            self._probe_started_at = None
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"Circuit opened for {error.provider} after {self.failures} failures"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_started_at = None
+
+    def stats(self) -> dict[str, Any]:
+        return {"state": self.state, "failures": self.failures}
@@ -0,0 +1,219 @@
+"""Fair admission control for concurrent LLM provider calls."""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerRejected(Exception):
+    """The request could not be admitted (queue full or waited too long)."""
+
+
+@dataclass
+class SchedulerTicket:
+    """A granted slot; must be passed back to ``release``."""
+
+    user_id: uuid.UUID
+    provider: str
+    queue_ms: float = 0.0
+    # 1-based place in the wait queue on arrival, 0 if admitted immediately
+    position: int = 0
+    released: bool = False
+
+
+@dataclass
+class _Waiter:
+    ticket: SchedulerTicket
+    enqueued_at: float
+    future: asyncio.Future[None] = field(repr=False)
+
+
+class LLMScheduler:
+    """Per-user and per-provider concurrency limits with a fair wait queue.
+
+    A request runs immediately when nobody is waiting and both its user and
+    its provider are below their limits. Otherwise it joins a bounded queue.
+    Freed capacity is handed out round-robin across users, so one user with
+    many queued requests cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        max_per_user: int = settings.LLM_MAX_CONCURRENT_PER_USER,
+        max_per_provider: int = settings.LLM_MAX_CONCURRENT_PER_PROVIDER,
+        max_queue: int = settings.LLM_MAX_QUEUED_REQUESTS,
+        max_wait: float = settings.LLM_MAX_QUEUE_WAIT_SECONDS,
+    ):
+        self.max_per_user = max_per_user
+        self.max_per_provider = max_per_provider
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._active_users: Counter[uuid.UUID] = Counter()
+        self._active_providers: Counter[str] = Counter()
+        # Users in round-robin order, each with their own FIFO of waiters
+        self._waiting: OrderedDict[uuid.UUID, deque[_Waiter]] = OrderedDict()
+        self._queued = 0
+        self.granted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_queue_ms = 0.0
+        self.max_queue_ms = 0.0
+
+    def _has_capacity(self, user_id: uuid.UUID, provider: str) -> bool:
+        return (
+            self._active_users[user_id] < self.max_per_user
+            and self._active_providers[provider] < self.max_per_provider
+        )
+
+    def _grant(self, ticket: SchedulerTicket) -> None:
+        self._active_users[ticket.user_id] += 1
+        self._active_providers[ticket.provider] += 1
+        self.granted += 1
+
+    def _dispatch(self) -> None:
+        """Hand freed capacity to waiters, one per user per round."""
+        progress = True
+        while progress and self._waiting:
+            progress = False
+            for user_id in list(self._waiting):
+                queue = self._waiting[user_id]
+                waiter = next(
+                    (
+                        w
+                        for w in queue
+                        if self._has_capacity(user_id, w.ticket.provider)
+                    ),
+                    None,
+                )
+                if waiter is None:
+                    continue
+
+                queue.remove(waiter)
+                self._queued -= 1
+                if queue:
+                    self._waiting.move_to_end(user_id)
+                else:
+                    del self._waiting[user_id]
+
+                self._grant(waiter.ticket)
+                waiter.future.set_result(None)
+                progress = True
+
+    def _remove_waiter(self, waiter: _Waiter) -> None:
+        queue = self._waiting.get(waiter.ticket.user_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._waiting[waiter.ticket.user_id]
+
+    async def acquire(self, user_id: uuid.UUID, provider: str) -> SchedulerTicket:
+        """Wait for a slot for ``user_id`` on ``provider``."""
+        ticket = SchedulerTicket(user_id=user_id, provider=provider)
+
+        if not self._waiting and self._has_capacity(user_id, provider):
+            self._grant(ticket)
+            return ticket
+
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerRejected(
+                "Too many requests are waiting for the LLM provider"
+            )
+
+        waiter = _Waiter(
+            ticket=ticket,
+            enqueued_at=time.perf_counter(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiting.setdefault(user_id, deque()).append(waiter)
+        self._queued += 1
+        ticket.position = self._queued
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Granted just as we gave up: hand the slot back
+                self.release(ticket)
+            else:
+                waiter.future.cancel()
+                self._remove_waiter(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise SchedulerRejected("Timed out waiting for the LLM provider")
+            raise
+
+        ticket.queue_ms = (time.perf_counter() - waiter.enqueued_at) * 1000
+        self.total_queue_ms += ticket.queue_ms
+        self.max_queue_ms = max(self.max_queue_ms, ticket.queue_ms)
+        return ticket
+
+    def release(self, ticket: SchedulerTicket | None) -> None:
+        """Return a slot and wake the next waiters."""
+        if ticket is None or ticket.released:
+            return
+        ticket.released = True
+        self._active_users[ticket.user_id] -= 1
+        if self._active_users[ticket.user_id] <= 0:
+            del self._active_users[ticket.user_id]
+        self._active_providers[ticket.provider] -= 1
+        if self._active_providers[ticket.provider] <= 0:
+            del self._active_providers[ticket.provider]
+        self._dispatch()
+
+    async def switch(self, ticket: SchedulerTicket, provider: str) -> None:
+        """Move a held slot to another provider, e.g. on failover.
+
+        The old provider's slot is freed first, then the ticket waits for
+        the new provider like ``acquire``. If that is rejected the ticket
+        stays released.
+        """
+        if ticket.released or ticket.provider == provider:
+            return
+        self.release(ticket)
+        granted = await self.acquire(ticket.user_id, provider)
+        ticket.provider = provider
+        ticket.released = False
+        ticket.queue_ms += granted.queue_ms
+
+    @asynccontextmanager
+    async def slot(
+        self, user_id: uuid.UUID, provider: str
+    ) -> AsyncIterator[SchedulerTicket]:
+        """Hold a slot for the duration of the block."""
+        ticket = await self.acquire(user_id, provider)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict[str, Any]:
+        """Scheduler counters for the metrics endpoint."""
+        return {
+            "active": sum(self._active_providers.values()),
+            "active_by_provider": dict(self._active_providers),
+            "queued": self._queued,
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_queue_ms": round(self.total_queue_ms / self.granted, 2)
+            if self.granted
+            else 0.0,
+            "max_queue_ms": round(self.max_queue_ms, 2),
+        }
+
+
+# Global instance
+llm_scheduler = LLMScheduler()
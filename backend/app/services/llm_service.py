@@ -1,231 +1,764 @@
 """LLM Service for handling OpenAI and Anthropic API interactions."""
-import json
-from typing import AsyncGenerator, Optional, Dict, Any, List
-from enum import Enum
+
+import asyncio
+import functools
+import hashlib
+import hmac
 import logging
+import time
+import uuid
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from enum import Enum
+from typing import (
+    Any,
+    TypeVar,
+)
 
-from openai import AsyncOpenAI
-from anthropic import AsyncAnthropic
+from anthropic import NOT_GIVEN, AsyncAnthropic
 from fastapi import HTTPException
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.core.security import decrypt_api_key, encrypt_api_key
 from app.models.user import User
+from app.services.llm_client_pool import llm_client_pool
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    LLMError,
+    backoff_delay,
+    classify_error,
+)
+from app.services.llm_scheduler import SchedulerTicket, llm_scheduler
+from app.services.mock_llm import mock_llm
+from app.services.model_router import (
+    AUTO_MODEL,
+    ModelPreference,
+    RoutingDecision,
+    has_data_context,
+    model_router,
+)
+from app.services.token_estimator import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class LLMProvider(str, Enum):
     """Supported LLM providers."""
+
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
+    # Synthetic responses for load tests and offline development
+    MOCK = "mock"
 
 
 class ChatMessage(BaseModel):
     """Chat message for LLM interaction."""
+
     role: str  # "user", "assistant", "system"
     content: str
 
 
 class LLMConfig(BaseModel):
     """Configuration for LLM requests."""
+
     provider: LLMProvider = LLMProvider.OPENAI
     model: str = "gpt-4-turbo-preview"
     temperature: float = 0.7
-    max_tokens: Optional[int] = None
+    max_tokens: int | None = None
     stream: bool = True
+    # Fall back to the user's other provider when this one keeps failing
+    failover: bool = False
+
+
+class LLMUsage(BaseModel):
+    """Token usage reported by the provider for a single request."""
+
+    provider: str | None = None
+    model: str | None = None
+    # Total prompt tokens, including those served from the prompt cache
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_write_input_tokens: int = 0
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        return self.input_tokens - self.cached_input_tokens
+
+    def summary(self) -> dict[str, int]:
+        """Counts reported to clients at the end of a request."""
+        return {
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "uncached_input_tokens": self.uncached_input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+# Model used for each provider when the request doesn't name one
+DEFAULT_MODELS = {
+    LLMProvider.OPENAI: "gpt-4-turbo-preview",
+    LLMProvider.ANTHROPIC: "claude-3-opus-20240229",
+    LLMProvider.MOCK: "mock-1",
+}
+
+# Cache breakpoints placed on the most recent user turns for Anthropic
+ANTHROPIC_CACHED_USER_TURNS = 2
 
 
 class LLMService:
     """Service for handling LLM interactions."""
-    
-    def __init__(self):
-        self.openai_client: Optional[AsyncOpenAI] = None
-        self.anthropic_client: Optional[AsyncAnthropic] = None
-    
-    def get_user_api_key(self, user: User, provider: LLMProvider) -> Optional[str]:
+
+    def __init__(self) -> None:
+        self.client_pool = llm_client_pool
+        # (user_id, provider) -> (encrypted key, decrypted key). The encrypted
+        # value is kept so a key changed by another worker is never served.
+        self.api_key_cache: TTLCache[tuple[uuid.UUID, str], tuple[str, str]] = TTLCache(
+            settings.API_KEY_CACHE_MAX_SIZE,
+            ttl=settings.API_KEY_CACHE_TTL_SECONDS,
+        )
+        # Keyed hash of (provider, API key) -> whether the provider accepted it
+        self.validation_cache: TTLCache[str, bool] = TTLCache(
+            settings.API_KEY_VALIDATION_CACHE_MAX_SIZE,
+            ttl=settings.API_KEY_VALIDATION_TTL_SECONDS,
+        )
+        self.breakers: dict[str, CircuitBreaker] = {
+            provider.value: CircuitBreaker(
+                settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                settings.LLM_CIRCUIT_RESET_SECONDS,
+            )
+            for provider in LLMProvider
+        }
+        self.router = model_router
+        self.retries = 0
+        self.hedged_requests = 0
+        # Estimated prompt tokens of cancelled hedge losers; providers bill
+        # them but never report usage for a cancelled stream
+        self.hedge_cancelled_input_tokens = 0
+        self.failovers = 0
+
+    def get_user_api_key(self, user: User, provider: LLMProvider) -> str | None:
         """Get and decrypt user's API key for a provider."""
-        encrypted_key = user.api_keys.get(provider.value)
+        encrypted_key = (user.api_keys or {}).get(provider.value)
         if not encrypted_key:
             return None
-        
+
+        cache_key = (user.id, provider.value)
+        cached = self.api_key_cache.get(cache_key)
+        if cached and cached[0] == encrypted_key:
+            return cached[1]
+
         try:
-            return decrypt_api_key(encrypted_key)
+            api_key = decrypt_api_key(encrypted_key)
         except Exception as e:
             logger.error(f"Failed to decrypt API key: {e}")
             return None
-    
-    def set_user_api_key(self, user: User, provider: LLMProvider, api_key: str) -> Dict[str, str]:
+
+        self.api_key_cache.set(cache_key, (encrypted_key, api_key))
+        return api_key
+
+    def set_user_api_key(
+        self, user: User, provider: LLMProvider, api_key: str
+    ) -> dict[str, str]:
         """Encrypt and store user's API key."""
         encrypted_key = encrypt_api_key(api_key)
-        
-        if not user.api_keys:
-            user.api_keys = {}
-        
-        user.api_keys[provider.value] = encrypted_key
-        return user.api_keys
-    
+        self.forget_user_api_key(user, provider)
+
+        # Assign a new dict so SQLAlchemy notices the JSON column changed
+        api_keys = dict(user.api_keys or {})
+        api_keys[provider.value] = encrypted_key
+        return api_keys
+
+    def delete_user_api_key(self, user: User, provider: LLMProvider) -> dict[str, str]:
+        """Remove user's API key for a provider."""
+        self.forget_user_api_key(user, provider)
+
+        api_keys = dict(user.api_keys or {})
+        api_keys.pop(provider.value, None)
+        return api_keys
+
+    def forget_user_api_key(self, user: User, provider: LLMProvider) -> None:
+        """Drop the cached plaintext key and pooled client for a user's key."""
+        cached = self.api_key_cache.pop((user.id, provider.value))
+        if cached:
+            self.client_pool.discard(
+                provider.value, cached[1], self.get_base_url(provider)
+            )
+
+    @staticmethod
+    def validation_cache_key(provider: LLMProvider, api_key: str) -> str:
+        """Keyed hash of an API key; the key itself is never kept in memory."""
+        return hmac.new(
+            settings.SECRET_KEY.encode(),
+            f"{provider.value}:{api_key}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+
     async def validate_api_key(self, provider: LLMProvider, api_key: str) -> bool:
-        """Validate an API key by making a test request."""
+        """Validate an API key with a cheap request, caching the outcome.
+
+        Valid keys are remembered for ``API_KEY_VALIDATION_TTL_SECONDS``,
+        rejected ones for a shorter time. When the provider can't give an
+        answer (timeout, outage, rate limit) nothing is cached and the
+        ``LLMError`` is raised to the caller.
+        """
+        if provider not in (LLMProvider.OPENAI, LLMProvider.ANTHROPIC):
+            return False
+
+        cache_key = self.validation_cache_key(provider, api_key)
+        cached = self.validation_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        client = self.build_client(provider, api_key).with_options(
+            timeout=settings.API_KEY_VALIDATION_TIMEOUT_SECONDS,
+            max_retries=0,
+        )
         try:
             if provider == LLMProvider.OPENAI:
-                client = AsyncOpenAI(api_key=api_key)
-                # Make a minimal request to validate the key
                 await client.models.list()
-                return True
-            
-            elif provider == LLMProvider.ANTHROPIC:
-                client = AsyncAnthropic(api_key=api_key)
-                # Anthropic doesn't have a simple list endpoint, so we'll try a minimal completion
+            elif hasattr(client, "models"):
+                await client.models.list(limit=1)
+            else:
+                # Older SDKs have no models endpoint; fall back to a one-token completion
                 await client.messages.create(
                     model="claude-3-haiku-20240307",
                     max_tokens=1,
                     messages=[{"role": "user", "content": "Hi"}],
                 )
-                return True
-            
+            is_valid = True
         except Exception as e:
-            logger.error(f"API key validation failed: {e}")
-            return False
-        
-        return False
-    
-    def get_client(self, user: User, provider: LLMProvider):
-        """Get or create an LLM client for the user."""
+            error = classify_error(e, provider.value)
+            if error.retryable:
+                logger.warning(f"API key validation inconclusive: {error}")
+                raise error from e
+            logger.info(f"API key validation failed: {error}")
+            is_valid = False
+
+        if not is_valid:
+            self.client_pool.discard(
+                provider.value, api_key, self.get_base_url(provider)
+            )
+
+        self.validation_cache.set(
+            cache_key,
+            is_valid,
+            ttl=None if is_valid else settings.API_KEY_VALIDATION_NEGATIVE_TTL_SECONDS,
+        )
+        return is_valid
+
+    def get_base_url(self, provider: LLMProvider) -> str | None:
+        """Get the configured API endpoint override for a provider."""
+        if provider == LLMProvider.OPENAI:
+            return settings.OPENAI_BASE_URL
+        elif provider == LLMProvider.ANTHROPIC:
+            return settings.ANTHROPIC_BASE_URL
+        return None
+
+    def build_client(self, provider: LLMProvider, api_key: str) -> Any:
+        """Get a pooled client for an API key, creating it on first use."""
+        base_url = self.get_base_url(provider)
+
+        # SDK-level retries are disabled; call_with_retries handles them
+        if provider == LLMProvider.OPENAI:
+            return self.client_pool.get_or_create(
+                provider.value,
+                api_key,
+                base_url,
+                lambda http_client: AsyncOpenAI(
+                    api_key=api_key,
+                    base_url=base_url,
+                    http_client=http_client,
+                    max_retries=0,
+                ),
+            )
+        elif provider == LLMProvider.ANTHROPIC:
+            return self.client_pool.get_or_create(
+                provider.value,
+                api_key,
+                base_url,
+                lambda http_client: AsyncAnthropic(
+                    api_key=api_key,
+                    base_url=base_url,
+                    http_client=http_client,
+                    max_retries=0,
+                ),
+            )
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+
+    def get_client(self, user: User, provider: LLMProvider) -> Any:
+        """Get a pooled LLM client for the user."""
+        if provider == LLMProvider.MOCK:
+            if not mock_llm.is_enabled():
+                raise HTTPException(
+                    status_code=400,
+                    detail="The mock provider is not available in production.",
+                )
+            return mock_llm
+
         api_key = self.get_user_api_key(user, provider)
         if not api_key:
             raise HTTPException(
                 status_code=400,
                 detail=f"No API key configured for {provider.value}. Please add your API key in settings.",
             )
-        
-        if provider == LLMProvider.OPENAI:
-            return AsyncOpenAI(api_key=api_key)
-        elif provider == LLMProvider.ANTHROPIC:
-            return AsyncAnthropic(api_key=api_key)
+
+        return self.build_client(provider, api_key)
+
+    @staticmethod
+    def prepare_openai_messages(messages: list[ChatMessage]) -> list[dict[str, Any]]:
+        """Build OpenAI messages with a stable, cache-friendly prefix.
+
+        OpenAI caches prompt prefixes automatically, so system messages are
+        always placed first and in their original order; the history that
+        follows is append-only between turns.
+        """
+        system = [msg for msg in messages if msg.role == "system"]
+        rest = [msg for msg in messages if msg.role != "system"]
+        return [{"role": msg.role, "content": msg.content} for msg in system + rest]
+
+    @staticmethod
+    def prepare_anthropic_messages(
+        messages: list[ChatMessage],
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """Split system blocks from the turns and add prompt cache breakpoints.
+
+        Anthropic only caches up to explicit ``cache_control`` breakpoints (at
+        most four). We mark the end of the system prompt and the last two user
+        turns: the newest one writes the prefix that the next request will
+        reuse, the previous one reads what the last request wrote.
+        """
+        system_blocks: list[dict[str, Any]] = [
+            {"type": "text", "text": msg.content}
+            for msg in messages
+            if msg.role == "system"
+        ]
+        turns: list[dict[str, Any]] = [
+            {"role": msg.role, "content": [{"type": "text", "text": msg.content}]}
+            for msg in messages
+            if msg.role != "system"
+        ]
+
+        if system_blocks:
+            system_blocks[-1]["cache_control"] = {"type": "ephemeral"}
+
+        user_turns = [turn for turn in turns if turn["role"] == "user"]
+        for turn in user_turns[-ANTHROPIC_CACHED_USER_TURNS:]:
+            turn["content"][-1]["cache_control"] = {"type": "ephemeral"}
+
+        return system_blocks, turns
+
+    @staticmethod
+    def read_openai_usage(raw_usage: Any, usage: LLMUsage) -> None:
+        """Copy token counts from an OpenAI usage object."""
+        if raw_usage is None:
+            return
+        details = getattr(raw_usage, "prompt_tokens_details", None)
+        usage.input_tokens = raw_usage.prompt_tokens or 0
+        usage.output_tokens = raw_usage.completion_tokens or 0
+        usage.cached_input_tokens = (
+            (getattr(details, "cached_tokens", None) or 0) if details else 0
+        )
+
+    @staticmethod
+    def read_anthropic_usage(raw_usage: Any, usage: LLMUsage) -> None:
+        """Copy token counts from an Anthropic usage object."""
+        if raw_usage is None:
+            return
+        cache_read = getattr(raw_usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(raw_usage, "cache_creation_input_tokens", None) or 0
+        # Anthropic reports uncached input separately from cache reads/writes
+        usage.input_tokens = (raw_usage.input_tokens or 0) + cache_read + cache_write
+        usage.output_tokens = raw_usage.output_tokens or 0
+        usage.cached_input_tokens = cache_read
+        usage.cache_write_input_tokens = cache_write
+
+    def route_model(
+        self,
+        provider: LLMProvider,
+        requested: str | None,
+        *,
+        message: str,
+        prompt_tokens: int,
+        preference: ModelPreference = ModelPreference.BALANCED,
+        max_tokens: int | None = None,
+    ) -> RoutingDecision:
+        """Resolve the model for a request; ``auto`` goes through the router."""
+        if requested and requested != AUTO_MODEL:
+            return RoutingDecision(model=requested)
+
+        decision = None
+        if requested == AUTO_MODEL:
+            decision = self.router.route(
+                provider.value,
+                message_tokens=estimate_tokens(message),
+                prompt_tokens=prompt_tokens,
+                data_context=has_data_context(message),
+                preference=preference,
+                max_tokens=max_tokens,
+            )
+        if decision is None:
+            return RoutingDecision(
+                model=DEFAULT_MODELS[provider], reason="provider default"
+            )
+
+        logger.info(f"Routed request to {decision.model} ({decision.reason})")
+        return decision
+
+    def failover_configs(self, user: User, config: LLMConfig) -> list[LLMConfig]:
+        """The requested config, followed by the user's other providers if allowed."""
+        configs = [config]
+        if config.failover:
+            for provider, model in DEFAULT_MODELS.items():
+                if provider != config.provider and self.get_user_api_key(
+                    user, provider
+                ):
+                    configs.append(
+                        config.model_copy(update={"provider": provider, "model": model})
+                    )
+        return configs
+
+    async def call_with_retries(
+        self,
+        config: LLMConfig,
+        attempt: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Run ``attempt`` through the provider's circuit breaker, retrying
+        transient failures with jittered exponential backoff."""
+        provider = config.provider.value
+        breaker = self.breakers[provider]
+
+        for retry in range(settings.LLM_MAX_RETRIES + 1):
+            if not breaker.allow():
+                raise LLMError(
+                    f"{provider} is temporarily unavailable",
+                    provider=provider,
+                    code="circuit_open",
+                    retryable=True,
+                    status_code=503,
+                )
+
+            try:
+                result = await attempt()
+            except Exception as e:
+                error = classify_error(e, provider)
+                breaker.record_failure(error)
+                if not error.retryable or retry == settings.LLM_MAX_RETRIES:
+                    raise error from e
+
+                delay = backoff_delay(
+                    retry,
+                    settings.LLM_RETRY_BASE_DELAY_SECONDS,
+                    settings.LLM_RETRY_MAX_DELAY_SECONDS,
+                )
+                logger.warning(
+                    f"{provider} call failed ({error.code}), retrying in {delay:.2f}s"
+                )
+                self.retries += 1
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+        raise AssertionError("unreachable")
+
+    async def _complete_once(
+        self,
+        client: Any,
+        messages: list[ChatMessage],
+        config: LLMConfig,
+        usage: LLMUsage,
+    ) -> str:
+        """Make a single non-streaming provider request."""
+        if config.provider == LLMProvider.OPENAI:
+            response = await client.chat.completions.create(
+                model=config.model,
+                messages=self.prepare_openai_messages(messages),
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                stream=False,
+            )
+            self.read_openai_usage(response.usage, usage)
+            return response.choices[0].message.content or ""
+
+        elif config.provider == LLMProvider.ANTHROPIC:
+            # Anthropic requires system message to be separate
+            system_blocks, turns = self.prepare_anthropic_messages(messages)
+
+            response = await client.messages.create(
+                model=config.model,
+                messages=turns,
+                system=system_blocks or NOT_GIVEN,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens or 4096,
+            )
+            self.read_anthropic_usage(response.usage, usage)
+            text: str = response.content[0].text
+            return text
+
+        elif config.provider == LLMProvider.MOCK:
+            return await mock_llm.complete(messages, config, usage)
+
+        raise ValueError(f"Unsupported provider: {config.provider}")
+
+    async def _stream_once(
+        self,
+        client: Any,
+        messages: list[ChatMessage],
+        config: LLMConfig,
+        usage: LLMUsage,
+    ) -> AsyncGenerator[str, None]:
+        """Make a single streaming provider request."""
+        if config.provider == LLMProvider.OPENAI:
+            stream = await client.chat.completions.create(
+                model=config.model,
+                messages=self.prepare_openai_messages(messages),
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+
+            async for chunk in stream:
+                # The final chunk carries usage and no choices
+                if chunk.usage is not None:
+                    self.read_openai_usage(chunk.usage, usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        elif config.provider == LLMProvider.ANTHROPIC:
+            # Prepare messages for Anthropic
+            system_blocks, turns = self.prepare_anthropic_messages(messages)
+
+            async with client.messages.stream(
+                model=config.model,
+                messages=turns,
+                system=system_blocks or NOT_GIVEN,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens or 4096,
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+
+                final_message = await stream.get_final_message()
+                self.read_anthropic_usage(final_message.usage, usage)
+
+        elif config.provider == LLMProvider.MOCK:
+            async for text in client.stream(messages, config, usage):
+                yield text
+
         else:
-            raise ValueError(f"Unsupported provider: {provider}")
-    
+            raise ValueError(f"Unsupported provider: {config.provider}")
+
+    async def _start_stream(
+        self,
+        client: Any,
+        messages: list[ChatMessage],
+        config: LLMConfig,
+        usage: LLMUsage,
+    ) -> tuple[AsyncGenerator[str, None], str | None]:
+        """Open a stream and wait for its first chunk.
+
+        With ``LLM_HEDGE_AFTER_SECONDS`` set, a second identical request is
+        sent when the first one has not produced a token in time; whichever
+        answers first is kept and the other is cancelled, its prompt counted
+        in ``hedge_cancelled_input_tokens``. The first chunk is ``None`` for
+        an empty response.
+        """
+        primary = self._stream_once(client, messages, config, usage)
+        hedge_after = settings.LLM_HEDGE_AFTER_SECONDS
+        if not hedge_after:
+            return primary, await first_chunk(primary)
+
+        streams = {asyncio.ensure_future(first_chunk(primary)): primary}
+        done, _ = await asyncio.wait(streams, timeout=hedge_after)
+        if not done:
+            logger.info(
+                f"No first token from {config.provider.value} after {hedge_after}s, hedging"
+            )
+            self.hedged_requests += 1
+            hedge = self._stream_once(client, messages, config, usage)
+            streams[asyncio.ensure_future(first_chunk(hedge))] = hedge
+
+        pending = set(streams)
+        winner = None
+        error: BaseException | None = None
+        try:
+            while winner is None and pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    error = task.exception()
+        finally:
+            for task, stream in streams.items():
+                if task is winner:
+                    continue
+                if winner is not None and not (task.done() and task.exception()):
+                    self.hedge_cancelled_input_tokens += sum(
+                        estimate_tokens(message.content) for message in messages
+                    )
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                await stream.aclose()
+
+        if winner is None:
+            # Every request failed
+            assert error is not None
+            raise error
+        return streams[winner], winner.result()
+
     async def create_chat_completion(
         self,
         user: User,
-        messages: List[ChatMessage],
+        messages: list[ChatMessage],
         config: LLMConfig,
+        usage: LLMUsage | None = None,
+        ticket: SchedulerTicket | None = None,
     ) -> str:
-        """Create a non-streaming chat completion."""
-        client = self.get_client(user, config.provider)
-        
-        message_dicts = [{"role": msg.role, "content": msg.content} for msg in messages]
-        
-        try:
-            if config.provider == LLMProvider.OPENAI:
-                response = await client.chat.completions.create(
-                    model=config.model,
-                    messages=message_dicts,
-                    temperature=config.temperature,
-                    max_tokens=config.max_tokens,
-                    stream=False,
-                )
-                return response.choices[0].message.content or ""
-            
-            elif config.provider == LLMProvider.ANTHROPIC:
-                # Anthropic requires system message to be separate
-                system_message = None
-                user_messages = []
-                
-                for msg in message_dicts:
-                    if msg["role"] == "system":
-                        system_message = msg["content"]
-                    else:
-                        # Convert "assistant" to "assistant" and "user" to "user"
-                        user_messages.append({
-                            "role": msg["role"],
-                            "content": msg["content"],
-                        })
-                
-                response = await client.messages.create(
-                    model=config.model,
-                    messages=user_messages,
-                    system=system_message,
-                    temperature=config.temperature,
-                    max_tokens=config.max_tokens or 4096,
+        """Create a non-streaming chat completion.
+
+        Transient failures are retried; with ``config.failover`` the request
+        moves on to the user's other provider, taking the scheduler
+        ``ticket`` with it. Raises ``LLMError``. Token usage, including
+        prompt cache reads, is written to ``usage``.
+        """
+        usage = usage if usage is not None else LLMUsage()
+        last_error: LLMError | None = None
+
+        for attempt_config in self.failover_configs(user, config):
+            if attempt_config is not config:
+                await self.fail_over(config, attempt_config, ticket)
+            usage.provider = attempt_config.provider.value
+            usage.model = attempt_config.model
+            try:
+                client = self.get_client(user, attempt_config.provider)
+                return await self.call_with_retries(
+                    attempt_config,
+                    functools.partial(
+                        self._complete_once, client, messages, attempt_config, usage
+                    ),
                 )
-                return response.content[0].text
-            
-        except Exception as e:
-            logger.error(f"Chat completion failed: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"LLM request failed: {str(e)}",
-            )
-    
+            except Exception as e:
+                last_error = classify_error(e, attempt_config.provider.value)
+                logger.error(f"Chat completion failed: {last_error}")
+
+        raise last_error or no_provider_error(config)
+
     async def create_chat_stream(
         self,
         user: User,
-        messages: List[ChatMessage],
+        messages: list[ChatMessage],
         config: LLMConfig,
+        usage: LLMUsage | None = None,
+        ticket: SchedulerTicket | None = None,
     ) -> AsyncGenerator[str, None]:
-        """Create a streaming chat completion."""
-        client = self.get_client(user, config.provider)
-        
-        message_dicts = [{"role": msg.role, "content": msg.content} for msg in messages]
-        
-        try:
-            if config.provider == LLMProvider.OPENAI:
-                stream = await client.chat.completions.create(
-                    model=config.model,
-                    messages=message_dicts,
-                    temperature=config.temperature,
-                    max_tokens=config.max_tokens,
-                    stream=True,
+        """Create a streaming chat completion.
+
+        Retries, hedging and failover only happen before the first token;
+        once content has been yielded a failure ends the stream. A failover
+        takes the scheduler ``ticket`` with it. Raises ``LLMError``. Token
+        usage, including prompt cache reads, is written to ``usage`` once
+        the stream has been consumed.
+        """
+        usage = usage if usage is not None else LLMUsage()
+        last_error: LLMError | None = None
+
+        for attempt_config in self.failover_configs(user, config):
+            if attempt_config is not config:
+                await self.fail_over(config, attempt_config, ticket)
+            provider = attempt_config.provider.value
+            usage.provider = provider
+            usage.model = attempt_config.model
+            started_at = time.perf_counter()
+            try:
+                client = self.get_client(user, attempt_config.provider)
+                stream, first = await self.call_with_retries(
+                    attempt_config,
+                    functools.partial(
+                        self._start_stream, client, messages, attempt_config, usage
+                    ),
                 )
-                
+            except Exception as e:
+                last_error = classify_error(e, provider)
+                logger.error(f"Chat stream failed to start: {last_error}")
+                continue
+            # Time to first token, including retries, feeds model routing
+            self.router.observe(
+                attempt_config.model, (time.perf_counter() - started_at) * 1000
+            )
+
+            try:
+                if first is not None:
+                    yield first
                 async for chunk in stream:
-                    if chunk.choices[0].delta.content:
-                        yield chunk.choices[0].delta.content
-            
-            elif config.provider == LLMProvider.ANTHROPIC:
-                # Prepare messages for Anthropic
-                system_message = None
-                user_messages = []
-                
-                for msg in message_dicts:
-                    if msg["role"] == "system":
-                        system_message = msg["content"]
-                    else:
-                        user_messages.append({
-                            "role": msg["role"],
-                            "content": msg["content"],
-                        })
-                
-                async with client.messages.stream(
-                    model=config.model,
-                    messages=user_messages,
-                    system=system_message,
-                    temperature=config.temperature,
-                    max_tokens=config.max_tokens or 4096,
-                ) as stream:
-                    async for text in stream.text_stream:
-                        yield text
-        
-        except Exception as e:
-            logger.error(f"Chat stream failed: {e}")
-            yield f"Error: {str(e)}"
-    
-    def update_usage_tracking(self, user: User, provider: LLMProvider, tokens_used: int) -> None:
-        """Update user's API usage tracking."""
-        if not user.api_usage:
-            user.api_usage = {}
-        
-        if provider.value not in user.api_usage:
-            user.api_usage[provider.value] = {
-                "total_tokens": 0,
-                "total_requests": 0,
-            }
-        
-        user.api_usage[provider.value]["total_tokens"] += tokens_used
-        user.api_usage[provider.value]["total_requests"] += 1
+                    yield chunk
+            except Exception as e:
+                error = classify_error(e, provider)
+                self.breakers[provider].record_failure(error)
+                logger.error(f"Chat stream failed: {error}")
+                # Part of the answer has been sent already; it can't be retried
+                error.retryable = False
+                raise error from e
+            finally:
+                await stream.aclose()
+            return
+
+        raise last_error or no_provider_error(config)
+
+    async def fail_over(
+        self,
+        requested: LLMConfig,
+        fallback: LLMConfig,
+        ticket: SchedulerTicket | None,
+    ) -> None:
+        """Count a failover and move the scheduler slot to the new provider."""
+        self.failovers += 1
+        logger.warning(
+            f"Failing over from {requested.provider.value} to {fallback.provider.value} "
+            f"({fallback.model})"
+        )
+        if ticket is not None:
+            await llm_scheduler.switch(ticket, fallback.provider.value)
+
+    def resilience_stats(self) -> dict[str, Any]:
+        """Retry, hedging and circuit breaker counters."""
+        return {
+            "retries": self.retries,
+            "hedged_requests": self.hedged_requests,
+            "hedge_cancelled_input_tokens": self.hedge_cancelled_input_tokens,
+            "failovers": self.failovers,
+            "circuits": {
+                name: breaker.stats() for name, breaker in self.breakers.items()
+            },
+        }
+
+
+def no_provider_error(config: LLMConfig) -> LLMError:
+    """Raised when there was no provider to try at all."""
+    return LLMError(
+        f"No {config.provider.value} provider is available",
+        provider=config.provider.value,
+        code="configuration_error",
+        status_code=400,
+    )
+
+
+async def first_chunk(stream: AsyncGenerator[str, None]) -> str | None:
+    """First item of a stream, or None if it is empty."""
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
 
 
 # Global instance
-llm_service = LLMService()
\ No newline at end of file
+llm_service = LLMService()
@@ -0,0 +1,151 @@
+"""Synthetic LLM provider for load tests and offline development."""
+
+import asyncio
+import random
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from app.core.config import settings
+from app.services.llm_resilience import LLMError
+from app.services.token_estimator import CHARS_PER_TOKEN, estimate_tokens
+
+PROVIDER = "mock"
+
+# Default response length when the request does not set max_tokens
+DEFAULT_RESPONSE_TOKENS = 300
+
+INTRO = (
+    "Here is one way to approach {topic}. First we load the data and check "
+    "its shape, then we aggregate it and look at the result."
+)
+
+PYTHON_BLOCK = """import pandas as pd
+
+df = pd.read_csv("data.csv")
+summary = df.groupby("category")["value"].agg(["count", "mean", "sum"])
+
+
+def top_categories(frame, n=5):
+    return frame.sort_values("sum", ascending=False).head(n)
+
+
+print(top_categories(summary))
+"""
+
+SQL_BLOCK = """SELECT category, COUNT(*) AS n, AVG(value) AS mean_value
+FROM measurements
+GROUP BY category
+ORDER BY n DESC;
+"""
+
+FILLER = (
+    "The grouped table shows how the values are distributed across categories. "
+    "Outliers can skew the mean, so it is worth comparing it with the median "
+    "before drawing conclusions. "
+)
+
+
+class MockLLM:
+    """Stream a canned analysis answer with realistic timing.
+
+    Timing and failures are configured with the ``MOCK_LLM_*`` settings:
+    time to first token, tokens per second, relative jitter applied to every
+    delay, and the probability that a request fails before its first token.
+    Responses contain fenced Python and SQL blocks so the code block
+    pipeline is exercised too. Only available outside production.
+    """
+
+    def __init__(
+        self,
+        ttft_ms: float = settings.MOCK_LLM_TTFT_MS,
+        tokens_per_second: float = settings.MOCK_LLM_TOKENS_PER_SECOND,
+        jitter: float = settings.MOCK_LLM_JITTER,
+        error_rate: float = settings.MOCK_LLM_ERROR_RATE,
+        seed: int | None = None,
+    ):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return settings.ENVIRONMENT != "production"
+
+    def jittered(self, seconds: float) -> float:
+        """A delay of ``seconds`` with the configured jitter applied."""
+        if self.jitter:
+            seconds *= 1 + self.random.uniform(-self.jitter, self.jitter)
+        return max(seconds, 0.0)
+
+    @staticmethod
+    def build_response(messages: list[Any], max_tokens: int | None) -> str:
+        """Answer text of roughly ``max_tokens`` tokens with code fences."""
+        question = next(
+            (msg.content for msg in reversed(messages) if msg.role == "user"),
+            "your question",
+        )
+        topic = " ".join(question.split()[:8]) or "your question"
+        target_chars = (max_tokens or DEFAULT_RESPONSE_TOKENS) * CHARS_PER_TOKEN
+
+        parts = [
+            INTRO.format(topic=topic),
+            f"\n\n```python\n{PYTHON_BLOCK}```\n\n",
+            "The same aggregation in SQL:",
+            f"\n\n```sql\n{SQL_BLOCK}```\n\n",
+        ]
+        base = "".join(parts)
+        filler = FILLER * max((target_chars - len(base)) // len(FILLER) + 1, 0)
+        # Never cut into the code blocks, only into the filler after them
+        return (base + filler)[: max(target_chars, len(base))]
+
+    @staticmethod
+    def split_tokens(text: str) -> list[str]:
+        """Split text into deltas of about one token each."""
+        return [
+            text[i : i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)
+        ]
+
+    async def _start(self, model: str) -> None:
+        await asyncio.sleep(self.jittered(self.ttft_ms / 1000))
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise LLMError(
+                f"Simulated failure of {model}",
+                provider=PROVIDER,
+                code="upstream_error",
+                retryable=True,
+            )
+
+    @staticmethod
+    def _record_usage(messages: list[Any], response: str, usage: Any) -> None:
+        usage.input_tokens = sum(estimate_tokens(msg.content) for msg in messages)
+        usage.output_tokens = estimate_tokens(response)
+
+    async def complete(self, messages: list[Any], config: Any, usage: Any) -> str:
+        """Return the whole response after the simulated generation time."""
+        await self._start(config.model)
+        response = self.build_response(messages, config.max_tokens)
+        tokens = len(self.split_tokens(response))
+        await asyncio.sleep(self.jittered(tokens / self.tokens_per_second))
+        self._record_usage(messages, response, usage)
+        return response
+
+    async def stream(
+        self,
+        messages: list[Any],
+        config: Any,
+        usage: Any,
+    ) -> AsyncGenerator[str, None]:
+        """Yield the response token by token at the configured rate."""
+        await self._start(config.model)
+        response = self.build_response(messages, config.max_tokens)
+        interval = 1 / self.tokens_per_second
+        for token in self.split_tokens(response):
+            yield token
+            await asyncio.sleep(self.jittered(interval))
+        self._record_usage(messages, response, usage)
+
+
+# Global instance
+mock_llm = MockLLM()
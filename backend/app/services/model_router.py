@@ -0,0 +1,235 @@
+"""Pick a model per chat request from its size, content and observed latency."""
+
+import logging
+import re
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any
+
+from app.core.config import settings
+from app.services.token_estimator import get_context_window, get_prompt_budget
+
+logger = logging.getLogger(__name__)
+
+# Model value asking the router to choose
+AUTO_MODEL = "auto"
+
+FAST = "fast"
+STRONG = "strong"
+
+# Candidate models per provider and tier, in order of preference
+MODEL_TIERS: dict[str, dict[str, list[str]]] = {
+    "openai": {
+        FAST: ["gpt-4o-mini"],
+        STRONG: ["gpt-4o", "gpt-4-turbo"],
+    },
+    "anthropic": {
+        FAST: ["claude-3-5-haiku-latest", "claude-3-haiku-20240307"],
+        STRONG: ["claude-3-5-sonnet-latest", "claude-3-opus-20240229"],
+    },
+    "mock": {
+        FAST: ["mock-fast"],
+        STRONG: ["mock-1"],
+    },
+}
+
+# List prices in USD per million input and output tokens
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "claude-3-5-haiku-latest": (0.80, 4.00),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+    "claude-3-5-sonnet-latest": (3.00, 15.00),
+    "claude-3-opus-20240229": (15.00, 75.00),
+}
+
+# Output size assumed for cost estimates when a request sets no max_tokens
+DEFAULT_OUTPUT_TOKENS = 1_000
+
+# Lines that look like pasted CSV/TSV rows or a markdown table
+TABLE_ROW = re.compile(r"^[^\n]*(?:[,;\t|][^\n]*){2,}$", re.MULTILINE)
+
+
+class ModelPreference(str, Enum):
+    """How the user wants ``auto`` to trade answer quality for speed."""
+
+    SPEED = "speed"
+    BALANCED = "balanced"
+    QUALITY = "quality"
+
+
+@dataclass
+class RoutingDecision:
+    """Model chosen for a request and why."""
+
+    model: str
+    tier: str | None = None
+    reason: str = "requested"
+
+
+def has_data_context(message: str) -> bool:
+    """Whether the message carries code or tabular data to analyse."""
+    if "```" in message:
+        return True
+    return len(TABLE_ROW.findall(message)) >= settings.MODEL_ROUTING_TABLE_MIN_ROWS
+
+
+class ModelRouter:
+    """Route ``auto`` requests between a fast and a strong model tier.
+
+    Short follow-up questions go to the fast tier; long prompts, messages
+    with pasted code or data, and ``quality`` preference go to the strong
+    tier. Time to first token is tracked per model as an exponentially
+    weighted moving average of recent streams. Within a tier, the models
+    within ``MODEL_ROUTING_LATENCY_TOLERANCE`` of the fastest compete on
+    the estimated price of the request, and the cheapest wins.
+
+    Estimates age: a model that was never measured, or not for
+    ``MODEL_ROUTING_LATENCY_MAX_AGE_SECONDS``, gets the next request of its
+    tier as a probe, so a model that was slow once is tried again later.
+    When every strong model is slower than ``MODEL_ROUTING_SLOW_TTFT_MS``
+    and none is due for a probe, balanced requests that don't need it fall
+    back to the fast tier.
+    """
+
+    def __init__(
+        self,
+        alpha: float = settings.MODEL_ROUTING_LATENCY_ALPHA,
+        max_age: float = settings.MODEL_ROUTING_LATENCY_MAX_AGE_SECONDS,
+        tolerance: float = settings.MODEL_ROUTING_LATENCY_TOLERANCE,
+    ):
+        self.alpha = alpha
+        self.max_age = max_age
+        self.tolerance = tolerance
+        # model -> EWMA of time to first token in milliseconds
+        self.latency_ms: dict[str, float] = {}
+        # model -> when it was last measured or sent a probe
+        self.checked_at: dict[str, float] = {}
+        self.samples: dict[str, int] = {}
+        self.probes: dict[str, int] = {}
+        self.routed: dict[str, int] = {}
+
+    def observe(self, model: str, ttft_ms: float) -> None:
+        """Fold one time-to-first-token measurement into the model's average."""
+        previous = self.latency_ms.get(model)
+        if previous is None:
+            self.latency_ms[model] = ttft_ms
+        else:
+            self.latency_ms[model] = previous + self.alpha * (ttft_ms - previous)
+        self.samples[model] = self.samples.get(model, 0) + 1
+        self.checked_at[model] = time.monotonic()
+
+    def is_due(self, model: str, now: float) -> bool:
+        """Whether the model's latency should be measured (again)."""
+        checked_at = self.checked_at.get(model)
+        return checked_at is None or now - checked_at >= self.max_age
+
+    @staticmethod
+    def estimated_cost(model: str, prompt_tokens: int, output_tokens: int) -> float:
+        """List price of a request in USD; 0 for models without a price."""
+        input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+        return (prompt_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def choose(
+        self,
+        candidates: list[str],
+        prompt_tokens: int = 0,
+        output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+    ) -> str | None:
+        """The cheapest candidate among the fast ones, or one due for a probe."""
+        if not candidates:
+            return None
+
+        def cost(model: str) -> float:
+            return self.estimated_cost(model, prompt_tokens, output_tokens)
+
+        now = time.monotonic()
+        due = [model for model in candidates if self.is_due(model, now)]
+        if due:
+            # Only one request probes a model until its sample comes back
+            model = min(due, key=cost)
+            self.checked_at[model] = now
+            self.probes[model] = self.probes.get(model, 0) + 1
+            return model
+
+        measured = [model for model in candidates if model in self.latency_ms]
+        if not measured:
+            # Every probe is still in flight
+            return min(candidates, key=cost)
+        fastest = min(self.latency_ms[model] for model in measured)
+        fast_enough = [
+            model
+            for model in measured
+            if self.latency_ms[model] <= fastest * self.tolerance
+        ]
+        return min(fast_enough, key=lambda model: (cost(model), self.latency_ms[model]))
+
+    def route(
+        self,
+        provider: str,
+        *,
+        message_tokens: int,
+        prompt_tokens: int,
+        data_context: bool,
+        preference: ModelPreference = ModelPreference.BALANCED,
+        max_tokens: int | None = None,
+    ) -> RoutingDecision | None:
+        """Choose a model of ``provider``, or None if it has no tiers."""
+        tiers = MODEL_TIERS.get(provider)
+        if not tiers:
+            return None
+
+        if preference == ModelPreference.QUALITY:
+            tier, reason = STRONG, "quality preference"
+        elif preference == ModelPreference.SPEED:
+            tier, reason = FAST, "speed preference"
+        elif data_context:
+            tier, reason = STRONG, "data context"
+        elif prompt_tokens > settings.MODEL_ROUTING_LONG_PROMPT_TOKENS:
+            tier, reason = STRONG, "long prompt"
+        elif message_tokens <= settings.MODEL_ROUTING_SHORT_MESSAGE_TOKENS:
+            tier, reason = FAST, "short message"
+        else:
+            tier, reason = STRONG, "detailed question"
+            now = time.monotonic()
+            if all(
+                not self.is_due(model, now)
+                and self.latency_ms.get(model, 0.0)
+                > settings.MODEL_ROUTING_SLOW_TTFT_MS
+                for model in tiers[STRONG]
+            ):
+                tier, reason = FAST, "strong tier slow"
+
+        # Only consider models whose context fits the prompt
+        fits = [
+            model
+            for model in tiers[tier]
+            if get_prompt_budget(model, max_tokens) >= prompt_tokens
+        ]
+        model = self.choose(fits, prompt_tokens, max_tokens or DEFAULT_OUTPUT_TOKENS)
+        if model is None:
+            everything = tiers[FAST] + tiers[STRONG]
+            model = max(everything, key=get_context_window)
+            reason = f"{reason}, largest context"
+
+        self.routed[model] = self.routed.get(model, 0) + 1
+        return RoutingDecision(model=model, tier=tier, reason=reason)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            model: {
+                "ttft_ms": round(self.latency_ms[model], 1)
+                if model in self.latency_ms
+                else None,
+                "samples": self.samples.get(model, 0),
+                "probes": self.probes.get(model, 0),
+                "routed": self.routed.get(model, 0),
+            }
+            for model in sorted(set(self.latency_ms) | set(self.routed))
+        }
+
+
+# Global instance
+model_router = ModelRouter()
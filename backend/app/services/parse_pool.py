@@ -0,0 +1,161 @@
+"""Process pool for CPU-heavy parsing that would stall the event loop."""
+
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up() -> None:
+    """Runs once per worker so the first real job doesn't pay for startup."""
+
+
+class ParsePool:
+    """Bounded pool of worker processes for parsing large inputs.
+
+    A thread doesn't help with pure-Python parsing: it holds the GIL, so
+    every stream on the worker stalls just the same. Jobs run in separate
+    processes instead, forked from a forkserver that has the parser
+    imported already. At most ``max_pending`` jobs are in flight; beyond
+    that, or when a job takes longer than ``timeout`` or the pool breaks,
+    the caller's cheaper fallback runs in a thread. A job that timed out
+    keeps its slot until its process is done with it, since a running
+    job can't be stopped.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PARSE_POOL_WORKERS,
+        max_pending: int = settings.PARSE_POOL_MAX_PENDING,
+        timeout: float = settings.PARSE_POOL_TIMEOUT_SECONDS,
+        preload: tuple[str, ...] = ("app.services.code_parser",),
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.preload = list(preload)
+        self.pending = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.errors = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    def start(self, wait: bool = True) -> None:
+        """Fork the workers now rather than on the first large parse.
+
+        With ``wait`` this blocks until the workers have started, so at
+        app startup their imports don't compete with the first requests.
+        """
+        if self.workers <= 0 or self._executor is not None:
+            return
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(self.preload)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context
+        )
+        warm_ups = [self._executor.submit(_warm_up) for _ in range(self.workers)]
+        if wait:
+            _, not_ready = concurrent.futures.wait(
+                warm_ups, timeout=settings.PARSE_POOL_START_TIMEOUT_SECONDS
+            )
+            if not_ready:
+                logger.warning("Parse pool workers are still starting")
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def restart(self) -> None:
+        logger.warning("Parse pool broke; starting a new one")
+        self.stop()
+        # Called while serving, so don't block the event loop
+        self.start(wait=False)
+
+    def release(self, future: asyncio.Future[Any]) -> None:
+        """Free the slot of a job once its process is done with it."""
+        self.pending -= 1
+        if not future.cancelled():
+            # Retrieved even if the caller timed out and stopped waiting
+            future.exception()
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        fallback: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        """``func(*args)`` in a worker process, else ``fallback(*args)`` in a thread.
+
+        ``func`` must be importable by name so it can be pickled. With the
+        pool disabled it runs in a thread instead.
+        """
+        if self._executor is None:
+            # Pool disabled
+            return await asyncio.to_thread(func, *args)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            return await asyncio.to_thread(fallback, *args)
+
+        executor = self._executor
+        try:
+            job = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self.errors += 1
+            self.restart()
+            return await asyncio.to_thread(fallback, *args)
+
+        self.pending += 1
+        future = asyncio.wrap_future(job)
+        future.add_done_callback(self.release)
+        try:
+            # Shielded: a caller that stops waiting leaves the job running
+            result = await asyncio.wait_for(
+                asyncio.shield(future), timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            # Dropped if it hasn't started yet; a running job keeps its slot
+            job.cancel()
+            self.timeouts += 1
+            logger.warning(
+                f"Parse in worker process exceeded {self.timeout}s, using fallback"
+            )
+        except BrokenProcessPool:
+            self.errors += 1
+            # Only the first of the jobs on a broken pool restarts it
+            if self._executor is executor:
+                self.restart()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Parse in worker process failed: {e}")
+        else:
+            self.completed += 1
+            return result
+        return await asyncio.to_thread(fallback, *args)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers if self.enabled else 0,
+            "pending": self.pending,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+# Global instance
+parse_pool = ParsePool()
@@ -0,0 +1,330 @@
+"""Background extraction of code blocks from saved assistant replies."""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, or_, update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.crud_ops.code_block import upsert_code_blocks_async
+from app.models.code_block import CodeBlock
+from app.models.message import Message
+from app.models.reply_outbox import ReplyOutbox
+from app.models.user import User
+from app.services.code_parser import code_parser
+
+logger = logging.getLogger(__name__)
+
+
+async def build_code_blocks(
+    content: str,
+    conversation_id: uuid.UUID,
+    user_id: uuid.UUID,
+    custom_tags: list[str] | None = None,
+) -> list[CodeBlock]:
+    """Extract and tag the code blocks of a reply off the event loop."""
+    # Tags come from the whole reply, so they are the same for every block
+    tags = await asyncio.to_thread(
+        code_parser.extract_tags_from_text, content, custom_tags
+    )
+    now = datetime.utcnow()
+    return [
+        CodeBlock(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            created_at=now,
+            code=block_data["code"],
+            language=block_data["language"],
+            description=block_data.get("description"),
+            tags=tags,
+            imports=block_data.get("metadata", {}).get("imports", []),
+            functions_defined=block_data.get("metadata", {}).get("functions", []),
+            variables_created=block_data.get("metadata", {}).get("variables", []),
+            content_hash=block_data["content_hash"],
+            last_seen_at=now,
+            last_seen_conversation_id=conversation_id,
+        )
+        for block_data in await code_parser.extract_code_blocks_async(content)
+    ]
+
+
+def summarize_blocks(code_blocks: list[CodeBlock]) -> list[dict[str, Any]]:
+    """Payload of the ``code_blocks`` event."""
+    return [
+        {
+            "id": str(code_block.id),
+            "language": code_block.language,
+            "description": code_block.description,
+        }
+        for code_block in code_blocks
+    ]
+
+
+class ReplyPipeline:
+    """Post-process saved replies on a bounded pool of worker tasks.
+
+    Jobs come from the ``ReplyOutbox`` table: the chat route writes a row
+    with the reply and enqueues it here, so the ``done`` event doesn't
+    wait for parsing, tagging and the code block writes. Each job stores
+    the reply's code blocks, links them to the message and deletes its
+    outbox row in one transaction. Blocks the user already has are
+    counted rather than stored again.
+
+    Parsing runs in a thread, or in the parse pool for large blocks, so
+    it doesn't hold up the event loop. A periodic sweep (also run at
+    startup) picks up rows whose claim is older than
+    ``REPLY_PIPELINE_LEASE_SECONDS``: jobs of a worker that died, jobs
+    that didn't fit in the queue, and failed jobs due for another
+    attempt. A worker renews the claim when it takes a job off the
+    queue, and jobs this process holds are never claimed again, so a
+    job that waited in a long queue isn't run twice. Jobs that failed
+    ``REPLY_PIPELINE_MAX_ATTEMPTS`` times stay in the outbox for a
+    person to look at; they are logged and counted in ``stats``.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.REPLY_PIPELINE_WORKERS,
+        queue_size: int = settings.REPLY_PIPELINE_QUEUE_SIZE,
+    ):
+        self.workers = workers
+        self.queue: asyncio.Queue[uuid.UUID] = asyncio.Queue(maxsize=queue_size)
+        # Job id -> result for callers waiting on a job they enqueued
+        self.results: dict[uuid.UUID, asyncio.Future[list[dict[str, Any]]]] = {}
+        # Jobs queued or being processed by this process
+        self.in_flight: set[uuid.UUID] = set()
+        self._tasks: list[asyncio.Task[None]] = []
+        self.processed = 0
+        self.failed = 0
+        self.recovered = 0
+        self.overflowed = 0
+        self.dead = 0
+
+    def enqueue(self, job_id: uuid.UUID) -> asyncio.Future[list[dict[str, Any]]] | None:
+        """Queue a job; the future resolves to its blocks.
+
+        Never waits: with the queue full the job is left in the outbox for
+        the sweep and None is returned.
+        """
+        future = self.results.get(job_id)
+        if future is not None:
+            return future
+        if job_id in self.in_flight:
+            # Already being processed; nobody is waiting on it here
+            return None
+        try:
+            self.queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            self.overflowed += 1
+            logger.warning(
+                f"Reply pipeline queue is full, leaving job {job_id} to the sweep"
+            )
+            return None
+        self.in_flight.add(job_id)
+        future = asyncio.get_running_loop().create_future()
+        self.results[job_id] = future
+        return future
+
+    async def process(self, job_id: uuid.UUID) -> list[dict[str, Any]]:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            job = await session.get(ReplyOutbox, job_id)
+            if job is None:
+                # Finished by another worker after its lease ran out
+                return []
+            # The job may have waited in the queue; keep the sweep off it
+            job.claimed_at = datetime.utcnow()
+            message = await session.get(Message, job.message_id)
+            if message is None:
+                # Deleted since, which deletes the job too
+                return []
+            custom_tags = await session.scalar(
+                select(User.custom_tags).where(User.id == job.user_id)
+            )
+            # Don't hold a pooled connection while parsing
+            await session.commit()
+
+            code_blocks = await build_code_blocks(
+                message.content, job.conversation_id, job.user_id, custom_tags
+            )
+            # Code the user already has links to the stored block
+            stored_ids = await upsert_code_blocks_async(
+                session=session, code_blocks=code_blocks
+            )
+            for code_block, stored_id in zip(code_blocks, stored_ids, strict=True):
+                code_block.id = stored_id
+            code_blocks = list({block.id: block for block in code_blocks}.values())
+            if code_blocks:
+                # JSON column, so the ids are stored as strings
+                message.code_block_ids = [str(block.id) for block in code_blocks]  # type: ignore[misc]
+                session.add(message)
+            # Matches no row if another worker finished the job meanwhile
+            await session.execute(
+                delete(ReplyOutbox).where(col(ReplyOutbox.id) == job_id)
+            )
+            await session.commit()
+            return summarize_blocks(code_blocks)
+
+    async def record_failure(self, job_id: uuid.UUID, error: Exception) -> None:
+        """Count a failed attempt; the sweep retries it after the lease."""
+        async with AsyncSession(async_engine) as session:
+            attempts = await session.scalar(
+                update(ReplyOutbox)
+                .where(col(ReplyOutbox.id) == job_id)
+                .values(
+                    attempts=ReplyOutbox.attempts + 1,
+                    last_error=str(error)[:500],
+                    claimed_at=datetime.utcnow(),
+                )
+                .returning(col(ReplyOutbox.attempts))
+            )
+            await session.commit()
+        if attempts is not None and attempts >= settings.REPLY_PIPELINE_MAX_ATTEMPTS:
+            logger.error(
+                f"Reply job {job_id} failed {attempts} times and won't be retried: {error}"
+            )
+
+    async def work(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            future = self.results.pop(job_id, None)
+            try:
+                blocks = await self.process(job_id)
+            except Exception as e:
+                self.failed += 1
+                logger.exception(f"Post-processing of reply job {job_id} failed: {e}")
+                try:
+                    await self.record_failure(job_id, e)
+                except Exception as record_error:
+                    logger.error(
+                        f"Could not record failure of job {job_id}: {record_error}"
+                    )
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                    # Retrieved even if the waiter has gone away
+                    future.exception()
+            else:
+                self.processed += 1
+                if future is not None and not future.done():
+                    future.set_result(blocks)
+            finally:
+                self.in_flight.discard(job_id)
+                self.queue.task_done()
+
+    async def recover(self) -> int:
+        """Claim and enqueue jobs whose lease has expired."""
+        expired = datetime.utcnow() - timedelta(
+            seconds=settings.REPLY_PIPELINE_LEASE_SECONDS
+        )
+        room = self.queue.maxsize - self.queue.qsize()
+        if room <= 0:
+            return 0
+
+        async with AsyncSession(async_engine) as session:
+            # Claiming in one UPDATE keeps several workers from taking the same job
+            claimable = (
+                select(ReplyOutbox.id)
+                .where(
+                    or_(
+                        col(ReplyOutbox.claimed_at).is_(None),
+                        col(ReplyOutbox.claimed_at) < expired,
+                    ),
+                    ReplyOutbox.attempts < settings.REPLY_PIPELINE_MAX_ATTEMPTS,
+                )
+                .order_by(col(ReplyOutbox.created_at))
+                .limit(room)
+                .with_for_update(skip_locked=True)
+            )
+            if self.in_flight:
+                claimable = claimable.where(col(ReplyOutbox.id).not_in(self.in_flight))
+            result = await session.execute(
+                update(ReplyOutbox)
+                .where(col(ReplyOutbox.id).in_(claimable.scalar_subquery()))
+                .values(claimed_at=datetime.utcnow())
+                .returning(col(ReplyOutbox.id))
+            )
+            job_ids = list(result.scalars().all())
+            await session.commit()
+            await self.count_dead(session)
+
+        for job_id in job_ids:
+            self.enqueue(job_id)
+        if job_ids:
+            self.recovered += len(job_ids)
+            logger.info(f"Re-enqueued {len(job_ids)} unfinished reply jobs")
+        return len(job_ids)
+
+    async def count_dead(self, session: AsyncSession) -> None:
+        """Count jobs out of attempts, warning when there are new ones."""
+        dead = (
+            await session.scalar(
+                select(func.count())
+                .select_from(ReplyOutbox)
+                .where(ReplyOutbox.attempts >= settings.REPLY_PIPELINE_MAX_ATTEMPTS)
+            )
+            or 0
+        )
+        if dead > self.dead:
+            logger.warning(f"{dead} reply jobs in the outbox ran out of attempts")
+        self.dead = dead
+
+    async def sweep(self) -> None:
+        """Recover abandoned jobs periodically until cancelled."""
+        while True:
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Reply outbox sweep failed: {e}")
+            await asyncio.sleep(settings.REPLY_PIPELINE_SWEEP_SECONDS)
+
+    def start(self) -> None:
+        """Start the workers and the sweep on the running event loop."""
+        if self._tasks:
+            return
+        # A queue from an earlier event loop can't be used on this one;
+        # the jobs it held are still in the outbox
+        self.queue = asyncio.Queue(maxsize=self.queue.maxsize)
+        self.results = {}
+        self.in_flight = set()
+        self._tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self.sweep()))
+
+    async def stop(self) -> None:
+        """Stop the workers; unfinished jobs stay in the outbox."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait(
+        self, future: asyncio.Future[list[dict[str, Any]]] | None, timeout: float
+    ) -> list[dict[str, Any]] | None:
+        """The job's code blocks, or None if it failed, took too long or wasn't queued."""
+        if future is None:
+            return None
+        try:
+            # Shielded: a caller giving up must not cancel the job's result
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except Exception:
+            # Timed out or failed; the outbox row keeps the job for a retry
+            return None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "recovered": self.recovered,
+            "overflowed": self.overflowed,
+            "dead": self.dead,
+        }
+
+
+# Global instance
+reply_pipeline = ReplyPipeline()
@@ -0,0 +1,190 @@
+"""Content-addressed cache for deterministic LLM completions."""
+
+import hashlib
+import json
+import logging
+import uuid
+from collections.abc import AsyncGenerator
+from datetime import datetime, timedelta
+from typing import cast
+
+from sqlmodel import Session, col, delete, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.completion_cache import CompletionCache
+from app.services.llm_service import ChatMessage, LLMConfig
+
+logger = logging.getLogger(__name__)
+
+# Size of the synthetic deltas used when replaying a cached answer as a stream
+REPLAY_CHUNK_SIZE = 32
+
+
+class ResponseCache:
+    """Two-tier (in-memory LRU + Postgres) cache of completion results.
+
+    Entries are addressed by a hash of the user id, the normalized message
+    list and the generation parameters, so a cached answer is only ever
+    returned to the user who produced it and only for an identical prompt.
+    Both tiers are bounded by size: the memory tier by total bytes across
+    all users, the database tier by bytes per user (least recently used
+    entries are dropped first).
+    """
+
+    def __init__(self) -> None:
+        self.memory: TTLCache[str, str] = TTLCache(
+            settings.RESPONSE_CACHE_MEMORY_MAX_ENTRIES,
+            ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+            max_weight=settings.RESPONSE_CACHE_MEMORY_MAX_BYTES,
+            weigher=lambda content: len(content.encode()),
+        )
+
+    @staticmethod
+    def is_cacheable(config: LLMConfig, opt_in: bool = False) -> bool:
+        """Only deterministic requests (or explicit opt-ins) are cached."""
+        return settings.RESPONSE_CACHE_ENABLED and (opt_in or config.temperature == 0)
+
+    @staticmethod
+    def make_key(
+        user_id: uuid.UUID, messages: list[ChatMessage], config: LLMConfig
+    ) -> str:
+        """Hash the user, normalized message list and generation parameters."""
+        payload = {
+            "user_id": str(user_id),
+            "messages": [
+                {"role": str(msg.role).lower(), "content": msg.content.strip()}
+                for msg in messages
+            ],
+            "config": config.model_dump(mode="json", exclude={"stream", "failover"}),
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def get(self, session: Session, key: str) -> str | None:
+        """Look a key up in memory first, then in the database."""
+        content = self.memory.get(key)
+        if content is not None:
+            return content
+
+        entry = session.get(CompletionCache, key)
+        if entry is None:
+            return None
+
+        expires_before = datetime.utcnow() - timedelta(
+            seconds=settings.RESPONSE_CACHE_TTL_SECONDS
+        )
+        if entry.created_at < expires_before:
+            session.delete(entry)
+            session.commit()
+            return None
+
+        entry.hit_count += 1
+        entry.last_used_at = datetime.utcnow()
+        session.add(entry)
+        session.commit()
+
+        self.memory.set(key, entry.content)
+        return entry.content
+
+    async def get_async(self, session: AsyncSession, key: str) -> str | None:
+        """Async variant of ``get``."""
+        # run_sync hands over the sync session, a sqlmodel Session
+        return await session.run_sync(
+            lambda sync_session: self.get(cast(Session, sync_session), key)
+        )
+
+    def set(
+        self,
+        session: Session,
+        key: str,
+        user_id: uuid.UUID,
+        config: LLMConfig,
+        content: str,
+    ) -> None:
+        """Store a completion in both tiers and enforce the per-user budget."""
+        if not content:
+            return
+
+        self.memory.set(key, content)
+
+        size_bytes = len(content.encode())
+        if size_bytes > settings.RESPONSE_CACHE_USER_MAX_BYTES:
+            return
+
+        now = datetime.utcnow()
+        entry = session.get(CompletionCache, key) or CompletionCache(
+            key=key,
+            user_id=user_id,
+            provider=config.provider.value,
+            model=config.model,
+            content=content,
+            created_at=now,
+        )
+        entry.content = content
+        entry.size_bytes = size_bytes
+        entry.last_used_at = now
+        session.add(entry)
+        session.commit()
+
+        self._evict_over_budget(session, user_id)
+
+    async def set_async(
+        self,
+        session: AsyncSession,
+        key: str,
+        user_id: uuid.UUID,
+        config: LLMConfig,
+        content: str,
+    ) -> None:
+        """Async variant of ``set``."""
+        await session.run_sync(
+            lambda sync_session: self.set(
+                cast(Session, sync_session), key, user_id, config, content
+            )
+        )
+
+    def _evict_over_budget(self, session: Session, user_id: uuid.UUID) -> None:
+        """Drop a user's least recently used entries beyond their byte budget."""
+        total = session.exec(
+            select(func.coalesce(func.sum(col(CompletionCache.size_bytes)), 0)).where(
+                CompletionCache.user_id == user_id
+            )
+        ).one()
+        if total <= settings.RESPONSE_CACHE_USER_MAX_BYTES:
+            return
+
+        rows = session.exec(
+            select(CompletionCache.key, CompletionCache.size_bytes)
+            .where(CompletionCache.user_id == user_id)
+            .order_by(col(CompletionCache.last_used_at).desc())
+        ).all()
+
+        kept = 0
+        stale_keys = []
+        for key, size_bytes in rows:
+            kept += size_bytes
+            if kept > settings.RESPONSE_CACHE_USER_MAX_BYTES:
+                stale_keys.append(key)
+
+        if stale_keys:
+            session.execute(
+                delete(CompletionCache).where(col(CompletionCache.key).in_(stale_keys))
+            )
+            session.commit()
+            for key in stale_keys:
+                self.memory.pop(key)
+            logger.info(
+                f"Evicted {len(stale_keys)} cached completions for user {user_id}"
+            )
+
+    @staticmethod
+    async def replay(content: str) -> AsyncGenerator[str, None]:
+        """Re-emit a cached answer as a sequence of stream deltas."""
+        for start in range(0, len(content), REPLAY_CHUNK_SIZE):
+            yield content[start : start + REPLAY_CHUNK_SIZE]
+
+
+# Global instance
+response_cache = ResponseCache()
@@ -0,0 +1,132 @@
+"""Encode chat events as Server-Sent Events, batching small content deltas."""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(event: dict[str, Any], event_id: int | None = None) -> str:
+    """One SSE frame for an event, optionally with an ``id:`` field."""
+    data = json.dumps(event, separators=(",", ":"))
+    if event_id is None:
+        return f"data: {data}\n\n"
+    return f"id: {event_id}\ndata: {data}\n\n"
+
+
+class SSEFramer:
+    """Merge consecutive ``content`` events into fewer, larger frames.
+
+    Providers emit deltas of a few characters each; sending every one as
+    its own event costs a JSON encode, a write and the SSE envelope per
+    delta. Deltas are buffered until ``max_bytes`` of text (counted in
+    characters) is pending or ``window_ms`` has passed since the first
+    buffered delta, whichever comes first. Any other event flushes the
+    buffer and is sent as is, so event order is preserved. A window of 0
+    disables batching.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = settings.SSE_FRAME_WINDOW_MS,
+        max_bytes: int = settings.SSE_FRAME_MAX_BYTES,
+    ):
+        self.window = window_ms / 1000
+        self.max_bytes = max_bytes
+
+    async def frames(
+        self, events: AsyncIterator[dict[str, Any]]
+    ) -> AsyncGenerator[str, None]:
+        """Yield encoded frames for ``events``."""
+        merged = self.merge(events)
+        try:
+            async for event in merged:
+                yield encode_event(event)
+        finally:
+            await merged.aclose()
+
+    async def merge(
+        self,
+        events: AsyncIterator[dict[str, Any]],
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """Yield ``events`` with consecutive content deltas merged."""
+        if self.window <= 0:
+            async for event in events:
+                yield event
+            return
+
+        loop = asyncio.get_running_loop()
+        ready: deque[dict[str, Any]] = deque()
+        pending: list[str] = []
+        pending_bytes = 0
+        timer: asyncio.TimerHandle | None = None
+        wakeup: asyncio.Future[None] | None = None
+        finished = False
+        error: BaseException | None = None
+
+        def wake() -> None:
+            if wakeup is not None and not wakeup.done():
+                wakeup.set_result(None)
+
+        def flush() -> None:
+            nonlocal pending, pending_bytes, timer
+            if timer is not None:
+                timer.cancel()
+                timer = None
+            if pending:
+                ready.append({"type": "content", "content": "".join(pending)})
+                pending = []
+                pending_bytes = 0
+                wake()
+
+        async def read() -> None:
+            # Buffering is done by a single reader task plus a timer, so a
+            # delta costs a list append rather than a wait per event
+            nonlocal pending_bytes, timer, finished, error
+            try:
+                async for event in events:
+                    if event.get("type") == "content":
+                        pending.append(event["content"])
+                        pending_bytes += len(event["content"])
+                        if pending_bytes >= self.max_bytes:
+                            flush()
+                        elif timer is None:
+                            timer = loop.call_later(self.window, flush)
+                    else:
+                        flush()
+                        ready.append(event)
+                        wake()
+            except Exception as e:
+                error = e
+            finally:
+                flush()
+                finished = True
+                wake()
+
+        reader = loop.create_task(read())
+        try:
+            while True:
+                while ready:
+                    yield ready.popleft()
+                if finished:
+                    break
+                wakeup = loop.create_future()
+                await wakeup
+            if error is not None:
+                raise error
+        finally:
+            if not reader.done():
+                reader.cancel()
+                await asyncio.gather(reader, return_exceptions=True)
+            if hasattr(events, "aclose"):
+                await events.aclose()
+
+
+# Global instance
+sse_framer = SSEFramer()
@@ -0,0 +1,202 @@
+"""Background maintenance of rolling conversation summaries."""
+
+import logging
+import time
+import uuid
+
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models.conversation import Conversation
+from app.models.message import Message
+from app.models.usage import UsageEvent
+from app.models.user import User
+from app.services.llm_scheduler import llm_scheduler
+from app.services.llm_service import (
+    ChatMessage,
+    LLMConfig,
+    LLMProvider,
+    LLMUsage,
+    llm_service,
+)
+from app.services.model_router import FAST, MODEL_TIERS, ModelRouter
+from app.services.token_estimator import estimate_tokens
+from app.services.usage_recorder import usage_recorder
+
+logger = logging.getLogger(__name__)
+
+# Summaries use the fast tier of the first of these the user has a key for
+SUMMARY_PROVIDERS = [LLMProvider.OPENAI, LLMProvider.ANTHROPIC]
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a data analysis conversation between a user "
+    "and an assistant. Merge the existing summary with the new messages into one "
+    "updated summary. Keep the user's goals, datasets, column and variable names, "
+    "decisions, results and the purpose of any code that was written. Drop "
+    "pleasantries and repeated content. Answer with the summary only, in at most "
+    "{max_words} words."
+)
+
+# Longest excerpt of a single message included in a summarization prompt
+MAX_MESSAGE_CHARS = 4000
+
+
+class ConversationSummarizer:
+    """Incrementally fold older messages into ``Conversation.summary``.
+
+    Once a conversation has ``CONVERSATION_SUMMARY_TRIGGER`` messages beyond
+    the summary and the recent tail that is always sent verbatim, the oldest
+    of them are summarized together with the previous summary. Runs happen
+    after the response has been sent, with their own database session.
+    """
+
+    def __init__(self) -> None:
+        self._running: set[uuid.UUID] = set()
+
+    @staticmethod
+    def pick_provider(user: User) -> LLMProvider | None:
+        """First summarization provider the user has an API key for."""
+        for provider in SUMMARY_PROVIDERS:
+            if (user.api_keys or {}).get(provider.value):
+                return provider
+        return None
+
+    @staticmethod
+    def pick_config(provider: LLMProvider, messages: list[ChatMessage]) -> LLMConfig:
+        """The provider's cheapest fast-tier model for this prompt."""
+        prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+        model = min(
+            MODEL_TIERS[provider.value][FAST],
+            key=lambda model: ModelRouter.estimated_cost(
+                model, prompt_tokens, settings.CONVERSATION_SUMMARY_MAX_TOKENS
+            ),
+        )
+        return LLMConfig(
+            provider=provider,
+            model=model,
+            temperature=0.2,
+            max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+            stream=False,
+        )
+
+    @staticmethod
+    def needs_update(conversation: Conversation) -> bool:
+        """Whether enough unsummarized messages have accumulated."""
+        unsummarized = conversation.message_count - conversation.summary_message_count
+        return unsummarized >= (
+            settings.CONVERSATION_SUMMARY_TRIGGER
+            + settings.CONVERSATION_SUMMARY_KEEP_RECENT
+        )
+
+    @staticmethod
+    def build_prompt(summary: str | None, messages: list[Message]) -> list[ChatMessage]:
+        """Prompt asking the model to merge new messages into the summary."""
+        max_words = settings.CONVERSATION_SUMMARY_MAX_TOKENS * 3 // 4
+        transcript = "\n\n".join(
+            f"{message.role.upper()}: {message.content[:MAX_MESSAGE_CHARS]}"
+            for message in messages
+        )
+        return [
+            ChatMessage(
+                role="system", content=SUMMARY_INSTRUCTIONS.format(max_words=max_words)
+            ),
+            ChatMessage(
+                role="user",
+                content=(
+                    f"Existing summary:\n{summary or '(none yet)'}\n\n"
+                    f"New messages:\n{transcript}"
+                ),
+            ),
+        ]
+
+    async def maybe_update(
+        self, conversation_id: uuid.UUID, user_id: uuid.UUID
+    ) -> None:
+        """Update a conversation's summary if it has fallen behind."""
+        if conversation_id in self._running:
+            return
+        self._running.add(conversation_id)
+
+        try:
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                conversation = await session.get(Conversation, conversation_id)
+                user = await session.get(User, user_id)
+                if not conversation or not user or not self.needs_update(conversation):
+                    return
+
+                provider = self.pick_provider(user)
+                if not provider:
+                    return
+
+                statement = select(Message).where(
+                    Message.conversation_id == conversation_id
+                )
+                if conversation.summary_through:
+                    statement = statement.where(
+                        col(Message.created_at) > conversation.summary_through
+                    )
+                unsummarized = list(
+                    (
+                        await session.exec(statement.order_by(col(Message.created_at)))
+                    ).all()
+                )
+
+                batch = unsummarized[
+                    : -settings.CONVERSATION_SUMMARY_KEEP_RECENT or None
+                ]
+                batch = batch[: settings.CONVERSATION_SUMMARY_BATCH_SIZE]
+                if not batch:
+                    return
+
+                # Don't hold a pooled connection while the LLM writes the summary
+                await session.commit()
+
+                messages = self.build_prompt(conversation.summary, batch)
+                config = self.pick_config(provider, messages)
+                usage = LLMUsage(provider=provider.value, model=config.model)
+                started_at = time.perf_counter()
+                # Summaries count against the same limits as the user's chats
+                async with llm_scheduler.slot(user.id, provider.value) as ticket:
+                    summary = await llm_service.create_chat_completion(
+                        user=user,
+                        messages=messages,
+                        config=config,
+                        usage=usage,
+                        ticket=ticket,
+                    )
+                usage_recorder.record(
+                    UsageEvent(
+                        user_id=user.id,
+                        conversation_id=conversation_id,
+                        provider=usage.provider or "",
+                        model=usage.model or "",
+                        input_tokens=usage.input_tokens,
+                        output_tokens=usage.output_tokens,
+                        cached_input_tokens=usage.cached_input_tokens,
+                        cache_write_input_tokens=usage.cache_write_input_tokens,
+                        latency_ms=int((time.perf_counter() - started_at) * 1000),
+                    )
+                )
+
+                conversation.summary = summary.strip()
+                conversation.summary_message_count += len(batch)
+                conversation.summary_through = batch[-1].created_at
+                session.add(conversation)
+                await session.commit()
+
+                logger.info(
+                    f"Summarized {len(batch)} messages of conversation {conversation_id} "
+                    f"with {config.model}"
+                )
+        except Exception as e:
+            logger.warning(
+                f"Failed to update summary for conversation {conversation_id}: {e}"
+            )
+        finally:
+            self._running.discard(conversation_id)
+
+
+# Global instance
+conversation_summarizer = ConversationSummarizer()
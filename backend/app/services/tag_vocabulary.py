@@ -0,0 +1,415 @@
+"""Default vocabulary for tagging code blocks.
+
+Terms are matched case-insensitively as whole words, and a space also
+matches any run of whitespace. Very short or common words ("go", "r")
+are left out because they would tag ordinary prose.
+"""
+
+DEFAULT_TAGS = (
+    # Data wrangling
+    "pandas",
+    "numpy",
+    "polars",
+    "dask",
+    "pyarrow",
+    "arrow",
+    "vaex",
+    "modin",
+    "xarray",
+    "scipy",
+    "statsmodels",
+    "sympy",
+    "numba",
+    "cython",
+    "duckdb",
+    "pyspark",
+    "spark",
+    "koalas",
+    "ray",
+    "joblib",
+    "multiprocessing",
+    "openpyxl",
+    "xlsxwriter",
+    "xlrd",
+    "tabulate",
+    # Visualization
+    "matplotlib",
+    "seaborn",
+    "plotly",
+    "bokeh",
+    "altair",
+    "holoviews",
+    "ggplot",
+    "plotnine",
+    "dash",
+    "streamlit",
+    "gradio",
+    "panel",
+    "folium",
+    "geopandas",
+    "shapely",
+    "cartopy",
+    "networkx",
+    "graphviz",
+    "wordcloud",
+    "visualization",
+    "dashboard",
+    "chart",
+    "histogram",
+    "scatter plot",
+    "heatmap",
+    "box plot",
+    "bar chart",
+    "line chart",
+    "pie chart",
+    # Machine learning
+    "sklearn",
+    "scikit-learn",
+    "xgboost",
+    "lightgbm",
+    "catboost",
+    "tensorflow",
+    "keras",
+    "pytorch",
+    "torch",
+    "jax",
+    "flax",
+    "mxnet",
+    "onnx",
+    "huggingface",
+    "transformers",
+    "datasets",
+    "tokenizers",
+    "sentence-transformers",
+    "spacy",
+    "nltk",
+    "gensim",
+    "textblob",
+    "opencv",
+    "pillow",
+    "scikit-image",
+    "albumentations",
+    "torchvision",
+    "optuna",
+    "hyperopt",
+    "mlflow",
+    "wandb",
+    "tensorboard",
+    "shap",
+    "lime",
+    "imbalanced-learn",
+    "prophet",
+    "pmdarima",
+    "sktime",
+    "tsfresh",
+    "machine learning",
+    "deep learning",
+    "reinforcement learning",
+    "neural network",
+    "regression",
+    "linear regression",
+    "logistic regression",
+    "classification",
+    "clustering",
+    "k-means",
+    "random forest",
+    "gradient boosting",
+    "decision tree",
+    "support vector machine",
+    "naive bayes",
+    "pca",
+    "dimensionality reduction",
+    "feature engineering",
+    "feature selection",
+    "cross-validation",
+    "hyperparameter tuning",
+    "grid search",
+    "overfitting",
+    "embedding",
+    "embeddings",
+    "fine-tuning",
+    "transfer learning",
+    "nlp",
+    "natural language processing",
+    "computer vision",
+    "image classification",
+    "object detection",
+    "segmentation",
+    "sentiment analysis",
+    "topic modeling",
+    "recommendation",
+    "anomaly detection",
+    "time series",
+    "forecasting",
+    "arima",
+    # Statistics
+    "statistics",
+    "hypothesis testing",
+    "t-test",
+    "chi-square",
+    "anova",
+    "p-value",
+    "confidence interval",
+    "correlation",
+    "covariance",
+    "standard deviation",
+    "variance",
+    "median",
+    "percentile",
+    "quantile",
+    "distribution",
+    "normal distribution",
+    "bootstrap",
+    "bayesian",
+    "monte carlo",
+    "sampling",
+    "a/b test",
+    "ab testing",
+    # Data work
+    "data",
+    "analysis",
+    "data analysis",
+    "exploratory data analysis",
+    "eda",
+    "data cleaning",
+    "cleaning",
+    "transformation",
+    "processing",
+    "preprocessing",
+    "normalization",
+    "standardization",
+    "imputation",
+    "missing values",
+    "outliers",
+    "deduplication",
+    "aggregation",
+    "groupby",
+    "pivot",
+    "pivot table",
+    "merge",
+    "join",
+    "reshape",
+    "resample",
+    "rolling window",
+    "etl",
+    "elt",
+    "pipeline",
+    "data pipeline",
+    "data validation",
+    "schema",
+    "data quality",
+    "feature store",
+    # Files and formats
+    "csv",
+    "tsv",
+    "json",
+    "jsonl",
+    "xml",
+    "yaml",
+    "toml",
+    "parquet",
+    "avro",
+    "orc",
+    "feather",
+    "hdf5",
+    "excel",
+    "xlsx",
+    "pickle",
+    "sqlite",
+    "file",
+    "zip",
+    "gzip",
+    "pdf",
+    "html",
+    "markdown",
+    "regex",
+    "regular expression",
+    # Databases and storage
+    "database",
+    "sql",
+    "postgresql",
+    "postgres",
+    "mysql",
+    "mariadb",
+    "sql server",
+    "oracle",
+    "snowflake",
+    "bigquery",
+    "redshift",
+    "clickhouse",
+    "mongodb",
+    "redis",
+    "elasticsearch",
+    "cassandra",
+    "dynamodb",
+    "neo4j",
+    "sqlalchemy",
+    "psycopg",
+    "psycopg2",
+    "pymongo",
+    "alembic",
+    "orm",
+    "query",
+    "index",
+    "transaction",
+    "s3",
+    "gcs",
+    "azure blob",
+    "data warehouse",
+    "data lake",
+    # Web and APIs
+    "api",
+    "rest",
+    "rest api",
+    "graphql",
+    "grpc",
+    "websocket",
+    "webhook",
+    "http",
+    "requests",
+    "httpx",
+    "aiohttp",
+    "urllib",
+    "fastapi",
+    "flask",
+    "django",
+    "starlette",
+    "pydantic",
+    "uvicorn",
+    "gunicorn",
+    "celery",
+    "beautifulsoup",
+    "bs4",
+    "scrapy",
+    "selenium",
+    "playwright",
+    "web scraping",
+    "scraping",
+    "crawler",
+    "oauth",
+    "jwt",
+    "authentication",
+    "pagination",
+    "rate limiting",
+    # Python language and tooling
+    "python",
+    "asyncio",
+    "async",
+    "threading",
+    "concurrency",
+    "generator",
+    "decorator",
+    "context manager",
+    "dataclass",
+    "dataclasses",
+    "typing",
+    "type hints",
+    "list comprehension",
+    "lambda",
+    "closure",
+    "iterator",
+    "exception handling",
+    "logging",
+    "argparse",
+    "click",
+    "typer",
+    "pathlib",
+    "os",
+    "sys",
+    "subprocess",
+    "itertools",
+    "functools",
+    "collections",
+    "datetime",
+    "dateutil",
+    "pytz",
+    "zoneinfo",
+    "unittest",
+    "pytest",
+    "mock",
+    "hypothesis",
+    "tox",
+    "poetry",
+    "pip",
+    "conda",
+    "virtualenv",
+    "venv",
+    "jupyter",
+    "notebook",
+    "ipython",
+    "debugging",
+    "profiling",
+    "performance",
+    "optimization",
+    "vectorization",
+    "caching",
+    "memoization",
+    "recursion",
+    "sorting",
+    "algorithm",
+    "data structure",
+    "hash map",
+    "binary search",
+    "dynamic programming",
+    "graph",
+    # Other languages and platforms
+    "javascript",
+    "typescript",
+    "node.js",
+    "react",
+    "java",
+    "scala",
+    "kotlin",
+    "rust",
+    "golang",
+    "c++",
+    "c#",
+    "julia",
+    "matlab",
+    "bash",
+    "shell",
+    "powershell",
+    "docker",
+    "kubernetes",
+    "terraform",
+    "aws",
+    "azure",
+    "gcp",
+    "lambda function",
+    "airflow",
+    "dagster",
+    "prefect",
+    "dbt",
+    "kafka",
+    "rabbitmq",
+    "git",
+    "github actions",
+    "ci/cd",
+    # Business and domain analytics
+    "revenue",
+    "sales",
+    "churn",
+    "retention",
+    "cohort",
+    "cohort analysis",
+    "funnel",
+    "conversion rate",
+    "customer lifetime value",
+    "ltv",
+    "kpi",
+    "metrics",
+    "forecast",
+    "budget",
+    "inventory",
+    "pricing",
+    "marketing",
+    "finance",
+    "stock",
+    "portfolio",
+    "risk",
+    "fraud detection",
+    "geospatial",
+    "survey",
+    "report",
+    "reporting",
+)
@@ -0,0 +1,51 @@
+"""Cheap, dependency-free prompt size estimates for LLM context budgeting."""
+
+# Rough average for English prose and code with BPE tokenizers
+CHARS_PER_TOKEN = 4
+
+# Per-message framing overhead (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Context window sizes, matched by longest model-name prefix
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4-1106": 128_000,
+    "gpt-4-0125": 128_000,
+    "gpt-4-32k": 32_768,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 128_000,
+    "o3": 200_000,
+    "claude-": 200_000,
+    "mock-": 128_000,
+}
+DEFAULT_CONTEXT_WINDOW = 8_192
+
+# Output tokens reserved when the request does not set max_tokens
+DEFAULT_OUTPUT_RESERVE = 4_096
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the prompt tokens a single message will consume."""
+    return (
+        len(text) + CHARS_PER_TOKEN - 1
+    ) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def get_context_window(model: str) -> int:
+    """Get the context window of a model, falling back to a conservative default."""
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def get_prompt_budget(
+    model: str, max_tokens: int | None, cap: int | None = None
+) -> int:
+    """Tokens available for the prompt once the completion is reserved."""
+    budget = get_context_window(model) - (max_tokens or DEFAULT_OUTPUT_RESERVE)
+    if cap is not None:
+        budget = min(budget, cap)
+    return max(budget, 0)
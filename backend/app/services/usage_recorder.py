@@ -0,0 +1,177 @@
+"""Batched writer for the LLM usage ledger and its daily rollups."""
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.usage import UsageDaily, UsageEvent
+
+logger = logging.getLogger(__name__)
+
+
+class UsageRecorder:
+    """Buffer usage events in memory and write them in batches.
+
+    Chat routes call ``record`` (cheap, never touches the database). A
+    background loop flushes the buffer every ``USAGE_FLUSH_INTERVAL_SECONDS``
+    or as soon as ``USAGE_FLUSH_BATCH_SIZE`` events are waiting. Each flush
+    inserts the events and upserts the matching ``UsageDaily`` rows in one
+    transaction, so the rollups read by ``/settings/api-usage`` never lag the
+    ledger and no request ever updates a shared row directly.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: list[UsageEvent] = []
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._lock = asyncio.Lock()
+
+    def record(self, event: UsageEvent) -> None:
+        """Queue a usage event for the next flush."""
+        if len(self._buffer) >= settings.USAGE_BUFFER_MAX_EVENTS:
+            logger.warning("Usage buffer full, dropping event")
+            return
+        self._buffer.append(event)
+        if len(self._buffer) >= settings.USAGE_FLUSH_BATCH_SIZE:
+            self._wakeup.set()
+
+    @staticmethod
+    def rollup(events: list[UsageEvent]) -> list[dict[str, Any]]:
+        """Aggregate events into UsageDaily increments."""
+        totals: dict[tuple[uuid.UUID, date, str, str], dict[str, int]] = defaultdict(
+            lambda: {
+                "request_count": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cached_input_tokens": 0,
+                "latency_ms_total": 0,
+            }
+        )
+        for event in events:
+            row = totals[
+                (event.user_id, event.created_at.date(), event.provider, event.model)
+            ]
+            row["request_count"] += 1
+            row["input_tokens"] += event.input_tokens
+            row["output_tokens"] += event.output_tokens
+            row["cached_input_tokens"] += event.cached_input_tokens
+            row["latency_ms_total"] += event.latency_ms
+
+        now = datetime.utcnow()
+        return [
+            {
+                "user_id": user_id,
+                "day": day,
+                "provider": provider,
+                "model": model,
+                "updated_at": now,
+                **counters,
+            }
+            for (user_id, day, provider, model), counters in totals.items()
+        ]
+
+    @staticmethod
+    def write(events: list[UsageEvent]) -> None:
+        """Insert events and upsert their rollups in a single transaction."""
+        rows = UsageRecorder.rollup(events)
+        statement = insert(UsageDaily).values(rows)
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "day", "provider", "model"],
+            set_={
+                "request_count": UsageDaily.request_count + excluded.request_count,
+                "input_tokens": UsageDaily.input_tokens + excluded.input_tokens,
+                "output_tokens": UsageDaily.output_tokens + excluded.output_tokens,
+                "cached_input_tokens": UsageDaily.cached_input_tokens
+                + excluded.cached_input_tokens,
+                "latency_ms_total": UsageDaily.latency_ms_total
+                + excluded.latency_ms_total,
+                "updated_at": excluded.updated_at,
+            },
+        )
+
+        with Session(engine) as session:
+            session.add_all(events)
+            session.execute(statement)
+            session.commit()
+
+    @staticmethod
+    def write_each(events: list[UsageEvent]) -> list[UsageEvent]:
+        """Write events one at a time, dropping any the database rejects.
+
+        Returns the events a transient error left unwritten.
+        """
+        for index, event in enumerate(events):
+            try:
+                UsageRecorder.write([event])
+            except (DataError, IntegrityError) as e:
+                logger.error(f"Dropping usage event for user {event.user_id}: {e}")
+            except Exception as e:
+                logger.error(f"Failed to write {len(events) - index} usage events: {e}")
+                return events[index:]
+        return []
+
+    async def flush(self) -> None:
+        """Write everything buffered so far."""
+        async with self._lock:
+            if not self._buffer:
+                return
+            events, self._buffer = self._buffer, []
+            try:
+                await asyncio.to_thread(self.write, events)
+            except (DataError, IntegrityError):
+                # Retrying won't fix a bad event (one for a since deleted
+                # user, say); write the batch event by event to drop it
+                self._requeue(await asyncio.to_thread(self.write_each, events))
+            except Exception as e:
+                logger.error(f"Failed to write {len(events)} usage events: {e}")
+                self._requeue(events)
+
+    def _requeue(self, events: list[UsageEvent]) -> None:
+        """Keep events for the next flush as long as there is room."""
+        room = settings.USAGE_BUFFER_MAX_EVENTS - len(self._buffer)
+        self._buffer[:0] = events[: max(room, 0)]
+
+    async def run(self) -> None:
+        """Flush periodically until cancelled."""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.USAGE_FLUSH_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background flush loop on the running event loop."""
+        if self._task is None or self._task.done():
+            # asyncio primitives belong to the loop that first waits on them
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Global instance
+usage_recorder = UsageRecorder()
@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def db() -> None:
+    """Core unit tests run without a database."""
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from app.core.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_evicts_least_recently_used() -> None:
+    evicted: list[tuple[str, int]] = []
+    lru: TTLCache[str, int] = TTLCache(2, on_evict=lambda k, v: evicted.append((k, v)))
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+
+    lru.set("c", 3)
+
+    assert "b" not in lru
+    assert list(lru) == ["a", "c"]
+    assert evicted == [("b", 2)]
+    assert lru.stats()["evictions"] == 1
+
+
+def test_entries_expire(clock: list[float]) -> None:
+    ttl: TTLCache[str, int] = TTLCache(10, ttl=5)
+    ttl.set("a", 1)
+    ttl.set("b", 2, ttl=60)
+
+    clock[0] += 5
+
+    assert ttl.get("a") is None
+    assert ttl.get("b") == 2
+    assert ttl.stats()["expirations"] == 1
+    assert ttl.stats()["hits"] == 1
+    assert ttl.stats()["misses"] == 1
+
+
+def test_sliding_ttl_is_an_idle_timeout(clock: list[float]) -> None:
+    idle: TTLCache[str, int] = TTLCache(10, ttl=5, sliding=True)
+    idle.set("a", 1)
+
+    for _ in range(3):
+        clock[0] += 4
+        assert idle.get("a") == 1
+
+    clock[0] += 5
+    assert idle.get("a") is None
+
+
+def test_weight_limit() -> None:
+    weighted: TTLCache[str, str] = TTLCache(10, max_weight=10, weigher=len)
+    weighted.set("a", "x" * 6)
+    weighted.set("b", "x" * 4)
+    weighted.set("c", "x" * 3)
+
+    assert "a" not in weighted
+    assert weighted.weight == 7
+
+    # Larger than the whole cache: not stored, nothing flushed
+    weighted.set("d", "x" * 11)
+    assert "d" not in weighted
+    assert len(weighted) == 2
+
+
+def test_pop_and_purge(clock: list[float]) -> None:
+    evicted: list[str] = []
+    entries: TTLCache[str, int] = TTLCache(
+        10, ttl=5, on_evict=lambda k, v: evicted.append(k)
+    )
+    entries.set("a", 1)
+    entries.set("b", 2, ttl=60)
+    entries.set("c", 3)
+
+    assert entries.pop("c") == 3
+    assert entries.pop("c", 0) == 0
+
+    clock[0] += 5
+    assert entries.purge_expired() == 1
+    assert evicted == ["a"]
+    assert list(entries) == ["b"]
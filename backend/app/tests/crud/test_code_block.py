@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+
+from app.core.db import engine
+from app.crud_ops.code_block import upsert_code_blocks_statement
+from app.models.code_block import CodeBlock
+
+
+@pytest.fixture(scope="session", autouse=True)
+def db() -> None:
+    """Building the upsert needs no database."""
+
+
+def rows(code_blocks: list[CodeBlock]) -> list[tuple[str | None, int]]:
+    """Content hash and occurrence count of each row the upsert inserts."""
+    params = upsert_code_blocks_statement(code_blocks).compile(engine).params
+    count = sum(1 for key in params if key.startswith("content_hash_m"))
+    return [
+        (params[f"content_hash_m{index}"], params[f"occurrence_count_m{index}"])
+        for index in range(count)
+    ]
+
+
+def block(content_hash: str | None) -> CodeBlock:
+    return CodeBlock(
+        code="df.groupby('region').total.mean()",
+        conversation_id=uuid.uuid4(),
+        user_id=uuid.uuid4(),
+        content_hash=content_hash,
+    )
+
+
+def test_repeats_are_merged_into_one_row() -> None:
+    assert rows([block("a"), block("b"), block("a")]) == [("a", 2), ("b", 1)]
+
+
+def test_blocks_without_a_hash_are_never_merged() -> None:
+    assert rows([block(None), block(None)]) == [(None, 1), (None, 1)]
+
+
+def test_merged_rows_keep_their_own_counts() -> None:
+    repeated = block("a")
+    repeated.occurrence_count = 3
+    assert rows([block("a"), repeated]) == [("a", 4)]
+
+
+def test_repeats_only_bump_counts_and_last_seen() -> None:
+    statement = upsert_code_blocks_statement([block("a")])
+    sql = str(statement.compile(engine))
+    assert "ON CONFLICT (user_id, content_hash) DO UPDATE SET " in sql
+    updated = sql.split("DO UPDATE SET ")[1].split(" RETURNING")[0]
+    assert [assignment.split(" = ")[0] for assignment in updated.split(", ")] == [
+        "occurrence_count",
+        "last_seen_at",
+        "last_seen_conversation_id",
+    ]
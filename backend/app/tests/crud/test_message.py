@@ -0,0 +1,79 @@
+import uuid
+from typing import Any
+
+import pytest
+from sqlalchemy import Update
+
+from app.core.db import engine
+from app.crud_ops.conversation import message_added_statement
+from app.crud_ops.message import build_message
+from app.models.message import MessageCreate, MessageRole
+from app.services.token_estimator import estimate_tokens
+
+
+@pytest.fixture(scope="session", autouse=True)
+def db() -> None:
+    """Building messages and statements needs no database."""
+
+
+def compiled(statement: Update) -> tuple[str, dict[str, Any]]:
+    compiled = statement.compile(engine)
+    return str(compiled), compiled.params
+
+
+def message_in(content: str = "Show me the sales by region") -> MessageCreate:
+    return MessageCreate(
+        role=MessageRole.ASSISTANT,
+        content=content,
+        conversation_id=uuid.uuid4(),
+    )
+
+
+def test_build_message_uses_the_given_conversation() -> None:
+    conversation_id = uuid.uuid4()
+    message = build_message(message_in=message_in(), conversation_id=conversation_id)
+    assert message.conversation_id == conversation_id
+    assert message.role == MessageRole.ASSISTANT
+    assert message.is_truncated is False
+
+
+def test_build_message_estimates_tokens() -> None:
+    content = "x" * 400
+    message = build_message(
+        message_in=message_in(content), conversation_id=uuid.uuid4()
+    )
+    assert message.token_count == estimate_tokens(content)
+
+
+def test_build_message_keeps_an_announced_id() -> None:
+    message_id = uuid.uuid4()
+    message = build_message(
+        message_in=message_in(),
+        conversation_id=uuid.uuid4(),
+        message_id=message_id,
+    )
+    assert message.id == message_id
+    # Without one a fresh id is generated
+    assert build_message(message_in=message_in(), conversation_id=uuid.uuid4()).id
+
+
+def test_message_added_statement_increments_in_the_database() -> None:
+    conversation_id = uuid.uuid4()
+    sql, params = compiled(message_added_statement(conversation_id, token_count=42))
+    assert (
+        "message_count=(conversation.message_count + %(message_count_1)s::INTEGER)"
+        in sql
+    )
+    assert "token_count=(conversation.token_count + %(token_count_1)s::INTEGER)" in sql
+    assert "last_message_preview" not in sql
+    assert params["message_count_1"] == 1
+    assert params["token_count_1"] == 42
+    assert params["id_1"] == conversation_id
+
+
+def test_message_added_statement_sets_the_preview() -> None:
+    sql, params = compiled(
+        message_added_statement(uuid.uuid4(), last_message_preview="Here you go")
+    )
+    assert "last_message_preview=%(last_message_preview)s::VARCHAR" in sql
+    assert params["last_message_preview"] == "Here you go"
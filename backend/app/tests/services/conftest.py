@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def db() -> None:
+    """Service unit tests run without a database."""
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
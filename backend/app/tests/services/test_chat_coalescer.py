@@ -0,0 +1,79 @@
+import json
+from typing import Any
+
+import pytest
+
+from app.services.chat_coalescer import StreamBroadcast
+
+pytestmark = pytest.mark.anyio
+
+
+def parse(frame: str) -> tuple[int, dict[str, Any]]:
+    id_line, data_line = frame.strip().split("\n")
+    return int(id_line.removeprefix("id: ")), json.loads(
+        data_line.removeprefix("data: ")
+    )
+
+
+def publish_content(broadcast: StreamBroadcast, *chunks: str) -> None:
+    for chunk in chunks:
+        broadcast.publish({"type": "content", "content": chunk})
+
+
+async def read_all(
+    broadcast: StreamBroadcast, last_event_id: int | None = None
+) -> list[tuple[int, dict[str, Any]]]:
+    return [parse(frame) async for frame in broadcast.subscribe(last_event_id)]
+
+
+async def test_replays_everything_from_the_start() -> None:
+    broadcast = StreamBroadcast(max_frames=8)
+    publish_content(broadcast, "a", "b", "c")
+    broadcast.close()
+
+    frames = await read_all(broadcast)
+
+    assert [event_id for event_id, _ in frames] == [0, 1, 2]
+    assert "".join(event["content"] for _, event in frames) == "abc"
+
+
+async def test_reconnect_resumes_after_last_event_id() -> None:
+    broadcast = StreamBroadcast(max_frames=8)
+    publish_content(broadcast, "a", "b", "c", "d")
+    broadcast.close()
+
+    frames = await read_all(broadcast, last_event_id=1)
+
+    assert [event_id for event_id, _ in frames] == [2, 3]
+
+
+async def test_late_reconnect_gets_a_snapshot() -> None:
+    broadcast = StreamBroadcast(max_frames=2)
+    publish_content(broadcast, "a", "b", "c", "d")
+    broadcast.close()
+
+    frames = await read_all(broadcast, last_event_id=0)
+
+    assert frames[0] == (1, {"type": "snapshot", "message_id": "None", "content": "ab"})
+    assert [event_id for event_id, _ in frames[1:]] == [2, 3]
+    assert (
+        frames[0][1]["content"] + "".join(e["content"] for _, e in frames[1:]) == "abcd"
+    )
+
+
+async def test_slow_reader_never_gets_frames_out_of_order() -> None:
+    broadcast = StreamBroadcast(max_frames=4)
+    publish_content(broadcast, "a", "b", "c", "d")
+    subscriber = broadcast.subscribe()
+
+    first = parse(await subscriber.__anext__())
+    # Evicts frames 0 and 1 while the reader is suspended after frame 0
+    publish_content(broadcast, "e", "f")
+    broadcast.close()
+    rest = [parse(frame) async for frame in subscriber]
+
+    assert first[0] == 0
+    assert rest[0] == (1, {"type": "snapshot", "message_id": "None", "content": "ab"})
+    assert [event_id for event_id, _ in rest[1:]] == [2, 3, 4, 5]
+    text = rest[0][1]["content"] + "".join(e["content"] for _, e in rest[1:])
+    assert text == "abcdef"
@@ -0,0 +1,128 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.services.code_parser import CodeParser, IncrementalFenceParser, TagMatcher
+
+ANSWERS = json.loads(
+    (Path(__file__).parents[2] / "bench" / "llm_answers.json").read_text()
+)
+
+REPLY = (
+    "Here is the query:\n"
+    "```sql\n"
+    "SELECT region, AVG(total) FROM orders GROUP BY region;\n"
+    "```\n"
+    "And the plot:\n"
+    '```python title="plot.py"\n'
+    "import matplotlib.pyplot as plt\n"
+    "\n"
+    "plt.plot(months, totals)\n"
+    "```"
+)
+
+
+def stream(text: str, size: int) -> list[dict[str, str]]:
+    fences = IncrementalFenceParser()
+    blocks = []
+    for start in range(0, len(text), size):
+        blocks.extend(fences.feed(text[start : start + size]))
+    return blocks + fences.finish()
+
+
+def test_blocks_are_returned_when_their_fence_closes() -> None:
+    fences = IncrementalFenceParser()
+    assert fences.feed("Here is the query:\n```sql\nSELECT 1;\n") == []
+
+    assert fences.feed("```\nMore prose") == [{"language": "sql", "code": "SELECT 1;"}]
+
+
+def test_language_is_the_first_word_of_the_info_string() -> None:
+    blocks = stream(REPLY, len(REPLY))
+    assert [block["language"] for block in blocks] == ["sql", "python"]
+    assert (
+        blocks[1]["code"]
+        == "import matplotlib.pyplot as plt\n\nplt.plot(months, totals)"
+    )
+
+
+def test_missing_language_defaults_to_python() -> None:
+    assert stream("```\nx = 1\n```\n", 4) == [{"language": "python", "code": "x = 1"}]
+
+
+@pytest.mark.parametrize("size", [1, 5, 64])
+def test_fence_can_close_at_the_end_of_a_code_line(size: int) -> None:
+    assert stream("```python\ny = 2\nx = 1```\nDone.", size) == [
+        {"language": "python", "code": "y = 2\nx = 1"}
+    ]
+    assert stream("```\nx = 1```", size) == [{"language": "python", "code": "x = 1"}]
+
+
+def test_empty_and_unclosed_fences_yield_nothing() -> None:
+    assert stream("```python\n\n```\n", 3) == []
+    assert stream("```python\nx = 1\n", 3) == []
+
+
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_chunk_boundaries_do_not_matter(size: int) -> None:
+    assert stream(REPLY, size) == stream(REPLY, len(REPLY))
+
+
+@pytest.mark.parametrize("size", [1, 13, 200])
+def test_streamed_blocks_match_find_blocks(size: int) -> None:
+    for answer in ANSWERS + [REPLY]:
+        fenced = [(block["code"], block["language"]) for block in stream(answer, size)]
+        # Inline code found by find_blocks comes after the fenced blocks
+        assert CodeParser.find_blocks(answer)[: len(fenced)] == fenced
+
+
+def test_prose_leaves_out_fenced_code() -> None:
+    fences = IncrementalFenceParser(keep_prose=True)
+    fences.feed(REPLY)
+    fences.finish()
+    assert fences.prose() == "Here is the query:\nAnd the plot:"
+
+
+def test_terms_match_whole_words_only() -> None:
+    matcher = TagMatcher(("api", "data", "sql"))
+    assert matcher.find("A rapid update to the metadata, in mysql") == []
+    assert matcher.find("Call the API, then load the data (SQL).") == [
+        "api",
+        "data",
+        "sql",
+    ]
+
+
+def test_the_longest_term_wins() -> None:
+    matcher = TagMatcher(("data", "data analysis", "exploratory data analysis"))
+    assert matcher.find("An exploratory data analysis of the data") == [
+        "exploratory data analysis",
+        "data",
+    ]
+
+
+def test_multi_word_terms_match_across_whitespace() -> None:
+    matcher = TagMatcher(("machine learning",))
+    assert matcher.find("Machine\n  learning and machine learning") == [
+        "machine learning"
+    ]
+    assert matcher.find("machinelearning") == []
+
+
+def test_terms_are_ordered_by_frequency() -> None:
+    matcher = TagMatcher(("pandas", "numpy"))
+    assert matcher.find("numpy, then pandas, pandas and pandas") == ["pandas", "numpy"]
+
+
+def test_custom_tags_extend_the_default_vocabulary() -> None:
+    parser = CodeParser()
+    text = "Load the quokka tracker with pandas #weekly"
+    assert parser.extract_tags_from_text(text) == ["pandas", "weekly"]
+
+    tags = parser.extract_tags_from_text(text, custom_tags=["Quokka  Tracker"])
+    assert tags == ["quokka tracker", "pandas", "weekly"]
+    # Matchers are shared by users with the same tags
+    assert parser.tag_matcher(["quokka tracker"]) is parser.tag_matcher(
+        ["Quokka  Tracker"]
+    )
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+
+import pytest
+
+from app.core.config import settings
+from app.models.user import User
+from app.services.llm_resilience import CircuitBreaker, LLMError
+from app.services.llm_service import (
+    ChatMessage,
+    LLMConfig,
+    LLMProvider,
+    LLMService,
+    LLMUsage,
+)
+from app.services.token_estimator import estimate_tokens
+
+
+def provider_error() -> LLMError:
+    return LLMError("upstream failed", provider="openai", retryable=True)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.usefixtures("clock")
+def test_opens_after_threshold() -> None:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    for _ in range(2):
+        breaker.record_failure(provider_error())
+    assert breaker.allow()
+
+    breaker.record_failure(provider_error())
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+@pytest.mark.usefixtures("clock")
+def test_client_errors_do_not_count() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+
+    breaker.record_failure(LLMError("bad key", provider="openai", retryable=False))
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_allows_a_single_probe(clock: list[float]) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure(provider_error())
+
+    clock[0] += 30
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_opens_again(clock: list[float]) -> None:
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure(provider_error())
+
+    clock[0] += 30
+    assert breaker.allow()
+    breaker.record_failure(provider_error())
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_lost_probe_expires(clock: list[float]) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure(provider_error())
+    clock[0] += 30
+    assert breaker.allow()
+
+    # The probe never reported back
+    clock[0] += 30
+    assert breaker.allow()
+
+
+class SlowFirstClient:
+    """Mock provider client whose first request stalls before its first token."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+
+    async def stream(
+        self, _messages: list[ChatMessage], _config: LLMConfig, _usage: LLMUsage
+    ) -> AsyncGenerator[str, None]:
+        self.requests += 1
+        if self.requests == 1:
+            await asyncio.sleep(10)
+        yield "hedged"
+
+
+@pytest.mark.anyio
+async def test_cancelled_hedge_is_counted(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "LLM_HEDGE_AFTER_SECONDS", 0.01)
+    service = LLMService()
+    client = SlowFirstClient()
+    monkeypatch.setattr(service, "get_client", lambda _user, _provider: client)
+    user = User(email="hedge@example.com", hashed_password="x")
+    messages = [ChatMessage(role="user", content="Average order value by region")]
+
+    chunks = [
+        chunk
+        async for chunk in service.create_chat_stream(
+            user, messages, LLMConfig(provider=LLMProvider.MOCK)
+        )
+    ]
+
+    assert chunks == ["hedged"]
+    stats = service.resilience_stats()
+    assert stats["hedged_requests"] == 1
+    assert stats["hedge_cancelled_input_tokens"] == estimate_tokens(messages[0].content)
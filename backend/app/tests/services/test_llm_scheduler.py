@@ -0,0 +1,105 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services.llm_scheduler import LLMScheduler, SchedulerRejected
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_free_slot_is_granted_immediately() -> None:
+    scheduler = LLMScheduler(
+        max_per_user=2, max_per_provider=2, max_queue=4, max_wait=1
+    )
+    user_id = uuid.uuid4()
+
+    ticket = await scheduler.acquire(user_id, "openai")
+
+    assert ticket.position == 0
+    assert scheduler.stats()["active"] == 1
+    scheduler.release(ticket)
+    assert scheduler.stats()["active"] == 0
+
+
+async def test_waiters_are_served_round_robin_across_users() -> None:
+    scheduler = LLMScheduler(
+        max_per_user=4, max_per_provider=1, max_queue=8, max_wait=5
+    )
+    heavy, light = uuid.uuid4(), uuid.uuid4()
+    granted: list[str] = []
+
+    async def request(user_id: uuid.UUID, name: str) -> None:
+        async with scheduler.slot(user_id, "openai"):
+            granted.append(name)
+            await asyncio.sleep(0)
+
+    holder = await scheduler.acquire(heavy, "openai")
+    tasks = [
+        asyncio.create_task(request(heavy, "heavy-1")),
+        asyncio.create_task(request(heavy, "heavy-2")),
+        asyncio.create_task(request(heavy, "heavy-3")),
+    ]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request(light, "light-1")))
+    await asyncio.sleep(0)
+    assert scheduler.stats()["queued"] == 4
+
+    scheduler.release(holder)
+    await asyncio.gather(*tasks)
+
+    assert granted == ["heavy-1", "light-1", "heavy-2", "heavy-3"]
+    assert scheduler.stats()["active"] == 0
+
+
+async def test_full_queue_rejects() -> None:
+    scheduler = LLMScheduler(
+        max_per_user=1, max_per_provider=1, max_queue=1, max_wait=5
+    )
+    user_id = uuid.uuid4()
+    holder = await scheduler.acquire(user_id, "openai")
+    waiting = asyncio.create_task(scheduler.acquire(user_id, "openai"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(SchedulerRejected):
+        await scheduler.acquire(uuid.uuid4(), "openai")
+    assert scheduler.rejected == 1
+
+    scheduler.release(holder)
+    scheduler.release(await waiting)
+
+
+async def test_waiting_too_long_rejects_and_leaves_the_queue() -> None:
+    scheduler = LLMScheduler(
+        max_per_user=1, max_per_provider=1, max_queue=4, max_wait=0.01
+    )
+    user_id = uuid.uuid4()
+    holder = await scheduler.acquire(user_id, "openai")
+
+    with pytest.raises(SchedulerRejected):
+        await scheduler.acquire(user_id, "openai")
+
+    assert scheduler.timed_out == 1
+    assert scheduler.stats()["queued"] == 0
+    scheduler.release(holder)
+    assert scheduler.stats()["active"] == 0
+
+
+async def test_switch_moves_the_slot_to_another_provider() -> None:
+    scheduler = LLMScheduler(
+        max_per_user=2, max_per_provider=1, max_queue=4, max_wait=5
+    )
+    user_id = uuid.uuid4()
+    ticket = await scheduler.acquire(user_id, "openai")
+
+    await scheduler.switch(ticket, "anthropic")
+
+    assert ticket.provider == "anthropic"
+    assert scheduler.stats()["active_by_provider"] == {"anthropic": 1}
+    # The freed openai slot can be used right away
+    other = await scheduler.acquire(uuid.uuid4(), "openai")
+    assert other.position == 0
+
+    scheduler.release(ticket)
+    scheduler.release(other)
+    assert scheduler.stats()["active"] == 0
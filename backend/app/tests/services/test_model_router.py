@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import model_router as router_module
+from app.services.model_router import ModelRouter
+
+HAIKU = "claude-3-haiku-20240307"
+HAIKU_35 = "claude-3-5-haiku-latest"
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.usefixtures("clock")
+def test_unmeasured_models_are_probed_once_each() -> None:
+    router = ModelRouter(max_age=300, tolerance=1.25)
+    candidates = [HAIKU_35, HAIKU]
+
+    # Cheapest unmeasured model first, then the other one
+    assert router.choose(candidates) == HAIKU
+    assert router.choose(candidates) == HAIKU_35
+    # Both probes in flight: the cheaper one
+    assert router.choose(candidates) == HAIKU
+
+
+@pytest.mark.usefixtures("clock")
+def test_cheaper_model_wins_within_tolerance() -> None:
+    router = ModelRouter(max_age=300, tolerance=1.25)
+    router.observe(HAIKU_35, 400)
+    router.observe(HAIKU, 480)
+
+    assert router.choose([HAIKU_35, HAIKU]) == HAIKU
+
+    router.observe(HAIKU, 2000)
+    assert router.choose([HAIKU_35, HAIKU]) == HAIKU_35
+
+
+def test_slow_model_is_probed_again_once_its_estimate_is_stale(
+    clock: list[float],
+) -> None:
+    router = ModelRouter(max_age=300, tolerance=1.25)
+    router.observe(HAIKU_35, 400)
+    router.observe(HAIKU, 5000)
+    assert router.choose([HAIKU_35, HAIKU]) == HAIKU_35
+
+    clock[0] += 200
+    router.observe(HAIKU_35, 400)
+    clock[0] += 100
+
+    assert router.choose([HAIKU_35, HAIKU]) == HAIKU
+    assert router.stats()[HAIKU]["probes"] == 1
+    # Only one request probes until the new sample arrives
+    assert router.choose([HAIKU_35, HAIKU]) == HAIKU_35
+
+    router.observe(HAIKU, 300)
+    assert router.latency_ms[HAIKU] < 5000
+
+
+def test_slow_strong_tier_is_probed_again(
+    clock: list[float], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "MODEL_ROUTING_SLOW_TTFT_MS", 1000.0)
+    router = ModelRouter(max_age=300, tolerance=1.25)
+    for model in router_module.MODEL_TIERS["openai"]["strong"]:
+        router.observe(model, 5000)
+
+    decision = router.route(
+        "openai", message_tokens=200, prompt_tokens=100, data_context=False
+    )
+    assert decision is not None and decision.reason == "strong tier slow"
+
+    clock[0] += 300
+    decision = router.route(
+        "openai", message_tokens=200, prompt_tokens=100, data_context=False
+    )
+    assert decision is not None
+    assert decision.tier == "strong"
+    assert decision.model == "gpt-4o"
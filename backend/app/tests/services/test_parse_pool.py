@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.parse_pool import ParsePool
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_timed_out_job_keeps_its_slot_until_it_finishes() -> None:
+    pool = ParsePool(workers=1, max_pending=1, timeout=0.2, preload=())
+    pool.start()
+    try:
+        # time.sleep returns None; the fallback's result shows it was used
+        assert await pool.run(time.sleep, str, 1.0) == "1.0"
+        assert pool.timeouts == 1
+        assert pool.pending == 1
+
+        # The worker is still busy, so the next job isn't queued behind it
+        assert await pool.run(time.sleep, str, 0.0) == "0.0"
+        assert pool.rejected == 1
+
+        for _ in range(50):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.1)
+        assert pool.pending == 0
+        assert await pool.run(time.sleep, str, 0.0) is None
+        assert pool.completed == 1
+    finally:
+        pool.stop()
@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+
+from app.services.reply_pipeline import ReplyPipeline
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_full_queue_leaves_the_job_to_the_sweep() -> None:
+    # Not started, so nothing takes jobs off the queue
+    pipeline = ReplyPipeline(workers=1, queue_size=1)
+    assert pipeline.enqueue(uuid.uuid4()) is not None
+    overflow = uuid.uuid4()
+
+    assert pipeline.enqueue(overflow) is None
+    assert pipeline.stats()["overflowed"] == 1
+    assert overflow not in pipeline.in_flight
+    assert await pipeline.wait(None, timeout=1) is None
+
+
+async def test_enqueueing_a_job_twice_returns_the_same_future() -> None:
+    pipeline = ReplyPipeline(workers=1, queue_size=4)
+    job_id = uuid.uuid4()
+    future = pipeline.enqueue(job_id)
+
+    assert pipeline.enqueue(job_id) is future
+    assert pipeline.queue.qsize() == 1
+    assert job_id in pipeline.in_flight
+
+
+async def test_start_uses_a_fresh_queue() -> None:
+    pipeline = ReplyPipeline(workers=1, queue_size=4)
+    pipeline.enqueue(uuid.uuid4())
+
+    pipeline.start()
+    try:
+        assert pipeline.queue.qsize() == 0
+        assert pipeline.queue.maxsize == 4
+        assert not pipeline.in_flight
+    finally:
+        await pipeline.stop()
@@ -0,0 +1,23 @@
+from app.models.user import User
+from app.services.llm_service import ChatMessage, LLMProvider
+from app.services.summarizer import ConversationSummarizer
+
+
+def test_provider_follows_the_users_keys() -> None:
+    user = User(email="a@example.com", hashed_password="x")
+    assert ConversationSummarizer.pick_provider(user) is None
+
+    user.api_keys = {"anthropic": "key"}
+    assert ConversationSummarizer.pick_provider(user) == LLMProvider.ANTHROPIC
+
+    user.api_keys = {"anthropic": "key", "openai": "key"}
+    assert ConversationSummarizer.pick_provider(user) == LLMProvider.OPENAI
+
+
+def test_summaries_use_the_cheapest_fast_tier_model() -> None:
+    messages = [ChatMessage(role="user", content="Summarize this")]
+
+    config = ConversationSummarizer.pick_config(LLMProvider.ANTHROPIC, messages)
+
+    assert config.model == "claude-3-haiku-20240307"
+    assert not config.stream
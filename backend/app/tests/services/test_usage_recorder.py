@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.models.usage import UsageEvent
+from app.services.usage_recorder import UsageRecorder
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def users() -> set[uuid.UUID]:
+    return {uuid.uuid4()}
+
+
+@pytest.fixture
+def written(monkeypatch: pytest.MonkeyPatch, users: set[uuid.UUID]) -> list[UsageEvent]:
+    """Stand in for the database, rejecting events for unknown users."""
+    rows: list[UsageEvent] = []
+
+    def write(events: list[UsageEvent]) -> None:
+        if any(event.user_id not in users for event in events):
+            raise IntegrityError("INSERT INTO usageevent", {}, Exception("user_id"))
+        rows.extend(events)
+
+    monkeypatch.setattr(UsageRecorder, "write", staticmethod(write))
+    return rows
+
+
+def event(user_id: uuid.UUID) -> UsageEvent:
+    return UsageEvent(user_id=user_id, provider="openai", model="gpt-4o")
+
+
+async def test_event_for_a_missing_user_is_dropped_from_its_batch(
+    users: set[uuid.UUID], written: list[UsageEvent]
+) -> None:
+    (user_id,) = users
+    recorder = UsageRecorder()
+    events = [event(user_id), event(uuid.uuid4()), event(user_id)]
+    for usage in events:
+        recorder.record(usage)
+
+    await recorder.flush()
+
+    assert written == [events[0], events[2]]
+    assert recorder._buffer == []
+
+
+async def test_transient_failure_keeps_the_batch(
+    monkeypatch: pytest.MonkeyPatch, users: set[uuid.UUID]
+) -> None:
+    def write(_events: list[UsageEvent]) -> None:
+        raise OperationalError("INSERT INTO usageevent", {}, Exception("timeout"))
+
+    monkeypatch.setattr(UsageRecorder, "write", staticmethod(write))
+    recorder = UsageRecorder()
+    events = [event(user_id) for user_id in users]
+    for usage in events:
+        recorder.record(usage)
+
+    await recorder.flush()
+
+    assert recorder._buffer == events
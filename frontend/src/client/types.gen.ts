@@ -109,6 +109,9 @@ export type CodeBlockPublic = {
   functions_defined: Array<string>
   variables_created: Array<string>
   tags: Array<string>
+  occurrence_count?: number
+  last_seen_at?: string | null
+  last_seen_conversation_id?: string | null
   version: number
   parent_version_id: string | null
 }
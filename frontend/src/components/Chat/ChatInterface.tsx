@@ -19,7 +19,7 @@ interface ChatInterfaceProps {
 export const ChatInterface = ({
   conversationId,
   provider = LLMProvider.OPENAI,
-  model = "gpt-4",
+  model = "auto",
 }: ChatInterfaceProps) => {
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const [isStreaming, setIsStreaming] = useState(false)
@@ -53,8 +53,8 @@ export const ChatInterface = ({
           setStreamingMessage((prev) => prev + (response.content || ""))
         } else if (response.type === "code_block" && response.code_block) {
           toaster.create({
-            title: "Code block saved",
-            description: `${response.code_block.language} code saved to library`,
+            title: "Code block ready",
+            description: `${response.code_block.language} code will be saved to library`,
             type: "success",
             duration: 3000,
           })